@@ -1,28 +1,94 @@
+from django import forms
 from django.contrib import admin
-from gestion.models import Cliente, Trabajador, Habitacion, Reserva, CheckIn, CheckOut
+from django.contrib.auth.password_validation import validate_password
+from django.db.models import Q
+from gestion.models import (
+    Cliente, Trabajador, Habitacion, Reserva, CheckIn, CheckOut, PlanTarifa, ReservaArchivada, CheckInArchivado,
+    CheckOutArchivado,
+)
+from gestion.paginacion import PaginadorConteoEstimado
+
+
+class ListadoGrandeAdmin(admin.ModelAdmin):
+    """
+    Configuración común para listados con muchas filas.
+
+    - `paginator`: Usa el conteo estimado del motor en lugar de `COUNT(*)` sobre la tabla completa.
+    - `show_full_result_count`: Evita un segundo conteo del total al filtrar o buscar.
+    """
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+
+
+def _buscar_clientes(termino):
+    """
+    Ids de los clientes cuyo RUT, nombre, apellido o correo comienzan con `termino`.
+
+    Usa las columnas normalizadas e indexadas de Cliente, de modo que "jose" encuentra
+    a "José" sin recorrer la tabla con `LIKE '%...%'`.
+    """
+    return Cliente.objects.buscar(termino).values('pk')
+
 
 @admin.register(Cliente)
-class ClienteAdmin(admin.ModelAdmin):
+class ClienteAdmin(ListadoGrandeAdmin):
     """
     Configuración del panel de administración para el modelo Cliente.
 
     - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
     - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
+      La búsqueda es por prefijo sobre los campos normalizados (ver `Cliente.objects.buscar`).
     - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
     """
     list_display = ('rut', 'nombre', 'apellido', 'correo', 'telefono', 'fecha_registro')
-    search_fields = ('rut', 'nombre', 'apellido', 'correo')
+    search_fields = ('^rut_normalizado', '^nombre_normalizado', '^apellido_normalizado', '^correo')
     list_filter = ('fecha_registro',)
 
+    def get_search_results(self, request, queryset, search_term):
+        return queryset.buscar(search_term), False
+
+class TrabajadorAdminForm(forms.ModelForm):
+    """
+    Formulario del panel de administración para Trabajador con asignación de contraseña.
+
+    - `nueva_password`: Si se indica, reemplaza la contraseña del trabajador (se valida con
+      `AUTH_PASSWORD_VALIDATORS`). Queda como temporal si se marca `password_temporal`.
+    """
+    nueva_password = forms.CharField(
+        label="Nueva contraseña", required=False, strip=False, widget=forms.PasswordInput,
+        help_text="Déjela en blanco para conservar la contraseña actual.")
+
+    class Meta:
+        model = Trabajador
+        fields = ('rut', 'nombre', 'apellido', 'correo', 'password_temporal')
+
+    def clean_nueva_password(self):
+        nueva = self.cleaned_data['nueva_password']
+        if nueva:
+            validate_password(nueva, self.instance)
+        return nueva
+
+    def save(self, commit=True):
+        trabajador = super().save(commit=False)
+        if self.cleaned_data['nueva_password']:
+            trabajador.set_password(self.cleaned_data['nueva_password'],
+                                    temporal=self.cleaned_data['password_temporal'])
+        if commit:
+            trabajador.save()
+        return trabajador
+
+
 @admin.register(Trabajador)
 class TrabajadorAdmin(admin.ModelAdmin):
     """
     Configuración del panel de administración para el modelo Trabajador.
 
+    - `form`: Permite asignar una contraseña nueva (ver `TrabajadorAdminForm`).
     - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
     - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
     """
-    list_display = ('rut', 'nombre', 'apellido')
+    form = TrabajadorAdminForm
+    list_display = ('rut', 'nombre', 'apellido', 'password_temporal')
     search_fields = ('rut', 'nombre', 'apellido')
 
 @admin.register(Habitacion)
@@ -34,51 +100,144 @@ class HabitacionAdmin(admin.ModelAdmin):
     - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
     - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
     """
-    list_display = ('numero_habitacion', 'precio', 'estado')
+    list_display = ('numero_habitacion', 'tipo', 'precio', 'estado')
     search_fields = ('numero_habitacion',)
-    list_filter = ('estado',)
+    list_filter = ('estado', 'tipo')
+
+@admin.register(PlanTarifa)
+class PlanTarifaAdmin(admin.ModelAdmin):
+    """
+    Configuración del panel de administración para el modelo PlanTarifa.
+
+    Al guardar o borrar un plan se recalcula el calendario de tarifas (ver gestion.tarifas).
+
+    - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
+    - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
+    """
+    list_display = (
+        'nombre', 'tipo_habitacion', 'fecha_desde', 'fecha_hasta',
+        'dias_semana', 'ocupacion_minima', 'ajuste', 'prioridad', 'activo'
+    )
+    list_filter = ('activo', 'tipo_habitacion')
 
 @admin.register(Reserva)
-class ReservaAdmin(admin.ModelAdmin):
+class ReservaAdmin(ListadoGrandeAdmin):
     """
     Configuración del panel de administración para el modelo Reserva.
 
     - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
+      El valor total se calcula en la base de datos (`Reserva.objects.con_detalle`) y se puede ordenar.
+    - `list_select_related`: Cliente y habitación se obtienen en la misma consulta del listado.
     - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
-    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
+    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración:
+      prefijo del cliente (RUT, nombre, apellido o correo) o del número de habitación.
     """
     list_display = (
-        'id', 'cliente', 'habitacion', 'estado', 
+        'id', 'cliente', 'habitacion', 'estado',
         'fecha_registro', 'fecha_ingreso', 'noches', 'valor_total'
     )
+    list_select_related = ('cliente', 'habitacion')
     list_filter = ('estado', 'fecha_registro', 'habitacion')
-    search_fields = ('cliente__nombre', 'habitacion__numero_habitacion')
+    search_fields = ('^habitacion__numero_habitacion', '^cliente__nombre_normalizado')
 
-@admin.register(CheckIn)
-class CheckInAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        return super().get_queryset(request).con_detalle()
+
+    def get_search_results(self, request, queryset, search_term):
+        termino = search_term.strip()
+        if not termino:
+            return queryset, False
+        return queryset.filter(
+            Q(habitacion__numero_habitacion__istartswith=termino) | Q(cliente__in=_buscar_clientes(termino))
+        ), False
+
+    @admin.display(description="Valor total", ordering='total')
+    def valor_total(self, reserva):
+        return reserva.total
+
+class RegistroReservaAdmin(ListadoGrandeAdmin):
     """
-    Configuración del panel de administración para el modelo CheckIn.
+    Configuración común de los registros de entrada y salida.
 
     - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
-    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
+    - `list_select_related`: La reserva y su habitación se obtienen en la misma consulta del listado.
+    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración:
+      id exacto de la reserva o prefijo del RUT, nombre o apellido del cliente.
     - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
     """
     list_display = ('id', 'reserva', 'fecha_hora', 'qr_escaneado')
-    search_fields = ('reserva__id', 'reserva__cliente__rut')
+    list_select_related = ('reserva__habitacion',)
+    search_fields = ('=reserva__id', '^reserva__cliente__rut_normalizado')
     list_filter = ('fecha_hora', 'qr_escaneado')
 
+    def get_search_results(self, request, queryset, search_term):
+        termino = search_term.strip()
+        if not termino:
+            return queryset, False
+        filtro = Q(reserva__cliente__in=_buscar_clientes(termino))
+        if termino.isdigit():
+            filtro |= Q(reserva_id=int(termino))
+        return queryset.filter(filtro), False
+
+@admin.register(CheckIn)
+class CheckInAdmin(RegistroReservaAdmin):
+    """
+    Configuración del panel de administración para el modelo CheckIn.
+    """
+
 @admin.register(CheckOut)
-class CheckOutAdmin(admin.ModelAdmin):
+class CheckOutAdmin(RegistroReservaAdmin):
     """
     Configuración del panel de administración para el modelo CheckOut.
+    """
+
+class SoloLecturaAdmin(ListadoGrandeAdmin):
+    """
+    Configuración común de las tablas del archivo histórico, que solo se consultan.
+
+    - Sin permisos para agregar, modificar ni borrar: las filas las mueve el archivado (gestion.archivo).
+    """
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ReservaArchivada)
+class ReservaArchivadaAdmin(SoloLecturaAdmin):
+    """
+    Configuración del panel de administración para el modelo ReservaArchivada.
 
     - `list_display`: Campos que se mostrarán en la vista de lista del panel de administración.
-    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración.
+    - `list_select_related`: Cliente y habitación se obtienen en la misma consulta del listado.
     - `list_filter`: Campos por los que se podrá filtrar en la vista de lista del panel de administración.
+    - `search_fields`: Campos que estarán disponibles para la búsqueda en el panel de administración:
+      prefijo del cliente (RUT, nombre, apellido o correo) o del número de habitación.
     """
-    list_display = ('id', 'reserva', 'fecha_hora', 'qr_escaneado')
-    search_fields = ('reserva__id', 'reserva__cliente__rut')
-    list_filter = ('fecha_hora', 'qr_escaneado')
+    list_display = ('id', 'cliente', 'habitacion', 'estado', 'fecha_ingreso', 'noches', 'precio_final', 'archivada')
+    list_select_related = ('cliente', 'habitacion')
+    list_filter = ('estado', 'fecha_ingreso')
+    search_fields = ('^habitacion__numero_habitacion', '^cliente__nombre_normalizado')
 
+    def get_search_results(self, request, queryset, search_term):
+        termino = search_term.strip()
+        if not termino:
+            return queryset, False
+        return queryset.filter(
+            Q(habitacion__numero_habitacion__istartswith=termino) | Q(cliente__in=_buscar_clientes(termino))
+        ), False
 
+@admin.register(CheckInArchivado)
+class CheckInArchivadoAdmin(SoloLecturaAdmin, RegistroReservaAdmin):
+    """
+    Configuración del panel de administración para el modelo CheckInArchivado.
+    """
 
+@admin.register(CheckOutArchivado)
+class CheckOutArchivadoAdmin(SoloLecturaAdmin, RegistroReservaAdmin):
+    """
+    Configuración del panel de administración para el modelo CheckOutArchivado.
+    """
@@ -0,0 +1,175 @@
+"""
+Archivo histórico de reservas: saca de las tablas activas las estadías ya terminadas.
+
+Las reservas pagadas o canceladas cuya salida es anterior al límite (por defecto,
+`settings.ARCHIVO_HORIZONTE_DIAS` días antes de ahora) se copian a
+ReservaArchivada, con sus Check-In y Check-Out, y se borran de las tablas activas
+junto con sus noches ocupadas. Así Reserva, CheckIn, CheckOut y Ocupacion solo
+contienen las estadías recientes o pendientes, y los listados y filtros no
+recorren todo el historial.
+
+Se procesa en lotes de `RESERVAS_POR_LOTE` reservas, cada uno en su propia
+transacción corta: las reservas del lote se bloquean por clave primaria y se
+vuelven a verificar antes de moverlas, de modo que una reserva modificada
+mientras tanto queda para una próxima ejecución. El borrado no envía señales,
+porque archivar no es una baja:
+
+- El registro de cambios no recibe entradas de borrado; el feed de los canales
+  entrega las reservas archivadas con sus últimos datos (ver gestion.sincronizacion).
+- Los resúmenes diarios se conservan. Las noches con estadías archivadas quedan
+  cerradas y ya no se recalculan (ver `fecha_cierre` y gestion.reportes).
+
+Las tablas del archivo solo se escriben aquí. El panel de administración las
+muestra en modo de solo lectura.
+"""
+import time as reloj
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.timezone import localtime, now
+
+from gestion import cache
+from gestion.models import (
+    CheckIn, CheckInArchivado, CheckOut, CheckOutArchivado, Ocupacion, Reserva, ReservaArchivada,
+)
+
+# Reservas movidas por transacción.
+RESERVAS_POR_LOTE = 1000
+
+# Estados de las estadías que ya no cambian una vez terminadas.
+ESTADOS_ARCHIVABLES = ('pagada', 'cancelada')
+
+
+def limite_por_defecto():
+    """
+    Momento antes del cual deben haber terminado las estadías archivadas: hoy menos `ARCHIVO_HORIZONTE_DIAS`.
+    """
+    return now() - timedelta(days=settings.ARCHIVO_HORIZONTE_DIAS)
+
+
+def archivables(limite):
+    """
+    Reservas pagadas o canceladas cuya estadía terminó antes de `limite`.
+
+    Returns:
+        QuerySet de Reserva.
+    """
+    return Reserva.objects.filter(estado__in=ESTADOS_ARCHIVABLES, fecha_salida__lt=limite)
+
+
+def fecha_cierre():
+    """
+    Obtiene la primera noche posterior a todas las estadías archivadas.
+
+    Las noches anteriores pueden tener estadías que ya no están en Ocupacion, por lo
+    que sus resúmenes diarios no deben recalcularse.
+
+    Returns:
+        Fecha, o None si el archivo está vacío.
+    """
+    salida = ReservaArchivada.objects.aggregate(ultima=Max('fecha_salida'))['ultima']
+    return localtime(salida).date() if salida else None
+
+
+def _en(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def _borrar(modelo, campo, ids):
+    # DELETE directo: QuerySet.delete cargaría cada reserva para enviar sus señales
+    sql = 'DELETE FROM {} WHERE {} IN ({})'.format(
+        connection.ops.quote_name(modelo._meta.db_table),
+        connection.ops.quote_name(modelo._meta.get_field(campo).column),
+        _en(ids),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ids)
+        return cursor.rowcount
+
+
+def _copiar(origen, destino, campo, ids, archivada=None):
+    """
+    Copia con un solo INSERT ... SELECT las filas de `origen` cuyo `campo` está en `ids`.
+
+    Las columnas de `destino` tienen los mismos nombres que las de `origen`, salvo
+    `archivada`, que recibe el valor indicado.
+    """
+    columnas = [f.column for f in destino._meta.concrete_fields if f.name != 'archivada']
+    valores = [connection.ops.quote_name(columna) for columna in columnas]
+    parametros = []
+    if archivada is not None:
+        columnas.append('archivada')
+        valores.append('%s')
+        parametros.append(destino._meta.get_field('archivada').get_db_prep_save(archivada, connection))
+    sql = 'INSERT INTO {} ({}) SELECT {} FROM {} WHERE {} IN ({})'.format(
+        connection.ops.quote_name(destino._meta.db_table),
+        ', '.join(connection.ops.quote_name(columna) for columna in columnas),
+        ', '.join(valores),
+        connection.ops.quote_name(origen._meta.db_table),
+        connection.ops.quote_name(origen._meta.get_field(campo).column),
+        _en(ids),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros + ids)
+        return cursor.rowcount
+
+
+def _archivar_lote(limite, ids):
+    """
+    Mueve al archivo las reservas indicadas que sigan siendo archivables, en una transacción.
+
+    Returns:
+        Diccionario con las filas movidas por tabla (vacío si ninguna era archivable).
+    """
+    with transaction.atomic():
+        ids = list(archivables(limite).filter(pk__in=ids).select_for_update().values_list('pk', flat=True))
+        if not ids:
+            return {}
+        movidas = {
+            'reservas': _copiar(Reserva, ReservaArchivada, 'id', ids, archivada=now()),
+            'checkins': _copiar(CheckIn, CheckInArchivado, 'reserva', ids),
+            'checkouts': _copiar(CheckOut, CheckOutArchivado, 'reserva', ids),
+            'noches': _borrar(Ocupacion, 'reserva', ids),
+        }
+        _borrar(CheckIn, 'reserva', ids)
+        _borrar(CheckOut, 'reserva', ids)
+        _borrar(Reserva, 'id', ids)
+    return movidas
+
+
+def archivar(limite=None, lote=RESERVAS_POR_LOTE, pausa=0):
+    """
+    Mueve al archivo todas las reservas archivables, lote por lote.
+
+    Attributes:
+        limite: Se archivan las estadías que terminaron antes de este momento (por defecto, `limite_por_defecto()`).
+        lote: Reservas por transacción.
+        pausa: Segundos de espera entre lotes, para dar paso a la carga normal y a la replicación.
+
+    Returns:
+        Diccionario con la cantidad de `lotes` y de filas movidas: `reservas`, `checkins`,
+        `checkouts` y `noches` (noches ocupadas borradas).
+    """
+    limite = limite or limite_por_defecto()
+    resultado = dict.fromkeys(('lotes', 'reservas', 'checkins', 'checkouts', 'noches'), 0)
+    ultima = 0
+    while True:
+        # Se recorre la clave primaria sin filtrar por estado, para que cada lote lea un
+        # tramo acotado de la tabla en lugar de ordenar todas las reservas de ese estado
+        ids = list(Reserva.objects.filter(pk__gt=ultima, fecha_salida__lt=limite)
+                   .order_by('pk').values_list('pk', flat=True)[:lote])
+        if not ids:
+            break
+        ultima = ids[-1]
+        movidas = _archivar_lote(limite, ids)
+        for tabla, cantidad in movidas.items():
+            resultado[tabla] += cantidad
+        if movidas:
+            resultado['lotes'] += 1
+            if pausa:
+                reloj.sleep(pausa)
+    if resultado['reservas']:
+        cache.invalidar_ocupacion()
+    return resultado
@@ -0,0 +1,188 @@
+"""
+Autenticación de los trabajadores del hostal.
+
+Las contraseñas se guardan con `PBKDF2TrabajadorHasher` y se verifican en tiempo
+constante: si el RUT no existe igualmente se calcula un hash, para no revelar qué
+RUT están registrados. Los intentos fallidos se cuentan en la caché por RUT y por
+IP, de modo que un ataque de fuerza bruta se rechaza sin consultar la base de
+datos ni calcular hashes. Tras iniciar sesión, la identidad del trabajador queda
+en la sesión y `TrabajadorMiddleware` la expone como `request.trabajador` sin
+consultas adicionales. Mientras la contraseña sea temporal (la inicial, derivada
+del nombre), la sesión solo permite cambiarla.
+
+Los canales externos (gestion.sincronizacion) no inician sesión: se identifican
+con un token propio en el encabezado `Authorization: Bearer <token>`, configurado
+en `settings.SYNC_CANALES`.
+"""
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from gestion.models import Trabajador
+
+
+class TrabajadorSesion:
+    """
+    Identidad del trabajador autenticado, leída desde la sesión.
+
+    Attributes:
+        - id: Id del trabajador.
+        - nombre: Nombre completo del trabajador.
+        - cambiar_password: True si debe cambiar su contraseña temporal antes de continuar.
+    """
+    def __init__(self, id, nombre, cambiar_password=False):
+        self.id = id
+        self.nombre = nombre
+        self.cambiar_password = cambiar_password
+
+    def __str__(self):
+        return self.nombre
+
+
+def trabajador_de_sesion(session):
+    """
+    Obtiene el trabajador autenticado desde la sesión, sin consultar la base de datos.
+
+    Returns:
+        TrabajadorSesion, o None si no hay un trabajador autenticado.
+    """
+    trabajador_id = session.get('trabajador_id')
+    if not trabajador_id:
+        return None
+    return TrabajadorSesion(
+        trabajador_id, session.get('trabajador_nombre', ''), session.get('cambiar_password', False))
+
+
+def iniciar_sesion(request, trabajador):
+    """
+    Guarda la identidad del trabajador en una sesión con una clave nueva.
+
+    Cambiar la clave de sesión al autenticarse evita la fijación de sesión.
+    """
+    request.session.cycle_key()
+    request.session['trabajador_id'] = trabajador.id
+    request.session['trabajador_nombre'] = f"{trabajador.nombre} {trabajador.apellido}"
+    request.session['cambiar_password'] = trabajador.password_temporal
+    request.trabajador = trabajador_de_sesion(request.session)
+
+
+def autenticar(rut, password):
+    """
+    Verifica las credenciales de un trabajador en tiempo constante.
+
+    Returns:
+        Trabajador si el RUT existe y la contraseña es correcta, o None.
+    """
+    trabajador = Trabajador.objects.filter(rut=rut).first()
+    if trabajador is None:
+        # Mismo costo que una verificación real, para no revelar si el RUT existe.
+        make_password(password, hasher=Trabajador.HASHER)
+        return None
+    return trabajador if trabajador.check_password(password) else None
+
+
+def _cache():
+    return caches[settings.HOSTAL_CACHE_ALIAS]
+
+
+def _claves(request, rut):
+    return (
+        f"gestion:login:rut:{rut}",
+        f"gestion:login:ip:{request.META.get('REMOTE_ADDR', '')}",
+    )
+
+
+def login_bloqueado(request, rut):
+    """
+    Indica si el RUT o la IP superaron el máximo de intentos fallidos en la ventana.
+    """
+    clave_rut, clave_ip = _claves(request, rut)
+    intentos = _cache().get_many([clave_rut, clave_ip])
+    return (
+        intentos.get(clave_rut, 0) >= settings.LOGIN_MAX_INTENTOS
+        or intentos.get(clave_ip, 0) >= settings.LOGIN_MAX_INTENTOS_IP
+    )
+
+
+def registrar_fallo(request, rut):
+    """
+    Suma un intento fallido al RUT y a la IP; el contador expira tras `LOGIN_VENTANA` segundos.
+    """
+    cache = _cache()
+    for clave in _claves(request, rut):
+        cache.add(clave, 0, settings.LOGIN_VENTANA)
+        try:
+            cache.incr(clave)
+        except ValueError:  # La clave expiró entre add() e incr()
+            cache.set(clave, 1, settings.LOGIN_VENTANA)
+
+
+def limpiar_intentos(request, rut):
+    """
+    Reinicia el contador de intentos fallidos del RUT tras un inicio de sesión correcto.
+    """
+    _cache().delete(_claves(request, rut)[0])
+
+
+def trabajador_requerido(vista=None, api=False):
+    """
+    Decorador que exige un trabajador autenticado (`request.trabajador`).
+
+    Si el trabajador aún tiene una contraseña temporal, se le redirige a cambiarla.
+
+    Attributes:
+        vista: Vista a proteger.
+        api: Si es True responde 401 (o 403 con contraseña temporal) en JSON en lugar de redirigir.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            trabajador = getattr(request, 'trabajador', None)
+            if trabajador is None:
+                if api:
+                    return JsonResponse({'error': "Debes iniciar sesión."}, status=401)
+                return redirect('login')
+            if trabajador.cambiar_password:
+                if api:
+                    return JsonResponse({'error': "Debes cambiar tu contraseña."}, status=403)
+                return redirect('cambiar_password')
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador(vista) if vista is not None else decorador
+
+
+def canal_de_solicitud(request):
+    """
+    Identifica el canal externo por el token del encabezado `Authorization: Bearer <token>`.
+
+    Los tokens se comparan en tiempo constante.
+
+    Returns:
+        Nombre del canal, o None si el token falta o no corresponde a ningún canal.
+    """
+    tipo, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if tipo.lower() != 'bearer' or not token:
+        return None
+    canal = None
+    for nombre, esperado in settings.SYNC_CANALES.items():
+        if hmac.compare_digest(token.strip().encode(), esperado.encode()):
+            canal = nombre
+    return canal
+
+
+def canal_requerido(vista):
+    """
+    Decorador que exige el token de un canal externo (`request.canal`); responde 401 en JSON si falta.
+    """
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        request.canal = canal_de_solicitud(request)
+        if request.canal is None:
+            return JsonResponse({'error': "Token de canal no válido."}, status=401)
+        return vista(request, *args, **kwargs)
+    return envoltura
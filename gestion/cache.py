@@ -0,0 +1,129 @@
+"""
+Caché del catálogo de habitaciones y de la ocupación por día.
+
+El catálogo (números, precios y estados de las habitaciones) cambia pocas veces y
+la ocupación de una noche solo cambia al modificar reservas, así que ambos se
+guardan en la caché configurada en `settings.HOSTAL_CACHE_ALIAS`. La invalidación
+la disparan las señales de guardado y borrado de Habitacion y Reserva (ver
+gestion.signals). Los contadores de aciertos y fallos se consultan con
+`estadisticas()`.
+
+Con el backend de memoria local cada proceso tiene su propia caché; con varios
+workers conviene configurar un backend compartido (ver settings.CACHES). Los
+valores se leen siempre de la base primaria, aunque la vista lea de una réplica,
+para no guardar en caché datos atrasados.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from gestion.models import Habitacion, Ocupacion
+from sistemaHostal.db.replicas import en_primaria
+
+CLAVE_CATALOGO = 'gestion:habitaciones:catalogo'
+CLAVE_GENERACION_OCUPACION = 'gestion:ocupacion:generacion'
+
+_contadores = {
+    'catalogo': {'aciertos': 0, 'fallos': 0},
+    'ocupacion': {'aciertos': 0, 'fallos': 0},
+}
+_bloqueo = threading.Lock()
+
+
+def _cache():
+    return caches[settings.HOSTAL_CACHE_ALIAS]
+
+
+def _contar(tipo, acierto):
+    with _bloqueo:
+        _contadores[tipo]['aciertos' if acierto else 'fallos'] += 1
+
+
+def estadisticas():
+    """
+    Obtiene los contadores de aciertos y fallos de la caché en este proceso.
+
+    Returns:
+        Diccionario {tipo: {"aciertos", "fallos", "tasa_aciertos"}}.
+    """
+    with _bloqueo:
+        resultado = {tipo: dict(valores) for tipo, valores in _contadores.items()}
+    for valores in resultado.values():
+        total = valores['aciertos'] + valores['fallos']
+        valores['tasa_aciertos'] = round(valores['aciertos'] / total, 3) if total else None
+    return resultado
+
+
+def catalogo_habitaciones():
+    """
+    Obtiene todas las habitaciones ordenadas por número, desde la caché si es posible.
+
+    Returns:
+        Lista de instancias de Habitacion.
+    """
+    catalogo = _cache().get(CLAVE_CATALOGO)
+    _contar('catalogo', catalogo is not None)
+    if catalogo is None:
+        with en_primaria():
+            catalogo = list(Habitacion.objects.order_by('numero_habitacion'))
+        _cache().set(CLAVE_CATALOGO, catalogo)
+    return catalogo
+
+
+def _generacion_ocupacion():
+    generacion = _cache().get(CLAVE_GENERACION_OCUPACION)
+    if generacion is None:
+        # Un valor nuevo basado en el reloj evita reutilizar fotos de una generación anterior
+        _cache().add(CLAVE_GENERACION_OCUPACION, time.time_ns(), timeout=None)
+        generacion = _cache().get(CLAVE_GENERACION_OCUPACION)
+    return generacion
+
+
+def ocupacion_del_dia(fecha):
+    """
+    Obtiene las habitaciones ocupadas en la noche `fecha`, desde la caché si es posible.
+
+    Returns:
+        Diccionario {id de habitación: id de reserva}.
+    """
+    clave = f'gestion:ocupacion:{_generacion_ocupacion()}:{fecha.isoformat()}'
+    ocupacion = _cache().get(clave)
+    _contar('ocupacion', ocupacion is not None)
+    if ocupacion is None:
+        with en_primaria():
+            ocupacion = dict(Ocupacion.objects.filter(fecha=fecha).values_list('habitacion_id', 'reserva_id'))
+        _cache().set(clave, ocupacion)
+    return ocupacion
+
+
+def habitaciones_libres(fecha):
+    """
+    Obtiene las habitaciones libres la noche `fecha` combinando el catálogo y la ocupación en caché.
+
+    Returns:
+        Lista de instancias de Habitacion que no están en mantenimiento ni ocupadas.
+    """
+    ocupadas = ocupacion_del_dia(fecha)
+    return [
+        habitacion for habitacion in catalogo_habitaciones()
+        if habitacion.estado != 'mantenimiento' and habitacion.id not in ocupadas
+    ]
+
+
+def invalidar_catalogo():
+    """
+    Descarta el catálogo de habitaciones en caché.
+    """
+    _cache().delete(CLAVE_CATALOGO)
+
+
+def invalidar_ocupacion():
+    """
+    Descarta todas las fotos de ocupación diaria incrementando su generación.
+    """
+    try:
+        _cache().incr(CLAVE_GENERACION_OCUPACION)
+    except ValueError:  # La clave no existe o fue desalojada
+        _cache().set(CLAVE_GENERACION_OCUPACION, time.time_ns(), timeout=None)
@@ -0,0 +1,89 @@
+"""
+Calendario de ocupación: habitaciones por noches en una ventana de días.
+
+Una sola consulta obtiene las reservas activas con noches ocupadas en la
+ventana (ver gestion.disponibilidad); las habitaciones
+salen del catálogo en caché. Con eso se arma una matriz compacta: por habitación,
+un mapa de bits de las noches ocupadas (el bit i corresponde a la noche
+`desde + i`) en hexadecimal, y la lista de reservas recortadas a la ventana. La
+grilla se dibuja en el navegador (static/gestion/calendario.js).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils.timezone import localtime
+
+from gestion import cache as cache_hostal
+from gestion.disponibilidad import reservas_en_rango
+
+# Cantidad de días mostrados por defecto y máximo admitido por solicitud.
+DIAS_POR_DEFECTO = 60
+MAX_DIAS = 180
+
+
+def matriz_ocupacion(desde, dias):
+    """
+    Arma la matriz de ocupación de todas las habitaciones con una sola consulta de reservas.
+
+    Attributes:
+        desde: Primera noche de la ventana.
+        dias: Cantidad de noches de la ventana.
+
+    Returns:
+        Diccionario serializable en JSON con `desde`, `dias`, `habitaciones`
+        ({"id", "numero", "estado", "ocupadas"}, con `ocupadas` como mapa de bits
+        en hexadecimal), `reservas` ({"id", "habitacion", "inicio", "noches",
+        "estado", "cliente"}, con `inicio` y `noches` relativos a la ventana) y
+        `ocupadas_por_dia` (habitaciones ocupadas en cada noche).
+    """
+    hasta = desde + timedelta(days=dias)
+    filas = (
+        reservas_en_rango(desde, hasta)
+        .order_by()
+        .values_list('id', 'habitacion_id', 'fecha_ingreso', 'noches', 'estado',
+                     'cliente__nombre', 'cliente__apellido')
+    )
+
+    bits = defaultdict(int)
+    # Arreglo de diferencias: +1 en la primera noche de cada reserva y -1 después de la última
+    diferencias = [0] * (dias + 1)
+    reservas = []
+    for reserva_id, habitacion_id, fecha_ingreso, noches, estado, nombre, apellido in filas:
+        inicio = (localtime(fecha_ingreso).date() - desde).days
+        fin = min(inicio + noches, dias)
+        inicio = max(inicio, 0)
+        if inicio >= fin:
+            continue
+        bits[habitacion_id] |= ((1 << (fin - inicio)) - 1) << inicio
+        diferencias[inicio] += 1
+        diferencias[fin] -= 1
+        reservas.append({
+            'id': reserva_id,
+            'habitacion': habitacion_id,
+            'inicio': inicio,
+            'noches': fin - inicio,
+            'estado': estado,
+            'cliente': f"{nombre} {apellido}".strip() if nombre or apellido else '',
+        })
+
+    ocupadas_por_dia = []
+    acumulado = 0
+    for diferencia in diferencias[:dias]:
+        acumulado += diferencia
+        ocupadas_por_dia.append(acumulado)
+
+    return {
+        'desde': desde.isoformat(),
+        'dias': dias,
+        'habitaciones': [
+            {
+                'id': habitacion.pk,
+                'numero': habitacion.numero_habitacion,
+                'estado': habitacion.estado,
+                'ocupadas': format(bits[habitacion.pk], 'x'),
+            }
+            for habitacion in cache_hostal.catalogo_habitaciones()
+        ],
+        'reservas': reservas,
+        'ocupadas_por_dia': ocupadas_por_dia,
+    }
@@ -0,0 +1,205 @@
+"""
+Registro de llegadas y salidas (Check-In / Check-Out) a partir del QR de la reserva.
+
+Cada reserva tiene un token QR firmado con `django.core.signing`, que contiene
+solo su id. El token se verifica con la SECRET_KEY, sin consultar la base de
+datos, y luego el registro se crea en una transacción corta de tres consultas:
+leer y bloquear la reserva (con la existencia de check-in y check-out en la misma
+consulta), insertar el registro y actualizar el estado de la habitación.
+`registrar_grupo` hace lo mismo para un grupo completo con las mismas tres
+consultas, sin importar cuántas reservas incluya.
+"""
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from gestion.models import CheckIn, CheckOut, Habitacion, Reserva
+from gestion.signals import reservas_actualizadas
+
+SALT_QR = 'gestion.checkin.qr'
+
+# Modelo del registro y estado en que queda la habitación según la acción.
+ACCIONES = {
+    'checkin': (CheckIn, 'en uso'),
+    'checkout': (CheckOut, 'disponible'),
+}
+
+
+class QRInvalido(ValidationError):
+    """
+    Error lanzado cuando un token QR no tiene una firma válida.
+    """
+
+
+def generar_token(reserva):
+    """
+    Genera el token firmado que se imprime en el QR de una reserva.
+
+    Attributes:
+        reserva: Reserva (instancia o id).
+
+    Returns:
+        Cadena segura para URL con el id de la reserva y su firma.
+    """
+    return signing.dumps(getattr(reserva, 'pk', reserva), salt=SALT_QR)
+
+
+def leer_token(token):
+    """
+    Verifica la firma de un token QR sin consultar la base de datos.
+
+    Returns:
+        Id de la reserva.
+
+    Raises:
+        QRInvalido: Si el token fue alterado, no corresponde a este sistema o está vacío.
+    """
+    if not isinstance(token, str):
+        raise QRInvalido("El código QR no es válido.")
+    try:
+        reserva_id = signing.loads(token, salt=SALT_QR)
+    except signing.BadSignature:
+        raise QRInvalido("El código QR no es válido.")
+    if not isinstance(reserva_id, int):
+        raise QRInvalido("El código QR no es válido.")
+    return reserva_id
+
+
+def _validar(reserva, accion):
+    """
+    Indica si la acción debe registrarse, o si ya estaba registrada.
+
+    Raises:
+        ValidationError: Si la reserva no admite la acción.
+    """
+    if reserva.estado == 'cancelada':
+        raise ValidationError(f"La reserva {reserva.pk} está cancelada.")
+    if accion == 'checkin':
+        return not reserva.tiene_checkin
+    if not reserva.tiene_checkin:
+        raise ValidationError(f"La reserva {reserva.pk} no tiene Check-In registrado.")
+    return not reserva.tiene_checkout
+
+
+def _reservas_con_registros(ids):
+    """
+    Bloquea las reservas indicadas y anota si ya tienen Check-In y Check-Out.
+    """
+    return (
+        Reserva.objects.filter(pk__in=ids)
+        .select_for_update()
+        .only('id', 'habitacion_id', 'estado')
+        .annotate(
+            tiene_checkin=Exists(CheckIn.objects.filter(reserva=OuterRef('pk'))),
+            tiene_checkout=Exists(CheckOut.objects.filter(reserva=OuterRef('pk'))),
+        )
+    )
+
+
+def registrar(reserva_id, accion, qr_escaneado=True):
+    """
+    Registra la llegada o la salida de una reserva y actualiza su habitación.
+
+    Un segundo escaneo del mismo QR no crea registros duplicados.
+
+    Attributes:
+        reserva_id: Id de la reserva.
+        accion: "checkin" o "checkout".
+        qr_escaneado: Indica si el registro proviene de un QR escaneado.
+
+    Returns:
+        Diccionario con la reserva, la acción, la habitación, su nuevo estado y si
+        el registro se creó en esta llamada.
+
+    Raises:
+        ValidationError: Si la acción no es válida, la reserva no existe o no admite la acción.
+    """
+    if accion not in ACCIONES:
+        raise ValidationError(f"La acción {accion!r} no es válida.")
+    modelo, estado_habitacion = ACCIONES[accion]
+
+    with transaction.atomic():
+        reserva = _reservas_con_registros([reserva_id]).first()
+        if reserva is None:
+            raise ValidationError(f"La reserva {reserva_id} no existe.")
+        creado = _validar(reserva, accion)
+        if creado:
+            modelo.objects.create(reserva_id=reserva.pk, qr_escaneado='sí' if qr_escaneado else 'no')
+            Habitacion.objects.filter(pk=reserva.habitacion_id).exclude(
+                estado='mantenimiento').update(estado=estado_habitacion)
+            reservas_actualizadas.send(sender=Reserva, reservas=[], habitaciones={reserva.habitacion_id})
+
+    return {
+        'reserva': reserva.pk,
+        'accion': accion,
+        'habitacion': reserva.habitacion_id,
+        'estado_habitacion': estado_habitacion,
+        'creado': creado,
+    }
+
+
+def registrar_grupo(entradas, accion='checkin', qr_escaneado=True):
+    """
+    Registra en bloque la llegada o la salida de un grupo de reservas.
+
+    Pensada para la llegada de un grupo (por ejemplo, un bus de turistas): todas las
+    reservas se leen y bloquean en una consulta, los registros se crean con un solo
+    `bulk_create` y las habitaciones se actualizan con un solo `update`, en una
+    transacción corta. Las reservas que no admiten la acción se informan sin
+    impedir el registro de las demás.
+
+    Attributes:
+        entradas: Lista de ids de reserva (enteros) o tokens QR (cadenas).
+        accion: "checkin" o "checkout".
+        qr_escaneado: Indica si los registros provienen de QR escaneados.
+
+    Returns:
+        Diccionario con `registradas` (ids registrados ahora), `ya_registradas` (ids que
+        ya tenían el registro) y `errores` (lista de {entrada, mensaje}).
+
+    Raises:
+        ValidationError: Si la acción no es válida.
+    """
+    if accion not in ACCIONES:
+        raise ValidationError(f"La acción {accion!r} no es válida.")
+    modelo, estado_habitacion = ACCIONES[accion]
+    resultado = {'registradas': [], 'ya_registradas': [], 'errores': []}
+
+    ids = {}
+    for entrada in entradas:
+        try:
+            reserva_id = entrada if isinstance(entrada, int) and not isinstance(entrada, bool) else leer_token(entrada)
+        except QRInvalido as error:
+            resultado['errores'].append({'entrada': entrada, 'mensaje': error.messages[0]})
+            continue
+        ids.setdefault(reserva_id, entrada)
+    if not ids:
+        return resultado
+
+    with transaction.atomic():
+        reservas = {reserva.pk: reserva for reserva in _reservas_con_registros(ids)}
+        nuevas = []
+        for reserva_id, entrada in ids.items():
+            reserva = reservas.get(reserva_id)
+            try:
+                if reserva is None:
+                    raise ValidationError(f"La reserva {reserva_id} no existe.")
+                if _validar(reserva, accion):
+                    nuevas.append(reserva)
+                else:
+                    resultado['ya_registradas'].append(reserva_id)
+            except ValidationError as error:
+                resultado['errores'].append({'entrada': entrada, 'mensaje': error.messages[0]})
+
+        if nuevas:
+            modelo.objects.bulk_create([
+                modelo(reserva_id=reserva.pk, qr_escaneado='sí' if qr_escaneado else 'no')
+                for reserva in nuevas
+            ])
+            Habitacion.objects.filter(pk__in={reserva.habitacion_id for reserva in nuevas}).exclude(
+                estado='mantenimiento').update(estado=estado_habitacion)
+            resultado['registradas'] = [reserva.pk for reserva in nuevas]
+            reservas_actualizadas.send(
+                sender=Reserva, reservas=[], habitaciones={reserva.habitacion_id for reserva in nuevas})
+    return resultado
@@ -0,0 +1,72 @@
+"""
+Motor de disponibilidad de habitaciones por rango de fechas.
+
+Una reserva activa ocupa noches, contadas por fecha local desde el día de
+ingreso, y cada noche queda registrada en `Ocupacion`, cuya restricción única
+(habitacion, fecha) es la que impide al guardar que dos reservas compartan una
+noche. Una habitación está libre entre dos fechas si no está en mantenimiento y
+no tiene noches ocupadas en ese rango. Las consultas leen esa misma tabla, de
+modo que los formularios, las vistas y el guardado coinciden aunque el ingreso
+tenga hora, y se resuelven con un único `NOT EXISTS` apoyado en ese índice
+único, sin recorrer habitaciones en Python.
+"""
+from django.db.models import Exists, OuterRef
+
+from gestion.models import Habitacion, Ocupacion, Reserva, noche_local
+
+
+def reservas_en_rango(desde, hasta):
+    """
+    Obtiene las reservas activas que ocupan alguna noche entre `desde` y `hasta`.
+
+    Attributes:
+        desde: Primera noche (fecha o fecha y hora), inclusiva.
+        hasta: Noche final (fecha o fecha y hora), exclusiva.
+
+    Returns:
+        QuerySet de Reserva.
+    """
+    return Reserva.objects.activas().solapadas(desde, hasta)
+
+
+def _noches_ocupadas(desde, hasta):
+    return Ocupacion.objects.filter(fecha__gte=noche_local(desde), fecha__lt=noche_local(hasta))
+
+
+def habitaciones_disponibles(desde, hasta):
+    """
+    Obtiene las habitaciones libres entre `desde` y `hasta` con una sola consulta.
+
+    Attributes:
+        desde: Primera noche (fecha o fecha y hora), inclusiva.
+        hasta: Noche final (fecha o fecha y hora), exclusiva.
+
+    Returns:
+        QuerySet de Habitacion ordenado por número de habitación.
+    """
+    ocupada = _noches_ocupadas(desde, hasta).filter(habitacion=OuterRef('pk'))
+    return (
+        Habitacion.objects
+        .exclude(estado='mantenimiento')
+        .filter(~Exists(ocupada))
+        .order_by('numero_habitacion')
+    )
+
+
+def habitacion_disponible(habitacion, desde, hasta, excluir_reserva=None):
+    """
+    Indica si una habitación está libre entre `desde` y `hasta`.
+
+    Attributes:
+        habitacion: Habitación (instancia o id) a consultar.
+        desde: Primera noche (fecha o fecha y hora), inclusiva.
+        hasta: Noche final (fecha o fecha y hora), exclusiva.
+        excluir_reserva: Reserva (instancia o id) que no se considera, útil al editarla.
+
+    Returns:
+        True si la habitación no tiene noches ocupadas en el rango.
+    """
+    ocupadas = _noches_ocupadas(desde, hasta).filter(habitacion=habitacion)
+    if excluir_reserva is not None:
+        ocupadas = ocupadas.exclude(reserva=getattr(excluir_reserva, 'pk', excluir_reserva))
+    return not ocupadas.exists()
@@ -0,0 +1,260 @@
+"""
+Exportación en streaming de clientes y reservas a CSV y XLSX.
+
+Las filas se leen por lotes con paginación por clave primaria (keyset) y
+`values_list`, sin instanciar modelos, y cada lote se entrega apenas se escribe.
+Con MySQL, `iterator()` no limita la memoria (el driver descarga el resultado
+completo), mientras que los lotes por clave mantienen el consumo constante sin
+importar la cantidad de filas. El encabezado se entrega antes de la primera
+consulta, de modo que el primer byte llega de inmediato.
+
+El XLSX se genera sin dependencias externas: es un ZIP con las partes XML
+mínimas de un libro de Excel, escrito con `zipfile` sobre un buffer que no
+admite `seek`, por lo que la hoja se comprime a medida que se genera.
+"""
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce
+from django.utils.timezone import is_aware, localtime
+
+from gestion.models import Cliente, Reserva
+
+# Filas leídas por consulta.
+TAMANO_LOTE = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _clientes(filtros):
+    return Cliente.objects.all()
+
+
+def _reservas(filtros):
+    reservas = Reserva.objects.annotate(total=ExpressionWrapper(
+        Coalesce('precio_final', F('habitacion__precio') * F('noches')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    ))
+    if filtros.get('estado'):
+        reservas = reservas.filter(estado=filtros['estado'])
+    if filtros.get('desde'):
+        reservas = reservas.filter(fecha_ingreso__gte=filtros['desde'])
+    if filtros.get('hasta'):
+        reservas = reservas.filter(fecha_ingreso__lt=filtros['hasta'])
+    return reservas
+
+
+# Tabla exportable: (función que arma la consulta, columnas (encabezado, campo)).
+# La primera columna debe ser la clave primaria, que ordena los lotes.
+TABLAS = {
+    'clientes': (_clientes, [
+        ('id', 'id'),
+        ('rut', 'rut'),
+        ('nombre', 'nombre'),
+        ('apellido', 'apellido'),
+        ('correo', 'correo'),
+        ('telefono', 'telefono'),
+        ('fecha_registro', 'fecha_registro'),
+    ]),
+    'reservas': (_reservas, [
+        ('id', 'id'),
+        ('referencia_externa', 'referencia_externa'),
+        ('estado', 'estado'),
+        ('origen', 'origen'),
+        ('fecha_registro', 'fecha_registro'),
+        ('fecha_ingreso', 'fecha_ingreso'),
+        ('fecha_salida', 'fecha_salida'),
+        ('noches', 'noches'),
+        ('habitacion', 'habitacion__numero_habitacion'),
+        ('precio_noche', 'habitacion__precio'),
+        ('cliente_rut', 'cliente__rut'),
+        ('cliente_nombre', 'cliente__nombre'),
+        ('cliente_apellido', 'cliente__apellido'),
+        ('cliente_correo', 'cliente__correo'),
+        ('precio_final', 'precio_final'),
+        ('total', 'total'),
+    ]),
+}
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return (localtime(valor) if is_aware(valor) else valor).isoformat(sep=' ', timespec='seconds')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def lotes(tabla, filtros=None, tamano=TAMANO_LOTE):
+    """
+    Lee las filas de una tabla exportable en lotes ordenados por clave primaria.
+
+    Attributes:
+        tabla: "clientes" o "reservas".
+        filtros: Diccionario opcional con `estado`, `desde` y `hasta` de las reservas (`desde` y
+            `hasta` por fecha de ingreso; `hasta` es un límite exclusivo en fecha y hora).
+        tamano: Filas por consulta.
+
+    Returns:
+        Generador de listas de tuplas, con los valores en el orden de las columnas.
+    """
+    consulta, columnas = TABLAS[tabla]
+    queryset = consulta(filtros or {}).order_by('pk').values_list(*[campo for _, campo in columnas])
+    ultimo = None
+    while True:
+        lote = list((queryset.filter(pk__gt=ultimo) if ultimo is not None else queryset)[:tamano])
+        if not lote:
+            return
+        yield lote
+        if len(lote) < tamano:  # Lote incompleto: no quedan filas
+            return
+        ultimo = lote[-1][0]
+
+
+class _Eco:
+    """
+    Pseudo-archivo que devuelve lo escrito, para usar `csv.writer` en un generador.
+    """
+    def write(self, valor):
+        return valor
+
+
+def csv_en_streaming(tabla, filtros=None, tamano=TAMANO_LOTE):
+    """
+    Genera el CSV de una tabla exportable por partes.
+
+    Returns:
+        Generador de cadenas: primero el encabezado (con BOM para Excel) y luego un bloque por lote.
+    """
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow([encabezado for encabezado, _ in TABLAS[tabla][1]])
+    for lote in lotes(tabla, filtros, tamano):
+        yield ''.join(escritor.writerow([_texto(valor) for valor in fila]) for fila in lote)
+
+
+class _BufferZip:
+    """
+    Destino de escritura sin `seek` que acumula los bytes hasta que se retiran.
+    """
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+# Caracteres de control no permitidos en XML.
+_CONTROL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_PARTES_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _celda(valor):
+    if isinstance(valor, (int, Decimal, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(_CONTROL.sub("", _texto(valor)))}</t></is></c>'
+
+
+def _fila_xml(valores):
+    return '<row>' + ''.join(_celda(valor) for valor in valores) + '</row>'
+
+
+def xlsx_en_streaming(tabla, filtros=None, tamano=TAMANO_LOTE):
+    """
+    Genera el XLSX de una tabla exportable por partes, comprimiendo la hoja a medida que se escribe.
+
+    Returns:
+        Generador de bytes con el archivo ZIP.
+    """
+    buffer = _BufferZip()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _PARTES_XLSX.items():
+            libro.writestr(nombre, contenido)
+        libro.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(tabla)}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        with libro.open('xl/worksheets/sheet1.xml', 'w') as hoja:
+            hoja.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _fila_xml(encabezado for encabezado, _ in TABLAS[tabla][1])
+            ).encode())
+            yield buffer.retirar()
+            for lote in lotes(tabla, filtros, tamano):
+                hoja.write(''.join(_fila_xml(fila) for fila in lote).encode())
+                yield buffer.retirar()
+            hoja.write(b'</sheetData></worksheet>')
+    yield buffer.retirar()
+
+
+def exportar(tabla, formato, filtros=None, tamano=TAMANO_LOTE):
+    """
+    Genera en streaming la exportación de una tabla en el formato indicado.
+
+    Attributes:
+        tabla: "clientes" o "reservas".
+        formato: "csv" o "xlsx".
+        filtros: Diccionario opcional con `desde` y `hasta` para las reservas.
+        tamano: Filas por consulta.
+
+    Returns:
+        Generador de bytes.
+    """
+    if tabla not in TABLAS:
+        raise ValueError(f"Tabla no exportable: {tabla}")
+    if formato == 'csv':
+        return (parte.encode() for parte in csv_en_streaming(tabla, filtros, tamano))
+    if formato == 'xlsx':
+        return xlsx_en_streaming(tabla, filtros, tamano)
+    raise ValueError(f"Formato no soportado: {formato}")
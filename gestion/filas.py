@@ -0,0 +1,64 @@
+"""
+Lectura de los datos de reservas que llegan de otras plataformas.
+
+Funciones compartidas por la importación masiva (gestion.importacion) y la carga
+de reservas de los canales (gestion.sincronizacion) para leer y validar los
+campos de cada fila. Los errores se informan con ValueError y un mensaje para
+el usuario.
+"""
+from datetime import datetime
+
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from gestion.models import Reserva
+
+ESTADOS_VALIDOS = dict(Reserva._meta.get_field('estado').choices)
+
+# Máximo de noches aceptado por reserva.
+MAX_NOCHES = 365
+
+
+def texto(fila, campo):
+    """
+    Obtiene el valor de un campo de la fila como texto sin espacios ('' si falta).
+    """
+    valor = fila.get(campo)
+    return str(valor).strip() if valor not in (None, '') else ''
+
+
+def leer_fecha_ingreso(valor):
+    """
+    Convierte una fecha (con o sin hora) en una fecha y hora con zona horaria.
+
+    Raises:
+        ValueError: Si la fecha de ingreso no es válida.
+    """
+    try:
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            dia = parse_date(valor)
+            if dia is None:
+                raise ValueError
+            fecha = datetime.combine(dia, datetime.min.time())
+    except ValueError:
+        raise ValueError("La fecha de ingreso no es válida.")
+    return make_aware(fecha) if is_naive(fecha) else fecha
+
+
+def leer_noches(valor):
+    """
+    Convierte la cantidad de noches, entre 1 y `MAX_NOCHES`.
+
+    Raises:
+        ValueError: Si no es un entero dentro de ese rango.
+    """
+    try:
+        cantidad = int(valor)
+    except ValueError:
+        cantidad = 0
+    if cantidad < 1:
+        raise ValueError("Debe haber al menos una noche en la reserva.")
+    if cantidad > MAX_NOCHES:
+        raise ValueError(f"La reserva no puede superar las {MAX_NOCHES} noches.")
+    return cantidad
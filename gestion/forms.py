@@ -6,9 +6,65 @@ Se utilizan para validar y procesar datos ingresados por el usuario
 en las interfaces de la aplicación.
 """
 from django import forms
+from django.contrib.auth.password_validation import validate_password
 from gestion.models import Cliente, Reserva
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.html import format_html
+
+
+class AutocompletarSelect(forms.Widget):
+    """
+    Widget de selección con autocompletado para claves foráneas con muchas opciones.
+
+    En lugar de generar una etiqueta <option> por cada registro, muestra un campo de
+    texto que consulta un endpoint JSON (`url`) mientras se escribe y guarda la clave
+    primaria elegida en un campo oculto. Al renderizar solo se consulta el registro
+    seleccionado, y la validación del formulario solo comprueba esa clave primaria.
+
+    Attributes:
+        - url: Endpoint que recibe `q` y devuelve {"resultados": [{"id", "texto"}, ...]}.
+    """
+    class Media:
+        js = ('gestion/autocompletar.js',)
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def etiqueta(self, valor):
+        """
+        Obtiene el texto a mostrar para el valor seleccionado con una sola consulta.
+        """
+        if valor in (None, ''):
+            return ''
+        queryset = getattr(self.choices, 'queryset', None)
+        if queryset is None:
+            return str(valor)
+        try:
+            objeto = queryset.filter(pk=valor).first()
+        except (ValueError, TypeError, ValidationError):
+            objeto = None
+        return str(objeto) if objeto is not None else ''
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        id_campo = attrs.get('id', f'id_{name}')
+        return format_html(
+            '<div class="autocompletar position-relative">'
+            '<input type="hidden" name="{}" id="{}" value="{}">'
+            '<input type="text" class="{}" value="{}" autocomplete="off" placeholder="Escriba para buscar..."'
+            ' data-autocompletar-url="{}" data-autocompletar-destino="{}">'
+            '<div class="list-group position-absolute w-100 shadow-sm" style="z-index: 1000;"></div>'
+            '</div>',
+            name, id_campo, '' if value is None else value,
+            attrs.get('class', 'form-control'), self.etiqueta(value),
+            self.url, id_campo,
+        )
+
+    def value_from_datadict(self, data, files, name):
+        return data.get(name) or None
 
 class ClienteForm(forms.ModelForm):
     """
@@ -42,6 +98,9 @@ class ReservaForm(forms.ModelForm):
     """
     Formulario para manejar la creación y edición de reservas.
 
+    Cliente y habitación se eligen con autocompletado (AutocompletarSelect), por lo
+    que renderizar el formulario no carga todos los clientes ni habitaciones.
+
     Attributes:
         - habitacion: Habitación asociada a la reserva.
         - cliente: Cliente que realiza la reserva.
@@ -49,7 +108,11 @@ class ReservaForm(forms.ModelForm):
         - estado: Estado actual de la reserva (pendiente, pagada, cancelada).
         - fecha_ingreso: Fecha de ingreso del cliente.
         - noches: Número de noches que incluye la reserva.
+        - version: Versión de la reserva mostrada (oculta); si otra edición la cambió
+          entretanto, guardar lanza ReservaDesactualizada en lugar de sobrescribirla.
     """
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
     class Meta:
         model = Reserva
         fields = [
@@ -61,8 +124,8 @@ class ReservaForm(forms.ModelForm):
             'noches',
         ]
         widgets = {
-            'habitacion': forms.Select(attrs={'class': 'form-control'}),
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            'habitacion': AutocompletarSelect(url=reverse_lazy('buscar_habitaciones'), attrs={'class': 'form-control'}),
+            'cliente': AutocompletarSelect(url=reverse_lazy('buscar_clientes'), attrs={'class': 'form-control'}),
             'origen': forms.Select(attrs={'class': 'form-control'}),
             'estado': forms.Select(attrs={'class': 'form-control'}),
             'fecha_ingreso': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
@@ -73,3 +136,71 @@ class ReservaForm(forms.ModelForm):
             if fecha_ingreso < timezone.now().date():
                 raise ValidationError("La fecha de ingreso no puede ser anterior a la fecha actual.")
             return fecha_ingreso
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['version'].initial = self.instance.version
+
+    def save(self, commit=True):
+        if self.instance.pk and self.cleaned_data.get('version') is not None:
+            # Se guarda sobre la versión que vio el usuario, no la leída al recibir el formulario.
+            self.instance.version_cargada = self.cleaned_data['version']
+        return super().save(commit)
+
+
+class CambioPasswordForm(forms.Form):
+    """
+    Formulario para que un trabajador reemplace su contraseña por una definitiva.
+
+    La contraseña nueva pasa por los validadores de `AUTH_PASSWORD_VALIDATORS` y no
+    puede ser la contraseña inicial derivada del nombre.
+
+    Attributes:
+        - actual: Contraseña vigente del trabajador.
+        - nueva: Contraseña nueva.
+        - confirmacion: Repetición de la contraseña nueva.
+    """
+    actual = forms.CharField(label="Contraseña actual", strip=False,
+                             widget=forms.PasswordInput(attrs={'class': 'form-control'}))
+    nueva = forms.CharField(label="Contraseña nueva", strip=False,
+                            widget=forms.PasswordInput(attrs={'class': 'form-control'}))
+    confirmacion = forms.CharField(label="Repita la contraseña nueva", strip=False,
+                                   widget=forms.PasswordInput(attrs={'class': 'form-control'}))
+
+    def __init__(self, trabajador, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trabajador = trabajador
+
+    def clean_actual(self):
+        actual = self.cleaned_data['actual']
+        if not self.trabajador.check_password(actual):
+            raise ValidationError("La contraseña actual no es correcta.")
+        return actual
+
+    def clean(self):
+        datos = super().clean()
+        nueva = datos.get('nueva')
+        if nueva is None:
+            return datos
+        if nueva != datos.get('confirmacion'):
+            self.add_error('confirmacion', "Las contraseñas no coinciden.")
+        elif nueva in (datos.get('actual'), self.trabajador.contrasena_inicial()):
+            self.add_error('nueva', "La contraseña nueva debe ser distinta de la actual y de la inicial.")
+        else:
+            try:
+                validate_password(nueva, self.trabajador)
+            except ValidationError as error:
+                self.add_error('nueva', error)
+        return datos
+
+    def save(self):
+        """
+        Guarda la contraseña nueva como definitiva.
+
+        Returns:
+            El trabajador actualizado.
+        """
+        self.trabajador.set_password(self.cleaned_data['nueva'])
+        self.trabajador.save(update_fields=['password', 'password_temporal'])
+        return self.trabajador
@@ -0,0 +1,20 @@
+"""
+Hashers de contraseñas de la aplicación gestion.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2TrabajadorHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 para las contraseñas de los trabajadores, con factor de trabajo configurable.
+
+    La cantidad de iteraciones se lee de `settings.TRABAJADOR_HASH_ITERACIONES`; al
+    cambiarla, cada contraseña se vuelve a calcular con el nuevo valor la próxima
+    vez que el trabajador inicia sesión.
+    """
+    algorithm = 'pbkdf2_trabajador'
+
+    @property
+    def iterations(self):
+        return settings.TRABAJADOR_HASH_ITERACIONES
@@ -0,0 +1,304 @@
+"""
+Importación masiva de reservas provenientes de otras plataformas.
+
+Las filas se leen en streaming desde un archivo CSV o JSON Lines, se validan por
+lotes y se escriben con `bulk_create`, cada lote en su propia transacción. Los
+clientes y habitaciones se resuelven con mapas en memoria (una consulta por lote
+para clientes y una sola para todo el catálogo de habitaciones), y los errores se
+informan por fila sin abortar la importación.
+
+Columnas esperadas:
+    referencia_externa, habitacion, fecha_ingreso, noches,
+    y opcionalmente rut, correo, estado y precio_final (si falta, se cotiza con
+    las tarifas del hostal, ver gestion.tarifas).
+"""
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from gestion.filas import ESTADOS_VALIDOS, leer_fecha_ingreso, leer_noches, texto
+from gestion.models import Cliente, Habitacion, HabitacionNoDisponible, Ocupacion, Reserva, ReservaArchivada
+from gestion.signals import reservas_actualizadas
+from gestion.tarifas import cotizar_lote
+
+# Cantidad de filas validadas y escritas en cada transacción.
+TAMANO_LOTE = 1000
+
+
+class ResultadoImportacion:
+    """
+    Resumen de una importación de reservas.
+
+    Attributes:
+        - filas: Cantidad de filas leídas.
+        - creadas: Cantidad de reservas creadas.
+        - errores: Lista de tuplas (número de fila, mensaje).
+        - segundos: Duración total de la importación.
+    """
+    def __init__(self):
+        self.filas = 0
+        self.creadas = 0
+        self.errores = []
+        self.segundos = 0.0
+
+    @property
+    def filas_por_segundo(self):
+        """
+        Calcula el rendimiento de la importación.
+        """
+        return self.filas / self.segundos if self.segundos else 0.0
+
+    def como_dict(self, max_errores=1000):
+        """
+        Representa el resultado en un diccionario serializable como JSON.
+
+        Attributes:
+            max_errores: Cantidad máxima de errores incluidos en el detalle.
+        """
+        return {
+            'filas': self.filas,
+            'creadas': self.creadas,
+            'con_error': len(self.errores),
+            'segundos': round(self.segundos, 3),
+            'filas_por_segundo': round(self.filas_por_segundo, 1),
+            'errores': [{'fila': fila, 'mensaje': mensaje} for fila, mensaje in self.errores[:max_errores]],
+        }
+
+
+def leer_filas(archivo, formato):
+    """
+    Lee en streaming las filas de un archivo CSV o JSON Lines.
+
+    Attributes:
+        archivo: Archivo abierto en modo texto o binario.
+        formato: "csv" o "jsonl".
+
+    Returns:
+        Generador de tuplas (número de fila, diccionario con los datos de la fila).
+    """
+    if isinstance(archivo.read(0), bytes):
+        archivo = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(archivo), start=2):  # La fila 1 es el encabezado
+            yield numero, fila
+    elif formato == 'jsonl':
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                fila = None
+            yield numero, fila if isinstance(fila, dict) else None
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+
+class _Lote:
+    """
+    Valida y escribe un lote de filas con un número constante de consultas.
+    """
+    def __init__(self, filas, habitaciones, resultado, canal=None):
+        self.filas = filas
+        self.habitaciones = habitaciones
+        self.resultado = resultado
+        self.canal = canal
+
+    def _clientes(self):
+        ruts = {texto(fila, 'rut') for _, fila in self.filas if fila} - {''}
+        correos = {texto(fila, 'correo').lower() for _, fila in self.filas if fila} - {''}
+        por_rut, por_correo = {}, {}
+        if ruts or correos:
+            for cliente_id, rut, correo in Cliente.objects.filter(
+                Q(rut__in=ruts) | Q(correo__in=correos)
+            ).values_list('id', 'rut', 'correo'):
+                por_rut[rut] = cliente_id
+                por_correo[correo.lower()] = cliente_id
+        return por_rut, por_correo
+
+    def _validar(self):
+        """
+        Convierte las filas válidas en reservas sin guardar y registra los errores.
+        """
+        por_rut, por_correo = self._clientes()
+        referencias = {texto(fila, 'referencia_externa') for _, fila in self.filas if fila}
+        existentes = set(
+            Reserva.objects.filter(referencia_externa__in=referencias).values_list('referencia_externa', flat=True))
+        archivadas = set(ReservaArchivada.objects.filter(
+            referencia_externa__in=referencias).values_list('referencia_externa', flat=True))
+
+        candidatas = []
+        for numero, fila in self.filas:
+            if fila is None:
+                self.resultado.errores.append((numero, "La fila no es un objeto JSON válido."))
+                continue
+            try:
+                candidatas.append((numero, self._construir(fila, por_rut, por_correo, existentes, archivadas)))
+            except ValueError as error:
+                self.resultado.errores.append((numero, str(error)))
+
+        # Noches ya ocupadas en la base de datos para las habitaciones y fechas del lote
+        if not candidatas:
+            return []
+        noches = {numero: reserva.noches_ocupadas() for numero, reserva in candidatas}
+        ocupadas = set(Ocupacion.objects.filter(
+            habitacion_id__in={reserva.habitacion_id for _, reserva in candidatas},
+            fecha__gte=min(fechas[0] for fechas in noches.values()),
+            fecha__lte=max(fechas[-1] for fechas in noches.values()),
+        ).values_list('habitacion_id', 'fecha'))
+
+        validas = []
+        for numero, reserva in candidatas:
+            if reserva.estado != 'cancelada':
+                propias = {(reserva.habitacion_id, fecha) for fecha in noches[numero]}
+                if propias & ocupadas:
+                    self.resultado.errores.append((numero, "La habitación ya está reservada en esas fechas."))
+                    continue
+                ocupadas |= propias
+            validas.append((numero, reserva))
+
+        # Cotización de todo el lote con un número constante de consultas
+        sin_precio = [reserva for _, reserva in validas if reserva.precio_final is None]
+        precios = cotizar_lote([(r.habitacion_id, r.fecha_ingreso, r.noches) for r in sin_precio])
+        for reserva, precio in zip(sin_precio, precios):
+            reserva.precio_final = precio
+        return validas
+
+    def _construir(self, fila, por_rut, por_correo, existentes, archivadas):
+        referencia = texto(fila, 'referencia_externa')
+        if not referencia:
+            raise ValueError("Falta la referencia externa.")
+        if len(referencia) > 64:
+            raise ValueError("La referencia externa supera los 64 caracteres.")
+        if referencia in existentes:
+            raise ValueError(f"La reserva {referencia} ya fue importada.")
+        if referencia in archivadas:
+            raise ValueError(f"La reserva {referencia} ya terminó y está en el archivo histórico.")
+
+        habitacion = self.habitaciones.get(texto(fila, 'habitacion'))
+        if habitacion is None:
+            raise ValueError(f"La habitación {texto(fila, 'habitacion')!r} no existe.")
+        if habitacion.estado == 'mantenimiento':
+            raise ValueError(f"La habitación {habitacion.numero_habitacion} está en mantenimiento.")
+
+        fecha_ingreso = leer_fecha_ingreso(texto(fila, 'fecha_ingreso'))
+        noches = leer_noches(texto(fila, 'noches') or 1)
+
+        estado = texto(fila, 'estado') or 'pendiente'
+        if estado not in ESTADOS_VALIDOS:
+            raise ValueError(f"El estado {estado!r} no es válido.")
+
+        cliente_id = None
+        rut, correo = texto(fila, 'rut'), texto(fila, 'correo').lower()
+        if rut or correo:
+            cliente_id = por_rut.get(rut) or por_correo.get(correo)
+            if cliente_id is None:
+                raise ValueError(f"No existe un cliente con RUT {rut!r} o correo {correo!r}.")
+
+        precio_final = None  # Sin precio de la plataforma, se cotiza con las tarifas del hostal (ver _validar)
+        if texto(fila, 'precio_final'):
+            try:
+                precio_final = Decimal(texto(fila, 'precio_final'))
+            except InvalidOperation:
+                raise ValueError("El precio final no es un número válido.")
+
+        reserva = Reserva(
+            habitacion_id=habitacion.id,
+            cliente_id=cliente_id,
+            origen='otra_plataforma',
+            estado=estado,
+            fecha_registro=now(),
+            fecha_ingreso=fecha_ingreso,
+            noches=noches,
+            precio_final=precio_final,
+            referencia_externa=referencia,
+            canal=self.canal,
+        )
+        try:
+            reserva.fecha_salida = reserva.calcular_fecha_salida()
+        except OverflowError:
+            raise ValueError("La fecha de salida está fuera del rango permitido.")
+        existentes.add(referencia)
+        return reserva
+
+    def escribir(self):
+        """
+        Guarda las reservas válidas del lote en una sola transacción.
+        """
+        validas = self._validar()
+        if not validas:
+            return
+        reservas = [reserva for _, reserva in validas]
+        try:
+            with transaction.atomic():
+                Reserva.objects.bulk_create(reservas)
+                # MySQL no devuelve los ids de bulk_create: se recuperan por referencia externa.
+                ids = dict(Reserva.objects.filter(
+                    referencia_externa__in=[r.referencia_externa for r in reservas]
+                ).values_list('referencia_externa', 'id'))
+                activas = [r for r in reservas if r.estado != 'cancelada']
+                for reserva in reservas:
+                    reserva.pk = ids[reserva.referencia_externa]
+                Ocupacion.objects.bulk_create(
+                    [ocupacion for reserva in activas for ocupacion in Ocupacion.para_reserva(reserva)])
+                Habitacion.objects.filter(
+                    id__in={r.habitacion_id for r in activas}, estado='disponible'
+                ).update(estado='reservada')
+                reservas_actualizadas.send(
+                    sender=Reserva, reservas=list(ids.values()),
+                    habitaciones={r.habitacion_id for r in activas})
+            self.resultado.creadas += len(reservas)
+        except IntegrityError:
+            # Otra transacción ocupó alguna noche entre la validación y la escritura:
+            # se guarda fila por fila para aislar las que fallan.
+            for reserva in reservas:
+                reserva.pk = None
+                reserva._state.adding = True
+            self._escribir_por_fila(validas)
+
+    def _escribir_por_fila(self, validas):
+        for numero, reserva in validas:
+            try:
+                with transaction.atomic():
+                    reserva.save()
+                self.resultado.creadas += 1
+            except HabitacionNoDisponible:
+                self.resultado.errores.append((numero, "La habitación ya está reservada en esas fechas."))
+            except IntegrityError:
+                self.resultado.errores.append((numero, f"La reserva {reserva.referencia_externa} ya fue importada."))
+
+
+def importar_reservas(filas, tamano_lote=TAMANO_LOTE, canal=None):
+    """
+    Importa reservas de otras plataformas desde un iterable de filas.
+
+    Attributes:
+        filas: Iterable de tuplas (número de fila, diccionario), como el que entrega `leer_filas`.
+        tamano_lote: Cantidad de filas validadas y escritas por transacción.
+        canal: Canal externo dueño de las reservas creadas (None en la importación de archivos).
+
+    Returns:
+        ResultadoImportacion: Cantidad de filas, reservas creadas, errores y rendimiento.
+    """
+    resultado = ResultadoImportacion()
+    inicio = time.perf_counter()
+    habitaciones = {h.numero_habitacion: h for h in Habitacion.objects.only('id', 'numero_habitacion', 'precio', 'estado')}
+
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        resultado.filas += len(lote)
+        _Lote(lote, habitaciones, resultado, canal).escribir()
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
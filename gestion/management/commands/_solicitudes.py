@@ -0,0 +1,64 @@
+"""
+Utilidades compartidas por los comandos de benchmark.
+
+Las solicitudes se atienden con el handler WSGI de Django, igual que en un
+servidor real: pasan por todo el middleware y, al cerrar la respuesta, se envía
+`request_finished`, que cierra o recicla las conexiones a la base de datos.
+"""
+import time
+from importlib import import_module
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from gestion.models import Trabajador
+
+
+def crear_sesion():
+    """
+    Crea una sesión de trabajador con el motor de sesiones configurado.
+
+    Returns:
+        SessionStore ya guardado; su `session_key` es el valor de la cookie.
+    """
+    trabajador = Trabajador.objects.first()
+    if trabajador is None:
+        raise CommandError("Se necesita al menos un trabajador registrado para iniciar sesión.")
+    sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+    sesion['trabajador_id'] = trabajador.id
+    sesion['trabajador_nombre'] = f"{trabajador.nombre} {trabajador.apellido}"
+    sesion.save()  # Crea la sesión; con signed_cookies además calcula la cookie
+    return sesion
+
+
+def solicitar(handler, ruta, sesion, host='127.0.0.1'):
+    """
+    Atiende una solicitud GET completa, incluida la señal request_finished.
+
+    Returns:
+        Tupla (código de estado, segundos transcurridos).
+    """
+    entorno = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': ruta,
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'HTTP_COOKIE': f"{settings.SESSION_COOKIE_NAME}={sesion.session_key}",
+        'wsgi.input': BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    inicio = time.perf_counter()
+    respuesta = handler(entorno, lambda estado, encabezados: None)
+    b''.join(respuesta)
+    respuesta.close()  # Dispara request_finished, que cierra o recicla las conexiones
+    return respuesta.status_code, time.perf_counter() - inicio
+
+
+def percentil(latencias, fraccion):
+    """
+    Obtiene el percentil indicado de una lista ordenada de latencias.
+    """
+    return latencias[max(int(len(latencias) * fraccion) - 1, 0)]
@@ -0,0 +1,39 @@
+"""
+Mueve al archivo histórico las reservas pagadas o canceladas que terminaron hace más del horizonte.
+
+Pensado para ejecutarse periódicamente (por ejemplo, cada noche desde cron). Mueve
+las reservas en lotes, cada uno en su propia transacción, por lo que puede
+ejecutarse con el sistema en uso (ver gestion.archivo).
+
+Uso:
+    python manage.py archivar_reservas
+    python manage.py archivar_reservas --dias 730 --lote 500 --pausa 0.5
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from gestion import archivo
+
+
+class Command(BaseCommand):
+    help = "Mueve al archivo histórico las reservas pagadas o canceladas cuya estadía terminó hace más de N días."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.ARCHIVO_HORIZONTE_DIAS,
+                            help="Días desde la salida para archivar una reserva.")
+        parser.add_argument('--lote', type=int, default=archivo.RESERVAS_POR_LOTE, help="Reservas por transacción.")
+        parser.add_argument('--pausa', type=float, default=0, help="Segundos de espera entre lotes.")
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['lote'] < 1:
+            raise CommandError("--dias no puede ser negativo y --lote debe ser al menos 1.")
+        limite = now() - timedelta(days=options['dias'])
+        resultado = archivo.archivar(limite, lote=options['lote'], pausa=options['pausa'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['reservas']} reservas archivadas en {resultado['lotes']} lotes "
+            f"({resultado['checkins']} Check-In, {resultado['checkouts']} Check-Out, "
+            f"{resultado['noches']} noches ocupadas liberadas)."
+        ))
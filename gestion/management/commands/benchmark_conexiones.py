@@ -0,0 +1,78 @@
+"""
+Compara la latencia por solicitud según cómo se gestionan las conexiones a la base de datos.
+
+Atiende N solicitudes a una página (por defecto la tabla de habitaciones) a través
+del handler WSGI de Django, igual que un servidor real, de modo que al final de
+cada solicitud se cierran o reutilizan las conexiones según la configuración.
+Mide tres modos:
+
+- nueva: CONN_MAX_AGE=0, se abre una conexión por solicitud.
+- persistente: CONN_MAX_AGE>0 con verificación de salud.
+- pool: CONN_MAX_AGE=0 con el pool de sistemaHostal.db (solo con ese motor).
+
+Uso:
+    python manage.py benchmark_conexiones --solicitudes 200
+"""
+import statistics
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+
+from gestion.management.commands._solicitudes import crear_sesion, percentil, solicitar
+
+MODOS = {
+    'nueva': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'POOL_SIZE': 0},
+    'persistente': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'POOL_SIZE': 0},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'POOL_SIZE': 4},
+}
+
+
+def _vaciar_pool():
+    connection.close()
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        for conexion in pool.vaciar():
+            conexion.close()
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia por solicitud con conexiones nuevas, persistentes y con pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=100, help="Solicitudes medidas por modo.")
+        parser.add_argument('--ruta', default=None, help="Ruta a solicitar (por defecto, la tabla de habitaciones).")
+        parser.add_argument('--host', default='127.0.0.1', help="Valor del encabezado Host (debe estar en ALLOWED_HOSTS).")
+        parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+
+    def handle(self, *args, **options):
+        ruta = options['ruta'] or reverse('tabla_habitaciones')
+        sesion = crear_sesion()
+        handler = WSGIHandler()
+        original = {clave: connection.settings_dict.get(clave) for clave in MODOS['nueva']}
+
+        try:
+            for modo in options['modos']:
+                if modo == 'pool' and not hasattr(connection, 'pool'):
+                    self.stdout.write(f"{modo:<12} omitido: el motor {connection.settings_dict['ENGINE']} no tiene pool.")
+                    continue
+                _vaciar_pool()
+                connection.settings_dict.update(MODOS[modo])
+                solicitar(handler, ruta, sesion, options['host'])  # Calentamiento
+                resultados = [
+                    solicitar(handler, ruta, sesion, options['host'])
+                    for _ in range(options['solicitudes'])
+                ]
+                if any(estado != 200 for estado, _ in resultados):
+                    self.stderr.write(f"Algunas solicitudes a {ruta} no respondieron 200.")
+                latencias = sorted(segundos for _, segundos in resultados)
+                self.stdout.write(
+                    f"{modo:<12} media: {statistics.mean(latencias) * 1000:7.2f}ms  "
+                    f"p50: {latencias[len(latencias) // 2] * 1000:7.2f}ms  "
+                    f"p95: {percentil(latencias, 0.95) * 1000:7.2f}ms"
+                )
+        finally:
+            _vaciar_pool()
+            connection.settings_dict.update(original)
+            sesion.delete()
@@ -0,0 +1,67 @@
+"""
+Compara el rendimiento de una página con cada motor de sesiones.
+
+Para cada modo (db, cached_db, cache y signed_cookies) crea una sesión de
+trabajador, atiende N solicitudes a la tabla de habitaciones a través del handler
+WSGI y reporta solicitudes por segundo, latencia y consultas SQL por solicitud.
+
+Uso:
+    python manage.py benchmark_sesiones --solicitudes 500
+"""
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from gestion.management.commands._solicitudes import crear_sesion, percentil, solicitar
+
+MODOS = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+class Command(BaseCommand):
+    help = "Mide solicitudes por segundo de la tabla de habitaciones con cada motor de sesiones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=200, help="Solicitudes medidas por modo.")
+        parser.add_argument('--ruta', default=None, help="Ruta a solicitar (por defecto, la tabla de habitaciones).")
+        parser.add_argument('--host', default='127.0.0.1', help="Valor del encabezado Host (debe estar en ALLOWED_HOSTS).")
+        parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+
+    def handle(self, *args, **options):
+        ruta = options['ruta'] or reverse('tabla_habitaciones')
+        for modo in options['modos']:
+            with override_settings(SESSION_ENGINE=MODOS[modo]):
+                self._medir(modo, ruta, options['solicitudes'], options['host'])
+
+    def _medir(self, modo, ruta, solicitudes, host):
+        sesion = crear_sesion()
+        handler = WSGIHandler()  # El middleware de sesiones toma el motor al crearse
+        consultas = []
+        contar = lambda execute, sql, params, many, context: consultas.append(sql) or execute(sql, params, many, context)
+        try:
+            solicitar(handler, ruta, sesion, host)  # Calentamiento (llena la caché de sesiones)
+            inicio = time.perf_counter()
+            with connection.execute_wrapper(contar):
+                resultados = [solicitar(handler, ruta, sesion, host) for _ in range(solicitudes)]
+            total = time.perf_counter() - inicio
+        finally:
+            sesion.delete()
+
+        if any(estado != 200 for estado, _ in resultados):
+            self.stderr.write(f"Algunas solicitudes a {ruta} no respondieron 200 con {modo}.")
+        latencias = sorted(segundos for _, segundos in resultados)
+        self.stdout.write(
+            f"{modo:<15} {solicitudes / total:8.1f} solicitudes/s  "
+            f"media: {statistics.mean(latencias) * 1000:6.2f}ms  "
+            f"p95: {percentil(latencias, 0.95) * 1000:6.2f}ms  "
+            f"consultas/solicitud: {len(consultas) / solicitudes:.2f}"
+        )
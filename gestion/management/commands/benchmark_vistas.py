@@ -0,0 +1,176 @@
+"""
+Mide consultas SQL, latencia y memoria de las vistas principales y las compara con su presupuesto.
+
+Para cada vista (home, tabla_clientes, tabla_habitaciones, agregar_reserva y
+editar_reserva) atiende N solicitudes con una sesión de trabajador a través del
+handler WSGI y registra las consultas por solicitud, la latencia (mediana y p95)
+y la memoria máxima asignada durante una solicitud (tracemalloc). El resultado se
+compara con la línea base guardada en `benchmarks/vistas.json`: el comando falla
+si alguna vista hace más consultas que las de la línea base o si su latencia p95
+o su memoria superan la línea base más la tolerancia.
+
+Con --sembrar se cargan antes volúmenes realistas (por defecto 500 habitaciones,
+50.000 clientes y 500.000 reservas) con `gestion.siembra` en la base configurada,
+que debe estar vacía; conviene usar una base local dedicada.
+
+Uso:
+    python manage.py benchmark_vistas --sembrar
+    python manage.py benchmark_vistas --solicitudes 50
+    python manage.py benchmark_vistas --guardar
+"""
+import json
+import statistics
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from gestion import siembra
+from gestion.management.commands._solicitudes import crear_sesion, percentil, solicitar
+from gestion.models import Cliente, Habitacion, Reserva
+
+# Línea base con el presupuesto de cada vista.
+LINEA_BASE = Path(settings.BASE_DIR) / 'benchmarks' / 'vistas.json'
+
+
+def rutas_vistas():
+    """
+    Rutas medidas por vista; `editar_reserva` usa la reserva más reciente.
+
+    Returns:
+        Diccionario {vista: ruta}.
+    """
+    rutas = {vista: reverse(vista) for vista in ('home', 'tabla_clientes', 'tabla_habitaciones', 'agregar_reserva')}
+    reserva = Reserva.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if reserva is None:
+        raise CommandError("Se necesita al menos una reserva para medir editar_reserva; use --sembrar.")
+    rutas['editar_reserva'] = reverse('editar_reserva', args=[reserva])
+    return rutas
+
+
+def medir(handler, ruta, sesion, solicitudes, host='127.0.0.1'):
+    """
+    Mide una vista: consultas por solicitud, latencia y memoria máxima de una solicitud.
+
+    Returns:
+        Diccionario con `consultas`, `mediana_ms`, `p95_ms` y `memoria_kb`.
+
+    Raises:
+        CommandError: Si la vista no responde 200.
+    """
+    estado, _ = solicitar(handler, ruta, sesion, host)  # Calentamiento (cachés y sesión)
+    if estado != 200:
+        raise CommandError(f"{ruta} respondió {estado}.")
+
+    consultas = []
+    latencias = []
+    for _ in range(solicitudes):
+        contador = []
+        contar = lambda execute, sql, params, many, context: contador.append(sql) or execute(sql, params, many, context)
+        with connection.execute_wrapper(contar):
+            _, segundos = solicitar(handler, ruta, sesion, host)
+        consultas.append(len(contador))
+        latencias.append(segundos)
+
+    # tracemalloc hace más lenta la solicitud: la memoria se mide aparte
+    tracemalloc.start()
+    try:
+        solicitar(handler, ruta, sesion, host)
+        _, maximo = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencias.sort()
+    return {
+        'consultas': max(consultas),
+        'mediana_ms': round(statistics.median(latencias) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 0.95) * 1000, 2),
+        'memoria_kb': round(maximo / 1024, 1),
+    }
+
+
+def excesos(vista, resultado, base, tolerancia):
+    """
+    Compara una medición con la línea base de la vista.
+
+    Returns:
+        Lista de mensajes, vacía si la vista está dentro de su presupuesto.
+    """
+    mensajes = []
+    if resultado['consultas'] > base['consultas']:
+        mensajes.append(f"{vista}: {resultado['consultas']} consultas (presupuesto {base['consultas']}).")
+    for campo, unidad in (('p95_ms', 'ms'), ('memoria_kb', 'KB')):
+        limite = base[campo] * (1 + tolerancia)
+        if resultado[campo] > limite:
+            mensajes.append(f"{vista}: {campo} {resultado[campo]}{unidad} (presupuesto {limite:.1f}{unidad}).")
+    return mensajes
+
+
+class Command(BaseCommand):
+    help = "Mide consultas, latencia y memoria de las vistas principales y falla si superan la línea base."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sembrar', action='store_true', help="Carga datos de prueba antes de medir (base vacía).")
+        parser.add_argument('--habitaciones', type=int, default=500)
+        parser.add_argument('--clientes', type=int, default=50000)
+        parser.add_argument('--reservas', type=int, default=500000)
+        parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos generados.")
+        parser.add_argument('--solicitudes', type=int, default=20, help="Solicitudes medidas por vista.")
+        parser.add_argument('--tolerancia', type=float, default=0.5,
+                            help="Margen sobre la línea base para latencia y memoria (0.5 = 50%%).")
+        parser.add_argument('--linea-base', default=str(LINEA_BASE), help="Archivo JSON de la línea base.")
+        parser.add_argument('--guardar', action='store_true', help="Guarda las mediciones como nueva línea base.")
+        parser.add_argument('--host', default='127.0.0.1', help="Valor del encabezado Host (debe estar en ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        if options['sembrar']:
+            try:
+                resultado = siembra.sembrar(options['habitaciones'], options['clientes'], options['reservas'],
+                                            semilla=options['semilla'])
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.stdout.write(f"Datos sembrados: {resultado.total} filas.")
+
+        rutas = rutas_vistas()
+        sesion = crear_sesion()
+        handler = WSGIHandler()
+        try:
+            resultados = {}
+            for vista, ruta in rutas.items():
+                resultados[vista] = medir(handler, ruta, sesion, options['solicitudes'], options['host'])
+                self.stdout.write(
+                    f"{vista:<20} consultas: {resultados[vista]['consultas']:3d}  "
+                    f"mediana: {resultados[vista]['mediana_ms']:8.2f}ms  "
+                    f"p95: {resultados[vista]['p95_ms']:8.2f}ms  "
+                    f"memoria: {resultados[vista]['memoria_kb']:9.1f}KB"
+                )
+        finally:
+            sesion.delete()
+
+        archivo = Path(options['linea_base'])
+        if options['guardar']:
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            volumen = {
+                'habitaciones': Habitacion.objects.count(),
+                'clientes': Cliente.objects.count(),
+                'reservas': Reserva.objects.count(),
+            }
+            archivo.write_text(json.dumps({'volumen': volumen, 'vistas': resultados}, indent=2) + '\n')
+            self.stdout.write(f"Línea base guardada en {archivo}.")
+            return
+
+        if not archivo.exists():
+            raise CommandError(f"No existe la línea base {archivo}; ejecute con --guardar para crearla.")
+        linea_base = json.loads(archivo.read_text())['vistas']
+        mensajes = [
+            mensaje
+            for vista, resultado in resultados.items() if vista in linea_base
+            for mensaje in excesos(vista, resultado, linea_base[vista], options['tolerancia'])
+        ]
+        if mensajes:
+            raise CommandError("Vistas fuera de presupuesto:\n" + "\n".join(mensajes))
+        self.stdout.write(self.style.SUCCESS("Todas las vistas están dentro de su presupuesto."))
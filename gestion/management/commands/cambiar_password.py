@@ -0,0 +1,47 @@
+"""
+Asigna una contraseña a un trabajador.
+
+Si no se indica `--password`, se pide por consola sin mostrarla. La contraseña se
+valida con `AUTH_PASSWORD_VALIDATORS` y queda como definitiva, salvo que se use
+`--temporal`, en cuyo caso el trabajador deberá cambiarla al iniciar sesión.
+
+Uso:
+    python manage.py cambiar_password 12345678-9
+    python manage.py cambiar_password 12345678-9 --password "..." --temporal
+"""
+from getpass import getpass
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.models import Trabajador
+
+
+class Command(BaseCommand):
+    help = "Asigna una contraseña al trabajador con el RUT indicado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('rut', help="RUT del trabajador (1234567-9).")
+        parser.add_argument('--password', help="Contraseña nueva; si falta, se pide por consola.")
+        parser.add_argument('--temporal', action='store_true',
+                            help="Obliga al trabajador a cambiarla al iniciar sesión.")
+
+    def handle(self, *args, **options):
+        trabajador = Trabajador.objects.filter(rut=options['rut']).first()
+        if trabajador is None:
+            raise CommandError(f"No existe un trabajador con RUT {options['rut']}.")
+
+        password = options['password']
+        if password is None:
+            password = getpass("Contraseña nueva: ")
+            if password != getpass("Repita la contraseña: "):
+                raise CommandError("Las contraseñas no coinciden.")
+        try:
+            validate_password(password, trabajador)
+        except ValidationError as error:
+            raise CommandError(' '.join(error.messages))
+
+        trabajador.set_password(password, temporal=options['temporal'])
+        trabajador.save(update_fields=['password', 'password_temporal'])
+        self.stdout.write(self.style.SUCCESS(f"Contraseña actualizada para {trabajador}."))
@@ -0,0 +1,62 @@
+"""
+Exporta clientes o reservas a un archivo CSV o XLSX sin cargarlos en memoria.
+
+Las fechas `--desde` y `--hasta` filtran las reservas por fecha de ingreso y
+ambas son inclusivas; `--estado` las filtra por estado, igual que los parámetros
+de la exportación web (gestion.views.exportar_datos).
+
+Uso:
+    python manage.py exportar_datos reservas --formato xlsx --salida reservas.xlsx
+    python manage.py exportar_datos reservas --desde 2024-01-01 --hasta 2024-01-31
+    python manage.py exportar_datos reservas --estado pagada
+    python manage.py exportar_datos clientes > clientes.csv
+"""
+import sys
+import time
+from datetime import datetime, time as hora, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware
+
+from gestion import exportacion
+from gestion.models import Reserva
+
+
+class Command(BaseCommand):
+    help = "Exporta clientes o reservas a CSV o XLSX en streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('tabla', choices=list(exportacion.TABLAS))
+        parser.add_argument('--formato', choices=list(exportacion.FORMATOS), default='csv')
+        parser.add_argument('--salida', help="Archivo de destino (por defecto, la salida estándar).")
+        parser.add_argument('--desde', help="Reservas con ingreso desde esta fecha (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Reservas con ingreso hasta esta fecha, inclusiva (AAAA-MM-DD).")
+        parser.add_argument('--estado', choices=[valor for valor, _ in Reserva._meta.get_field('estado').choices],
+                            help="Solo las reservas en este estado.")
+        parser.add_argument('--lote', type=int, default=exportacion.TAMANO_LOTE, help="Filas por consulta.")
+
+    def handle(self, *args, **options):
+        filtros = {'estado': options['estado']} if options['estado'] else {}
+        for clave in ('desde', 'hasta'):
+            if options[clave]:
+                fecha = parse_date(options[clave])
+                if fecha is None:
+                    raise CommandError(f"Fecha no válida: {options[clave]}")
+                if clave == 'hasta':
+                    fecha += timedelta(days=1)  # Se filtra por fecha y hora antes del día siguiente
+                filtros[clave] = make_aware(datetime.combine(fecha, hora.min))
+
+        inicio = time.perf_counter()
+        destino = open(options['salida'], 'wb') if options['salida'] else sys.stdout.buffer
+        escritos = 0
+        try:
+            for parte in exportacion.exportar(options['tabla'], options['formato'], filtros, options['lote']):
+                destino.write(parte)
+                escritos += len(parte)
+        finally:
+            if options['salida']:
+                destino.close()
+        if options['salida']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{escritos} bytes escritos en {options['salida']} en {time.perf_counter() - inicio:.2f}s."))
@@ -0,0 +1,37 @@
+"""
+Importa reservas de otras plataformas desde un archivo CSV o JSON Lines.
+
+Uso:
+    python manage.py importar_reservas reservas.csv
+    python manage.py importar_reservas reservas.jsonl --formato jsonl --lote 5000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.importacion import TAMANO_LOTE, importar_reservas, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Importa reservas de otras plataformas desde un archivo CSV o JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo a importar.")
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help="Formato del archivo (por defecto, según la extensión).")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por transacción.")
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or ('jsonl' if options['archivo'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        try:
+            archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(f"No se pudo abrir el archivo: {error}")
+
+        with archivo:
+            resultado = importar_reservas(leer_filas(archivo, formato), tamano_lote=options['lote'])
+
+        for fila, mensaje in resultado.errores:
+            self.stderr.write(f"Fila {fila}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.creadas} reservas creadas de {resultado.filas} filas "
+            f"({len(resultado.errores)} con error) en {resultado.segundos:.2f}s "
+            f"({resultado.filas_por_segundo:.0f} filas/s)."
+        ))
@@ -0,0 +1,113 @@
+"""
+Prueba de carga de reservas concurrentes sobre una misma habitación.
+
+Lanza N intentos de reserva en paralelo para la misma habitación y las mismas
+noches, y verifica que exactamente uno tenga éxito. Debe ejecutarse contra una
+base de datos con bloqueo de filas real (MySQL); en SQLite los intentos se
+serializan a nivel de archivo.
+
+Crea y borra una habitación y sus reservas en la base `default`, por lo que solo
+se ejecuta sin confirmación contra una base local o de pruebas (SQLite, un host
+local o un nombre que contenga "test" o "local"). Para cualquier otra base hay
+que indicar `--confirmar`.
+
+Uso:
+    python manage.py prueba_concurrencia --intentos 50 --hilos 16
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils.timezone import now
+
+from gestion.models import Habitacion, HabitacionNoDisponible, Reserva
+
+HOSTS_LOCALES = ('', 'localhost', '127.0.0.1', '::1')
+
+
+def base_local():
+    """
+    Indica si la base `default` es local o de pruebas, donde la prueba puede escribir sin confirmación.
+    """
+    datos = connection.settings_dict
+    nombre = str(datos['NAME']).lower()
+    return (connection.vendor == 'sqlite' or datos.get('HOST', '') in HOSTS_LOCALES
+            or 'test' in nombre or 'local' in nombre)
+
+
+def intentar_reserva(habitacion_id, fecha_ingreso, noches):
+    """
+    Intenta crear una reserva en un hilo con su propia conexión.
+
+    Returns:
+        Tupla (resultado, segundos) donde resultado es "exito", "rechazada" o "error".
+    """
+    inicio = time.perf_counter()
+    try:
+        Reserva(
+            habitacion_id=habitacion_id,
+            fecha_ingreso=fecha_ingreso,
+            noches=noches,
+            origen="otra_plataforma",
+        ).save()
+        resultado = "exito"
+    except HabitacionNoDisponible:
+        resultado = "rechazada"
+    except DatabaseError:  # Bloqueos mutuos o tiempos de espera agotados
+        resultado = "error"
+    finally:
+        connection.close()
+    return resultado, time.perf_counter() - inicio
+
+
+class Command(BaseCommand):
+    help = "Lanza reservas concurrentes sobre una habitación y verifica que solo una tenga éxito."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intentos', type=int, default=20, help="Cantidad de reservas simultáneas.")
+        parser.add_argument('--hilos', type=int, default=8, help="Cantidad de hilos concurrentes.")
+        parser.add_argument('--noches', type=int, default=2, help="Noches de cada intento de reserva.")
+        parser.add_argument('--conservar', action='store_true', help="No eliminar la habitación de prueba al terminar.")
+        parser.add_argument('--confirmar', action='store_true',
+                            help="Ejecutar aunque la base no sea local ni de pruebas.")
+
+    def handle(self, *args, **options):
+        if not options['confirmar'] and not base_local():
+            raise CommandError(
+                f"La base {connection.settings_dict['NAME']!r} en {connection.settings_dict['HOST']!r} no parece "
+                "local ni de pruebas. La prueba escribe y borra datos: use --confirmar para ejecutarla igualmente.")
+        habitacion = Habitacion.objects.create(
+            numero_habitacion=f"T{int(time.time()) % 10**9}", precio=1000)
+        fecha_ingreso = now() + timedelta(days=1)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['hilos']) as ejecutor:
+            resultados = list(ejecutor.map(
+                lambda _: intentar_reserva(habitacion.id, fecha_ingreso, options['noches']),
+                range(options['intentos']),
+            ))
+        total = time.perf_counter() - inicio
+
+        conteo = {clave: 0 for clave in ("exito", "rechazada", "error")}
+        for resultado, _ in resultados:
+            conteo[resultado] += 1
+        latencias = sorted(segundos for _, segundos in resultados)
+        p95 = latencias[int(len(latencias) * 0.95) - 1] if latencias else 0
+
+        self.stdout.write(
+            f"Intentos: {options['intentos']}  Éxitos: {conteo['exito']}  "
+            f"Rechazadas: {conteo['rechazada']}  Errores: {conteo['error']}"
+        )
+        self.stdout.write(
+            f"Tiempo total: {total:.3f}s  Rendimiento: {options['intentos'] / total:.1f} intentos/s  "
+            f"p95: {p95 * 1000:.1f}ms"
+        )
+
+        reservas = Reserva.objects.filter(habitacion=habitacion).count()
+        if not options['conservar']:
+            habitacion.delete()
+        if conteo['exito'] != 1 or reservas != 1:
+            raise CommandError(f"Se esperaba exactamente una reserva y se crearon {reservas}.")
+        self.stdout.write(self.style.SUCCESS("Sin reservas duplicadas."))
@@ -0,0 +1,38 @@
+"""
+Recalcula los resúmenes diarios de ocupación e ingresos para un rango de fechas.
+
+Uso:
+    python manage.py recalcular_resumenes --desde 2024-01-01 --hasta 2025-01-01
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils.dateparse import parse_date
+
+from gestion.models import Ocupacion
+from gestion.reportes import recalcular_rango
+
+
+class Command(BaseCommand):
+    help = "Recalcula los resúmenes diarios de ocupación e ingresos (por defecto, todo el historial)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Primera fecha a recalcular (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Fecha final, exclusiva (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        limites = Ocupacion.objects.aggregate(primera=Min('fecha'), ultima=Max('fecha'))
+        try:
+            desde = parse_date(options['desde']) if options['desde'] else limites['primera']
+            hasta = parse_date(options['hasta']) if options['hasta'] else limites['ultima']
+        except ValueError as error:
+            raise CommandError(f"Fecha no válida: {error}")
+        if desde is None or hasta is None:
+            self.stdout.write("No hay noches ocupadas que resumir.")
+            return
+        if not options['hasta']:
+            hasta += timedelta(days=1)
+
+        recalcular_rango(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes recalculados del {desde} al {hasta} (exclusivo)."))
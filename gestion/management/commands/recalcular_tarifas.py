@@ -0,0 +1,36 @@
+"""
+Recalcula el calendario de tarifas diarias y elimina las noches ya pasadas.
+
+Pensado para ejecutarse una vez al día (por ejemplo, con cron), de modo que el
+horizonte precalculado avance con la fecha.
+
+Uso:
+    python manage.py recalcular_tarifas
+    python manage.py recalcular_tarifas --desde 2025-01-01 --hasta 2025-03-01
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from gestion.models import TarifaDiaria
+from gestion.tarifas import horizonte, recalcular_tarifas
+
+
+class Command(BaseCommand):
+    help = "Recalcula las tarifas diarias (por defecto, todo el horizonte) y elimina las noches pasadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Primera noche a recalcular (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Noche final, exclusiva (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            desde = parse_date(options['desde']) if options['desde'] else None
+            hasta = parse_date(options['hasta']) if options['hasta'] else None
+        except ValueError as error:
+            raise CommandError(f"Fecha no válida: {error}")
+
+        hoy, fin = horizonte()
+        eliminadas, _ = TarifaDiaria.objects.filter(fecha__lt=hoy).delete()
+        guardadas = recalcular_tarifas(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(
+            f"{guardadas} tarifas recalculadas (horizonte hasta el {fin}); {eliminadas} noches pasadas eliminadas."))
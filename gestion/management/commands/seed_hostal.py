@@ -0,0 +1,49 @@
+"""
+Carga datos sintéticos válidos y deterministas para pruebas de carga (ver gestion.siembra).
+
+La base debe estar vacía de habitaciones, clientes y reservas. Con la misma
+semilla y fecha base se generan exactamente los mismos datos.
+
+Uso:
+    python manage.py seed_hostal --habitaciones 500 --clientes 50000 --reservas 500000 --semilla 1
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from gestion import siembra
+
+
+class Command(BaseCommand):
+    help = "Genera trabajadores, habitaciones, clientes, reservas y registros de entrada y salida en bloque."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=500)
+        parser.add_argument('--clientes', type=int, default=50000)
+        parser.add_argument('--reservas', type=int, default=500000)
+        parser.add_argument('--trabajadores', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos generados.")
+        parser.add_argument('--fecha-base', help="Fecha que separa estadías pasadas y futuras (AAAA-MM-DD, por defecto hoy).")
+        parser.add_argument('--lote', type=int, default=siembra.RESERVAS_POR_LOTE, help="Reservas por transacción.")
+
+    def handle(self, *args, **options):
+        try:
+            fecha_base = parse_date(options['fecha_base']) if options['fecha_base'] else None
+        except ValueError as error:
+            raise CommandError(f"Fecha no válida: {error}")
+        if options['reservas'] and not options['habitaciones']:
+            raise CommandError("Se necesita al menos una habitación para generar reservas.")
+        try:
+            resultado = siembra.sembrar(
+                habitaciones=options['habitaciones'], clientes=options['clientes'], reservas=options['reservas'],
+                trabajadores=options['trabajadores'], semilla=options['semilla'], fecha_base=fecha_base,
+                reservas_por_lote=options['lote'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        for modelo, filas in resultado.filas.items():
+            self.stdout.write(f"{modelo:<15} {filas:>10}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.total} filas en {resultado.segundos:.1f}s ({resultado.filas_por_segundo:.0f} filas/s); "
+            f"resúmenes, tarifas y caché en {resultado.segundos_derivados:.1f}s."
+        ))
@@ -0,0 +1,20 @@
+"""
+Middleware de la aplicación gestion.
+"""
+from gestion.autenticacion import trabajador_de_sesion
+
+
+class TrabajadorMiddleware:
+    """
+    Expone el trabajador autenticado como `request.trabajador`.
+
+    La identidad se lee desde la sesión (guardada al iniciar sesión), por lo que las
+    vistas no consultan la tabla de trabajadores en cada solicitud. Debe ubicarse
+    después de `SessionMiddleware`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.trabajador = trabajador_de_sesion(request.session)
+        return self.get_response(request)
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-17 10:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def calcular_fecha_salida(apps, schema_editor):
+    Reserva = apps.get_model('gestion', 'Reserva')
+    reservas = list(Reserva.objects.only('id', 'fecha_ingreso', 'noches'))
+    for reserva in reservas:
+        reserva.fecha_salida = reserva.fecha_ingreso + timedelta(days=reserva.noches)
+    Reserva.objects.bulk_update(reservas, ['fecha_salida'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_alter_reserva_fecha_ingreso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='fecha_salida',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_fecha_salida, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reserva',
+            name='fecha_salida',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['habitacion', 'fecha_ingreso', 'fecha_salida'], name='reserva_hab_intervalo_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-17 11:40
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.timezone import localtime
+
+
+def registrar_ocupacion(apps, schema_editor):
+    Reserva = apps.get_model('gestion', 'Reserva')
+    Ocupacion = apps.get_model('gestion', 'Ocupacion')
+    filas = []
+    reservas = Reserva.objects.exclude(estado='cancelada').only('id', 'habitacion_id', 'fecha_ingreso', 'noches')
+    for reserva in reservas.iterator():
+        primera = localtime(reserva.fecha_ingreso).date()
+        filas.extend(
+            Ocupacion(habitacion_id=reserva.habitacion_id, reserva_id=reserva.id, fecha=primera + timedelta(days=i))
+            for i in range(reserva.noches)
+        )
+    # Las reservas superpuestas que existieran antes de la restricción conservan solo la primera noche registrada.
+    Ocupacion.objects.bulk_create(filas, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_reserva_fecha_salida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ocupacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.habitacion')),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.reserva')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ocupacion',
+            constraint=models.UniqueConstraint(fields=('habitacion', 'fecha'), name='ocupacion_habitacion_fecha_uniq'),
+        ),
+        migrations.RunPython(registrar_ocupacion, migrations.RunPython.noop),
+    ]
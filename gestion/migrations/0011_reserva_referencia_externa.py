@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_ocupacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='referencia_externa',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
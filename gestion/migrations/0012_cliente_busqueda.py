@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+def normalizar_clientes(apps, schema_editor):
+    from gestion.models import normalizar_rut, normalizar_texto
+
+    Cliente = apps.get_model('gestion', 'Cliente')
+    clientes = list(Cliente.objects.only('id', 'rut', 'nombre', 'apellido'))
+    for cliente in clientes:
+        cliente.rut_normalizado = normalizar_rut(cliente.rut)
+        cliente.nombre_normalizado = normalizar_texto(cliente.nombre)
+        cliente.apellido_normalizado = normalizar_texto(cliente.apellido)
+    Cliente.objects.bulk_update(
+        clientes, ['rut_normalizado', 'nombre_normalizado', 'apellido_normalizado'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_reserva_referencia_externa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='apellido_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nombre_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='rut_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(normalizar_clientes, migrations.RunPython.noop),
+    ]
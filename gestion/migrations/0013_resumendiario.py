@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_cliente_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('origen', models.CharField(choices=[('manual', 'Manual'), ('otra_plataforma', 'Otra Plataforma')], max_length=20)),
+                ('noches_vendidas', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelaciones', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(fields=('fecha', 'origen'), name='resumen_fecha_origen_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='ocupacion',
+            index=models.Index(fields=['fecha'], name='ocupacion_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0013_resumendiario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_ingreso'], name='reserva_estado_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_ingreso'], name='reserva_fecha_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_registro'], name='reserva_fecha_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['reserva', 'fecha_hora'], name='checkin_reserva_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['fecha_hora'], name='checkin_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['reserva', 'fecha_hora'], name='checkout_reserva_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['fecha_hora'], name='checkout_fecha_idx'),
+        ),
+    ]
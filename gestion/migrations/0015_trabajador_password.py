@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-17 16:20
+
+from django.contrib.auth.hashers import make_password
+from django.db import migrations, models
+
+
+def asignar_contrasenas(apps, schema_editor):
+    # Conserva las credenciales vigentes: la contraseña derivada del apellido y el nombre.
+    Trabajador = apps.get_model('gestion', 'Trabajador')
+    trabajadores = list(Trabajador.objects.only('id', 'nombre', 'apellido'))
+    for trabajador in trabajadores:
+        trabajador.password = make_password(
+            trabajador.apellido[:3].lower() + trabajador.nombre[:3].lower(), hasher='pbkdf2_trabajador')
+    Trabajador.objects.bulk_update(trabajadores, ['password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0014_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajador',
+            name='password',
+            field=models.CharField(default='', editable=False, max_length=128),
+        ),
+        migrations.RunPython(asignar_contrasenas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:02
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0015_trabajador_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanTarifa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('tipo_habitacion', models.CharField(blank=True, default='', max_length=30)),
+                ('fecha_desde', models.DateField(blank=True, null=True)),
+                ('fecha_hasta', models.DateField(blank=True, null=True)),
+                ('dias_semana', models.CharField(blank=True, default='', max_length=7, validators=[django.core.validators.RegexValidator(message='Los días deben indicarse con dígitos de 0 (lunes) a 6 (domingo).', regex='^[0-6]*$')])),
+                ('ocupacion_minima', models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100, message='La ocupación mínima es un porcentaje entre 0 y 100.')])),
+                ('ajuste', models.DecimalField(decimal_places=2, max_digits=6, validators=[django.core.validators.MinValueValidator(-100, message='El ajuste no puede rebajar más del 100%.')])),
+                ('prioridad', models.PositiveSmallIntegerField(default=0)),
+                ('activo', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='habitacion',
+            name='tipo',
+            field=models.CharField(db_index=True, default='estandar', max_length=30),
+        ),
+        migrations.CreateModel(
+            name='TarifaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.habitacion')),
+                ('plan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='gestion.plantarifa')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tarifadiaria',
+            constraint=models.UniqueConstraint(fields=('habitacion', 'fecha'), name='tarifa_habitacion_fecha_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def registrar_existentes(apps, schema_editor):
+    # Una entrada por habitación y reserva existentes, para que un canal que lee el
+    # feed desde el cursor 0 reciba el estado completo.
+    RegistroCambio = apps.get_model('gestion', 'RegistroCambio')
+    for modelo, nombre in (('habitacion', 'Habitacion'), ('reserva', 'Reserva')):
+        ids = apps.get_model('gestion', nombre).objects.order_by('pk').values_list('pk', flat=True)
+        RegistroCambio.objects.bulk_create(
+            (RegistroCambio(modelo=modelo, objeto_id=objeto_id) for objeto_id in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0016_tarifas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('reserva', 'Reserva'), ('habitacion', 'Habitación')], max_length=15)),
+                ('objeto_id', models.BigIntegerField()),
+                ('borrado', models.BooleanField(default=False)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(registrar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0017_registro_cambios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('origen', models.CharField(choices=[('manual', 'Manual'), ('otra_plataforma', 'Otra Plataforma')], max_length=20)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('pagada', 'Pagada'), ('cancelada', 'Cancelada')], max_length=15)),
+                ('fecha_registro', models.DateTimeField()),
+                ('noches', models.PositiveIntegerField()),
+                ('precio_final', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('fecha_ingreso', models.DateTimeField()),
+                ('referencia_externa', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('fecha_salida', models.DateTimeField()),
+                ('archivada', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cliente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas_archivadas', to='gestion.cliente')),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas_archivadas', to='gestion.habitacion')),
+                ('trabajador', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gestion.trabajador')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CheckOutArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_hora', models.DateTimeField()),
+                ('qr_escaneado', models.CharField(choices=[('sí', 'Sí'), ('no', 'No')], max_length=2)),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.reservaarchivada')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CheckInArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_hora', models.DateTimeField()),
+                ('qr_escaneado', models.CharField(choices=[('sí', 'Sí'), ('no', 'No')], max_length=2)),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.reservaarchivada')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reservaarchivada',
+            index=models.Index(fields=['habitacion', 'fecha_ingreso'], name='archivada_hab_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaarchivada',
+            index=models.Index(fields=['fecha_ingreso'], name='archivada_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaarchivada',
+            index=models.Index(fields=['fecha_salida'], name='archivada_salida_idx'),
+        ),
+    ]
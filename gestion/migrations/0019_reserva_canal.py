@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0018_archivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='canal',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservaarchivada',
+            name='canal',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0019_reserva_canal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajador',
+            name='password_temporal',
+            field=models.BooleanField(default=True, help_text='El trabajador debe cambiar la contraseña al iniciar sesión.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0020_trabajador_password_temporal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
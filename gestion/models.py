@@ -5,10 +5,112 @@ Estos modelos representan las entidades principales del sistema,
 como clientes, trabajadores, habitaciones, reservas y registros de
 check-in/check-out.
 """
-from django.db import models
+import unicodedata
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import IntegrityError, models, transaction
+from django.db.models import DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q
+from django.db.models.functions import Coalesce
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator, EmailValidator
 from django.forms import ValidationError
-from django.utils.timezone import now
+from django.utils.timezone import is_aware, localtime, now
+
+
+class HabitacionNoDisponible(ValidationError):
+    """
+    Se lanza al guardar una reserva cuyas noches ya están ocupadas en la habitación.
+    """
+
+
+class ReservaDesactualizada(ValidationError):
+    """
+    Se lanza al guardar una reserva que otra edición modificó después de cargarla.
+    """
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza un texto para búsquedas: minúsculas, sin tildes y con espacios simples.
+
+    Returns:
+        Cadena normalizada, por ejemplo "José  Pérez" -> "jose perez".
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def normalizar_rut(rut):
+    """
+    Normaliza un RUT para búsquedas: solo dígitos y dígito verificador en mayúscula.
+
+    Returns:
+        Cadena normalizada, por ejemplo "12.345.678-k" -> "12345678K".
+    """
+    return ''.join(c for c in (rut or '').upper() if c.isdigit() or c == 'K')
+
+
+def noche_local(valor):
+    """
+    Convierte una fecha, o fecha y hora, en la fecha local de su noche.
+
+    Las noches ocupadas (ver Ocupacion) se cuentan por fecha local, sin importar la
+    hora de ingreso.
+    """
+    if isinstance(valor, datetime):
+        return (localtime(valor) if is_aware(valor) else valor).date()
+    return valor
+
+
+def digito_verificador(numero):
+    """
+    Calcula el dígito verificador de un RUT con el algoritmo módulo 11.
+
+    Returns:
+        Cadena con el dígito, por ejemplo 12345678 -> "5" (y "K" cuando corresponde).
+    """
+    suma = sum(int(digito) * (2 + i % 6) for i, digito in enumerate(reversed(str(numero))))
+    resto = 11 - suma % 11
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+class ClienteQuerySet(models.QuerySet):
+    """
+    Consultas reutilizables sobre los clientes.
+    """
+    def buscar(self, termino):
+        """
+        Filtra los clientes cuyo RUT, nombre, apellido o correo comienzan con `termino`.
+
+        Todas las condiciones son búsquedas por prefijo sobre columnas indexadas
+        (RUT, nombre y apellido normalizados, y correo), por lo que la base de datos
+        resuelve la búsqueda con rangos de índice en lugar de recorrer la tabla. Si el
+        término tiene varias palabras, cada palabra adicional debe ser prefijo del
+        nombre o del apellido.
+
+        Returns:
+            QuerySet filtrado, o el mismo QuerySet si el término está vacío.
+        """
+        palabras = normalizar_texto(termino).split()
+        if not palabras:
+            return self
+
+        primera = palabras[0]
+        filtro = (
+            Q(nombre_normalizado__istartswith=primera)
+            | Q(apellido_normalizado__istartswith=primera)
+            | Q(correo__istartswith=termino.strip())
+        )
+        rut = normalizar_rut(primera)
+        if len(rut) >= 2 and rut[:-1].isdigit():
+            filtro |= Q(rut_normalizado__istartswith=rut)
+
+        consulta = self.filter(filtro)
+        for palabra in palabras[1:]:
+            consulta = consulta.filter(
+                Q(nombre_normalizado__istartswith=palabra) | Q(apellido_normalizado__istartswith=palabra))
+        return consulta
 
 
 class Cliente(models.Model):
@@ -22,6 +124,8 @@ class Cliente(models.Model):
         - correo: Correo electrónico del cliente.
         - telefono: Número de contacto con validación para formato chileno.
         - fecha_registro: Fecha y hora de registro en el sistema.
+        - rut_normalizado, nombre_normalizado, apellido_normalizado: Copias normalizadas
+          e indexadas para la búsqueda por prefijo (ver ClienteQuerySet.buscar).
     """
     rut = models.CharField(
         max_length=12,
@@ -59,6 +163,27 @@ class Cliente(models.Model):
                 message="El número de teléfono debe estar en el formato '+56912345678'."
             )], help_text="Debe ingresar un número con el formato '+56912345678'.")
     fecha_registro = models.DateTimeField(default=now)
+    # Columnas indexadas para la búsqueda por prefijo; se calculan al guardar.
+    rut_normalizado = models.CharField(max_length=12, db_index=True, editable=False, default='')
+    nombre_normalizado = models.CharField(max_length=50, db_index=True, editable=False, default='')
+    apellido_normalizado = models.CharField(max_length=50, db_index=True, editable=False, default='')
+
+    objects = ClienteQuerySet.as_manager()
+
+    def normalizar(self):
+        """
+        Actualiza las columnas de búsqueda a partir del RUT, nombre y apellido.
+        """
+        self.rut_normalizado = normalizar_rut(self.rut)
+        self.nombre_normalizado = normalizar_texto(self.nombre)
+        self.apellido_normalizado = normalizar_texto(self.apellido)
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'rut_normalizado', 'nombre_normalizado', 'apellido_normalizado'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -78,7 +203,11 @@ class Trabajador(models.Model):
         - rut: Identificador único del trabajador.
         - nombre: Nombre del trabajador.
         - apellido: Apellido del trabajador.
+        - password: Contraseña con hash (ver gestion.hashers.PBKDF2TrabajadorHasher).
+        - password_temporal: Indica que la contraseña debe cambiarse al iniciar sesión.
     """
+    HASHER = 'pbkdf2_trabajador'
+
     rut = models.CharField(
         max_length=12,
         unique=True,
@@ -106,6 +235,53 @@ class Trabajador(models.Model):
         validators=[
             EmailValidator(message="Debe ingresar un correo válido.")
         ], blank=True, null=True)  # Nuevo campo correo agregado
+    password = models.CharField(max_length=128, default='', editable=False)
+    password_temporal = models.BooleanField(
+        default=True, help_text="El trabajador debe cambiar la contraseña al iniciar sesión.")
+
+    def contrasena_inicial(self):
+        """
+        Contraseña asignada a los trabajadores que aún no definen una propia.
+
+        Returns:
+            Las tres primeras letras del apellido seguidas de las tres primeras del nombre, en minúsculas.
+        """
+        return self.apellido[:3].lower() + self.nombre[:3].lower()
+
+    def set_password(self, raw_password, temporal=False):
+        """
+        Guarda el hash de la contraseña indicada (sin guardar el trabajador).
+
+        Attributes:
+            raw_password: Contraseña en texto plano.
+            temporal: Si es True, el trabajador deberá cambiarla al iniciar sesión.
+        """
+        self.password = make_password(raw_password, hasher=self.HASHER)
+        self.password_temporal = temporal
+
+    def check_password(self, raw_password):
+        """
+        Verifica la contraseña en tiempo constante.
+
+        Si el hash se calculó con otro factor de trabajo, se vuelve a calcular y se guarda.
+
+        Returns:
+            True si la contraseña es correcta.
+        """
+        def actualizar(raw_password):
+            self.set_password(raw_password, temporal=self.password_temporal)
+            self.save(update_fields=['password'])
+        return check_password(raw_password, self.password, actualizar, preferred=self.HASHER)
+
+    def save(self, *args, **kwargs):
+        """
+        Asigna la contraseña inicial con hash a los trabajadores nuevos sin contraseña.
+
+        La contraseña inicial se deriva del nombre, por lo que queda marcada como temporal.
+        """
+        if not self.password:
+            self.set_password(self.contrasena_inicial(), temporal=True)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -124,7 +300,10 @@ class Habitacion(models.Model):
     Attributes:
         - numero_habitacion: Número identificador de la habitación.
         - precio: Precio de la habitación.
-        - estado: Estado actual de la habitación (disponible, reservada, etc.).
+        - estado: Estado actual de la habitación (disponible, reservada, etc.). La
+          disponibilidad para un rango de fechas se calcula a partir de los intervalos
+          de las reservas (ver gestion.disponibilidad); solo "mantenimiento" la bloquea.
+        - tipo: Tipo de habitación al que se aplican los planes de tarifa (ver PlanTarifa).
     """
     numero_habitacion = models.CharField(max_length=10, unique=True)
     precio = models.DecimalField(
@@ -137,6 +316,42 @@ class Habitacion(models.Model):
         ("mantenimiento", "En Mantenimiento"),
         ("en uso", "En Uso"),
     ], default="disponible")
+    tipo = models.CharField(max_length=30, default="estandar", db_index=True)
+
+    # Campos que determinan las tarifas diarias; se recuerdan para recalcularlas solo si cambian.
+    CAMPOS_TARIFA = ('precio', 'tipo')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Crea la instancia desde la base de datos y recuerda los campos de tarifa cargados.
+        """
+        instancia = super().from_db(db, field_names, values)
+        instancia._recordar_tarifa()
+        return instancia
+
+    def _recordar_tarifa(self):
+        self._tarifa_cargada = {
+            campo: self.__dict__[campo] for campo in self.CAMPOS_TARIFA if campo in self.__dict__
+        }
+
+    def cambia_tarifa(self):
+        """
+        Indica si el precio base o el tipo cambiaron desde que se cargó la habitación.
+
+        Las habitaciones que no se obtuvieron de la base de datos (o con esos campos
+        diferidos) se consideran modificadas.
+        """
+        cargada = getattr(self, '_tarifa_cargada', {})
+        return len(cargada) < len(self.CAMPOS_TARIFA) or any(
+            cargada[campo] != getattr(self, campo) for campo in self.CAMPOS_TARIFA)
+
+    def save(self, *args, **kwargs):
+        # post_save ve los cambios antes de recordarlos, y el registro de cambios que
+        # escribe queda en la misma transacción
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+        self._recordar_tarifa()
 
     def __str__(self):
         """
@@ -148,6 +363,106 @@ class Habitacion(models.Model):
         return f"Habitación {self.numero_habitacion} - {self.estado}"
 
 
+class ReservaQuerySet(models.QuerySet):
+    """
+    Consultas reutilizables sobre las reservas.
+    """
+    def activas(self):
+        """
+        Excluye las reservas canceladas, que no ocupan la habitación.
+        """
+        return self.exclude(estado="cancelada")
+
+    def solapadas(self, desde, hasta):
+        """
+        Filtra las reservas que ocupan alguna noche (fecha local) entre `desde` y `hasta`.
+
+        Se consulta `Ocupacion`, la misma tabla cuya restricción única impide las
+        reservas dobles al guardar, para que la validación y el guardado coincidan
+        aunque el ingreso tenga hora: una noche que empieza a las 15:00 de D ocupa
+        solo la noche D. Las reservas canceladas no tienen noches ocupadas.
+
+        Attributes:
+            desde: Primera noche (fecha, o fecha y hora), inclusiva.
+            hasta: Noche final (fecha, o fecha y hora), exclusiva.
+        """
+        noches = Ocupacion.objects.filter(
+            reserva=OuterRef('pk'), fecha__gte=noche_local(desde), fecha__lt=noche_local(hasta))
+        return self.filter(Exists(noches))
+
+    def transition(self, ids, estado):
+        """
+        Cambia el estado de varias reservas con un número constante de consultas.
+
+        Al cancelar se liberan las noches en `Ocupacion` y las habitaciones que quedaban
+        "reservada" vuelven a "disponible"; al reactivar una reserva cancelada se vuelven
+        a registrar sus noches. Todo ocurre en una transacción.
+
+        Attributes:
+            ids: Ids de las reservas a modificar.
+            estado: Nuevo estado ("pendiente", "pagada" o "cancelada").
+
+        Returns:
+            Cantidad de reservas cuyo estado cambió.
+
+        Raises:
+            ValidationError: Si el estado no es válido.
+            HabitacionNoDisponible: Si una reserva reactivada choca con otra reserva activa.
+        """
+        if estado not in dict(self.model._meta.get_field('estado').choices):
+            raise ValidationError(f"El estado {estado!r} no es válido.")
+
+        with transaction.atomic():
+            afectadas = list(
+                self.filter(pk__in=ids).exclude(estado=estado).select_for_update()
+                .only('id', 'habitacion_id', 'estado', 'fecha_ingreso', 'noches')
+            )
+            if not afectadas:
+                return 0
+            self.model.objects.filter(pk__in=[r.pk for r in afectadas]).update(
+                estado=estado, version=F('version') + 1)
+
+            if estado == "cancelada":
+                canceladas = [r for r in afectadas if r.estado != "cancelada"]
+                Ocupacion.objects.filter(reserva_id__in=[r.pk for r in canceladas]).delete()
+                Habitacion.objects.filter(
+                    id__in={r.habitacion_id for r in canceladas}, estado="reservada"
+                ).update(estado="disponible")
+            else:
+                reactivadas = [r for r in afectadas if r.estado == "cancelada"]
+                try:
+                    with transaction.atomic():
+                        Ocupacion.objects.bulk_create(
+                            [ocupacion for r in reactivadas for ocupacion in Ocupacion.para_reserva(r)])
+                except IntegrityError:
+                    raise HabitacionNoDisponible("Alguna de las reservas choca con otra reserva activa.")
+                Habitacion.objects.filter(
+                    id__in={r.habitacion_id for r in reactivadas}, estado="disponible"
+                ).update(estado="reservada")
+
+            from gestion.signals import reservas_actualizadas
+            reservas_actualizadas.send(
+                sender=self.model, reservas=[r.pk for r in afectadas],
+                habitaciones={r.habitacion_id for r in afectadas})
+        return len(afectadas)
+
+    def con_detalle(self):
+        """
+        Obtiene cliente y habitación en la misma consulta y calcula el valor total en la base de datos.
+
+        Returns:
+            QuerySet con `select_related` de cliente y habitación y la anotación `total`
+            (precio final cotizado o, si no existe, precio de la habitación por noches),
+            evitando consultas adicionales por fila.
+        """
+        return self.select_related('cliente', 'habitacion').annotate(
+            total=ExpressionWrapper(
+                Coalesce('precio_final', F('habitacion__precio') * F('noches')),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+
+
 class Reserva(models.Model):
     habitacion = models.ForeignKey('Habitacion', on_delete=models.CASCADE)
     trabajador = models.ForeignKey('Trabajador', on_delete=models.SET_NULL, null=True, blank=True)
@@ -168,12 +483,39 @@ class Reserva(models.Model):
     )
     precio_final = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     fecha_ingreso = models.DateTimeField()
+    # Identificador de la reserva en la plataforma de origen (solo reservas importadas).
+    referencia_externa = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Canal externo que cargó la reserva, el único que puede actualizarla (ver gestion.sincronizacion).
+    canal = models.CharField(max_length=32, null=True, blank=True)
+    # Fin (exclusivo) del intervalo ocupado: fecha_ingreso + noches. Se calcula al guardar.
+    fecha_salida = models.DateTimeField(editable=False)
+    # Aumenta en cada guardado; el UPDATE exige la versión cargada (bloqueo optimista).
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ReservaQuerySet.as_manager()
+
+    # Campos cuyo valor cargado se recuerda para detectar cambios sin volver a consultar.
+    CAMPOS_RASTREADOS = ('habitacion_id', 'estado', 'fecha_ingreso', 'noches')
+
+    class Meta:
+        indexes = [
+            # También cubre las búsquedas por (habitacion, fecha_ingreso), por ser su prefijo.
+            models.Index(fields=['habitacion', 'fecha_ingreso', 'fecha_salida'], name='reserva_hab_intervalo_idx'),
+            # Listado principal: filtro por estado y rango de ingreso, ordenado por ingreso.
+            models.Index(fields=['estado', 'fecha_ingreso'], name='reserva_estado_ingreso_idx'),
+            models.Index(fields=['fecha_ingreso'], name='reserva_fecha_ingreso_idx'),
+            # Filtro por fecha de registro del panel de administración.
+            models.Index(fields=['fecha_registro'], name='reserva_fecha_registro_idx'),
+        ]
 
     @property
     def valor_total(self):
         """
-        Calcula el valor total de la reserva según el precio por noche y las noches reservadas.
+        Obtiene el valor total de la reserva: el precio final cotizado o, si no se
+        registró, el precio base por noche multiplicado por las noches reservadas.
         """
+        if self.precio_final is not None:
+            return self.precio_final
         if self.habitacion and self.noches:
             return self.habitacion.precio * self.noches
         return 0
@@ -188,23 +530,185 @@ class Reserva(models.Model):
         if self.fecha_ingreso < self.fecha_registro:
             raise ValidationError("La fecha de ingreso no puede ser anterior a la fecha de registro.")
 
-        if self.habitacion.estado not in ['disponible', 'reservada']:
+        if self.habitacion.estado == 'mantenimiento':
             raise ValidationError(f"La habitación {self.habitacion.numero_habitacion} no está disponible para reserva.")
 
-        precio_calculado = self.valor_total
-        if self.precio_final is not None and self.precio_final != precio_calculado:
-            raise ValidationError(f"El precio final debe ser {precio_calculado}, pero se ingresó {self.precio_final}.")
+        if self.noches:
+            noches = self.noches_ocupadas()
+            solapadas = Reserva.objects.activas().filter(habitacion=self.habitacion).solapadas(
+                noches[0], noches[-1] + timedelta(days=1))
+            if self.pk:
+                solapadas = solapadas.exclude(pk=self.pk)
+            if solapadas.exists():
+                raise ValidationError(
+                    f"La habitación {self.habitacion.numero_habitacion} ya está reservada en esas fechas.")
+
+        # El precio se valida (o se vuelve a cotizar, al editar la estadía) solo si cambia la
+        # estadía, para que un cambio posterior de tarifas no impida editar otros datos.
+        cambia_estadia = self._state.adding or bool(
+            {'habitacion_id', 'fecha_ingreso', 'noches'} & set(self.campos_modificados()))
+        if self.noches and cambia_estadia:
+            from gestion.tarifas import cotizar
+            precio_calculado = cotizar(self.habitacion, self.fecha_ingreso, self.noches)
+            if not self._state.adding:
+                self.precio_final = precio_calculado
+            elif self.precio_final is not None and self.precio_final != precio_calculado:
+                raise ValidationError(
+                    f"El precio final debe ser {precio_calculado}, pero se ingresó {self.precio_final}.")
+
+    def calcular_fecha_salida(self):
+        """
+        Calcula el fin del intervalo ocupado por la reserva.
+
+        Returns:
+            Fecha y hora de ingreso más la cantidad de noches reservadas.
+        """
+        return self.fecha_ingreso + timedelta(days=self.noches)
+
+    def noches_ocupadas(self):
+        """
+        Lista las noches (fechas) que ocupa la reserva.
+
+        Returns:
+            Lista de fechas desde el día de ingreso, una por noche reservada.
+        """
+        primera = noche_local(self.fecha_ingreso)
+        return [primera + timedelta(days=i) for i in range(self.noches)]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Crea la instancia desde la base de datos y recuerda los valores cargados.
+        """
+        instancia = super().from_db(db, field_names, values)
+        instancia._recordar_valores()
+        return instancia
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._recordar_valores()
+
+    def _recordar_valores(self):
+        """
+        Guarda los valores actuales de los campos rastreados y la versión (los diferidos se omiten).
+        """
+        self._valores_cargados = {
+            campo: self.__dict__[campo] for campo in self.CAMPOS_RASTREADOS if campo in self.__dict__
+        }
+        self.version_cargada = self.__dict__.get('version')
+
+    def valores_originales(self):
+        """
+        Obtiene los valores de los campos rastreados tal como están en la base de datos.
+
+        Usa los valores recordados al cargar o guardar la instancia; solo consulta la
+        base de datos si la instancia no se obtuvo de ella o tenía campos diferidos.
+
+        Returns:
+            Diccionario {campo: valor} con los campos de CAMPOS_RASTREADOS.
+        """
+        cargados = getattr(self, '_valores_cargados', {})
+        if len(cargados) == len(self.CAMPOS_RASTREADOS):
+            return cargados
+        return Reserva.objects.filter(pk=self.pk).values(*self.CAMPOS_RASTREADOS).get()
+
+    def campos_modificados(self):
+        """
+        Lista los campos rastreados cuyo valor cambió desde que se cargó la instancia.
+        """
+        if self._state.adding:
+            return list(self.CAMPOS_RASTREADOS)
+        originales = self.valores_originales()
+        return [campo for campo in self.CAMPOS_RASTREADOS if originales[campo] != getattr(self, campo)]
 
     def save(self, *args, **kwargs):
-        if not self.pk and self.habitacion.estado == "disponible":  # Nueva reserva
-            self.habitacion.estado = "reservada"
-            self.habitacion.save()
-        elif self.pk:  # Actualización de reserva existente
-            original_reserva = Reserva.objects.get(pk=self.pk)
-            if original_reserva.estado != self.estado and self.estado == "cancelada":
-                self.habitacion.estado = "disponible"
-                self.habitacion.save()
-        super().save(*args, **kwargs)
+        """
+        Guarda la reserva de forma atómica.
+
+        La fila de la habitación se bloquea (`select_for_update`) para serializar las
+        reservas concurrentes sobre ella, y las noches ocupadas se registran en
+        `Ocupacion`, cuya restricción única (habitacion, fecha) impide a nivel de base
+        de datos que dos reservas activas compartan una noche. Las transiciones de
+        estado se detectan con los valores recordados al cargar la reserva, sin volver
+        a leerla; si no cambió la habitación, el intervalo ni la cancelación, se guarda
+        con un único UPDATE. Ese UPDATE exige que la fila conserve la versión cargada
+        (`version_cargada`), de modo que una edición basada en datos ya modificados
+        por otra se rechaza en lugar de sobrescribirlos.
+
+        Raises:
+            HabitacionNoDisponible: Si alguna noche ya está ocupada por otra reserva.
+            ReservaDesactualizada: Si la reserva cambió después de cargarla.
+        """
+        self.fecha_salida = self.calcular_fecha_salida()
+        self._version_esperada = None if self._state.adding else getattr(self, 'version_cargada', None)
+        if self._version_esperada is not None:
+            self.version = self._version_esperada + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        original = None if self._state.adding else self.valores_originales()
+        if original is not None and not self._cambia_ocupacion(original):
+            # Sin savepoint: el registro de cambios (post_save) queda en la misma transacción
+            with transaction.atomic(savepoint=False):
+                super().save(*args, **kwargs)
+            self._recordar_valores()
+            return
+
+        with transaction.atomic():
+            habitacion = Habitacion.objects.select_for_update().get(pk=self.habitacion_id)
+            self.habitacion = habitacion
+            if original is None and habitacion.estado == "disponible":  # Nueva reserva
+                habitacion.estado = "reservada"
+                habitacion.save()
+            elif original is not None and original['estado'] != self.estado and self.estado == "cancelada":
+                if habitacion.estado == "reservada":
+                    habitacion.estado = "disponible"
+                    habitacion.save()
+            super().save(*args, **kwargs)
+            self._sincronizar_ocupacion(original)
+        self._recordar_valores()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        Ejecuta el UPDATE solo si la fila conserva la versión esperada.
+
+        Raises:
+            ReservaDesactualizada: Si la fila existe pero otra edición ya cambió su versión.
+        """
+        esperada = getattr(self, '_version_esperada', None)
+        if esperada is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        actualizada = super()._do_update(
+            base_qs.filter(version=esperada), using, pk_val, values, update_fields, forced_update)
+        if not actualizada and base_qs.filter(pk=pk_val).exists():
+            raise ReservaDesactualizada(
+                f"La reserva {pk_val} fue modificada por otra persona; vuelva a cargarla antes de guardar.")
+        return actualizada
+
+    def _cambia_ocupacion(self, original):
+        """
+        Indica si el cambio afecta las noches ocupadas: habitación, intervalo o cancelación.
+        """
+        return (
+            original['habitacion_id'] != self.habitacion_id
+            or original['fecha_ingreso'] != self.fecha_ingreso
+            or original['noches'] != self.noches
+            or (original['estado'] == "cancelada") != (self.estado == "cancelada")
+        )
+
+    def _sincronizar_ocupacion(self, original):
+        """
+        Reemplaza las filas de `Ocupacion` de la reserva según su intervalo y estado actuales.
+        """
+        if original is not None:
+            Ocupacion.objects.filter(reserva=self).delete()
+        if self.estado == "cancelada":
+            return
+        try:
+            with transaction.atomic():
+                Ocupacion.objects.bulk_create(Ocupacion.para_reserva(self))
+        except IntegrityError:
+            raise HabitacionNoDisponible(
+                f"La habitación {self.habitacion.numero_habitacion} ya está reservada en esas fechas.")
 
     def __str__(self):
         """
@@ -213,6 +717,82 @@ class Reserva(models.Model):
         return f"Reserva {self.id} - Habitación {self.habitacion} ({self.estado})"
 
 
+class Ocupacion(models.Model):
+    """
+    Modelo que representa una noche ocupada de una habitación por una reserva activa.
+
+    Attributes:
+        - habitacion: Habitación ocupada.
+        - reserva: Reserva que ocupa la noche.
+        - fecha: Noche ocupada.
+    """
+    habitacion = models.ForeignKey(Habitacion, on_delete=models.CASCADE)
+    reserva = models.ForeignKey(Reserva, on_delete=models.CASCADE)
+    fecha = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['habitacion', 'fecha'], name='ocupacion_habitacion_fecha_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='ocupacion_fecha_idx'),
+        ]
+
+    @classmethod
+    def para_reserva(cls, reserva):
+        """
+        Construye (sin guardar) las filas de ocupación de una reserva.
+
+        Returns:
+            Lista de instancias de Ocupacion, una por noche de la reserva.
+        """
+        return [
+            cls(habitacion_id=reserva.habitacion_id, reserva_id=reserva.pk, fecha=fecha)
+            for fecha in reserva.noches_ocupadas()
+        ]
+
+    def __str__(self):
+        """
+        Representa la noche ocupada en forma de cadena.
+        """
+        return f"Habitación {self.habitacion_id} - {self.fecha} (Reserva {self.reserva_id})"
+
+
+class ResumenDiario(models.Model):
+    """
+    Modelo que representa el resumen precalculado de ventas de un día por origen.
+
+    Se mantiene incrementalmente al modificar reservas (ver gestion.reportes) para
+    que los reportes no recorran las reservas.
+
+    Attributes:
+        - fecha: Noche resumida.
+        - origen: Origen de las reservas (manual, otra plataforma).
+        - noches_vendidas: Cantidad de habitaciones ocupadas esa noche.
+        - ingresos: Ingresos atribuidos a la noche (precio final de cada reserva dividido por sus noches).
+        - cancelaciones: Reservas canceladas cuya fecha de ingreso es ese día.
+    """
+    fecha = models.DateField()
+    origen = models.CharField(max_length=20, choices=[
+        ("manual", "Manual"),
+        ("otra_plataforma", "Otra Plataforma")
+    ])
+    noches_vendidas = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelaciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'origen'], name='resumen_fecha_origen_uniq'),
+        ]
+
+    def __str__(self):
+        """
+        Representa el resumen diario en forma de cadena.
+        """
+        return f"Resumen {self.fecha} ({self.origen})"
+
+
 class CheckIn(models.Model):
     """
     Modelo que representa un registro de entrada (Check-In).
@@ -229,6 +809,12 @@ class CheckIn(models.Model):
         ("no", "No"),
     ], default="no")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['reserva', 'fecha_hora'], name='checkin_reserva_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='checkin_fecha_idx'),
+        ]
+
     def __str__(self):
         """
         Representa el registro de entrada (Check-In) en forma de cadena.
@@ -236,7 +822,7 @@ class CheckIn(models.Model):
         Returns:
             Una cadena que incluye el ID de la reserva asociada al Check-In.
         """
-        return f"Check-In de Reserva {self.reserva.id}"
+        return f"Check-In de Reserva {self.reserva_id}"
 
 
 class CheckOut(models.Model):
@@ -255,6 +841,12 @@ class CheckOut(models.Model):
         ("no", "No"),
     ], default="no")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['reserva', 'fecha_hora'], name='checkout_reserva_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='checkout_fecha_idx'),
+        ]
+
     def __str__(self):
         """
         Representa el registro de salida (Check-Out) en forma de cadena.
@@ -262,4 +854,224 @@ class CheckOut(models.Model):
         Returns:
             Una cadena que incluye el ID de la reserva asociada al Check-Out.
         """
-        return f"Check-Out de Reserva {self.reserva.id}"
+        return f"Check-Out de Reserva {self.reserva_id}"
+
+
+class PlanTarifa(models.Model):
+    """
+    Modelo que representa una regla de precio por temporada, día de la semana u ocupación.
+
+    Para cada habitación y noche se aplica el plan activo de mayor prioridad cuyas
+    condiciones se cumplen; si ninguno se cumple, la noche vale el precio base de la
+    habitación. Los precios resultantes se precalculan en TarifaDiaria (ver gestion.tarifas).
+
+    Attributes:
+        - nombre: Nombre descriptivo del plan (p. ej. "Temporada alta").
+        - tipo_habitacion: Tipo de habitación al que se aplica; vacío para todas.
+        - fecha_desde: Primera noche en que rige (opcional).
+        - fecha_hasta: Noche en que deja de regir, exclusiva (opcional).
+        - dias_semana: Días de la semana en que rige, como dígitos de 0 (lunes) a 6 (domingo); vacío para todos.
+        - ocupacion_minima: Porcentaje de habitaciones del tipo ocupadas esa noche desde el que rige (opcional).
+        - ajuste: Porcentaje que se suma (o resta, si es negativo) al precio base.
+        - prioridad: Entre varios planes que se cumplen, se aplica el de mayor prioridad.
+        - activo: Indica si el plan se considera al calcular las tarifas.
+    """
+    nombre = models.CharField(max_length=100)
+    tipo_habitacion = models.CharField(max_length=30, blank=True, default='')
+    fecha_desde = models.DateField(null=True, blank=True)
+    fecha_hasta = models.DateField(null=True, blank=True)
+    dias_semana = models.CharField(
+        max_length=7, blank=True, default='',
+        validators=[
+            RegexValidator(
+                regex=r'^[0-6]*$',
+                message="Los días deben indicarse con dígitos de 0 (lunes) a 6 (domingo)."
+            )])
+    ocupacion_minima = models.PositiveSmallIntegerField(
+        null=True, blank=True,
+        validators=[MaxValueValidator(100, message="La ocupación mínima es un porcentaje entre 0 y 100.")])
+    ajuste = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        validators=[MinValueValidator(-100, message="El ajuste no puede rebajar más del 100%.")])
+    prioridad = models.PositiveSmallIntegerField(default=0)
+    activo = models.BooleanField(default=True)
+
+    def clean(self):
+        """
+        Valida que el rango de fechas del plan no esté invertido.
+        """
+        if self.fecha_desde and self.fecha_hasta and self.fecha_hasta <= self.fecha_desde:
+            raise ValidationError("La fecha final del plan debe ser posterior a la inicial.")
+
+    def aplica(self, tipo, fecha, ocupacion=0):
+        """
+        Indica si el plan rige para una noche de una habitación.
+
+        Attributes:
+            tipo: Tipo de la habitación.
+            fecha: Noche a evaluar.
+            ocupacion: Porcentaje de habitaciones del tipo ocupadas esa noche.
+        """
+        return (
+            self.activo
+            and (not self.tipo_habitacion or self.tipo_habitacion == tipo)
+            and (self.fecha_desde is None or fecha >= self.fecha_desde)
+            and (self.fecha_hasta is None or fecha < self.fecha_hasta)
+            and (not self.dias_semana or str(fecha.weekday()) in self.dias_semana)
+            and (self.ocupacion_minima is None or ocupacion >= self.ocupacion_minima)
+        )
+
+    def __str__(self):
+        """
+        Representa el plan de tarifa en forma de cadena.
+        """
+        return f"{self.nombre} ({self.ajuste:+}%)"
+
+
+class TarifaDiaria(models.Model):
+    """
+    Modelo que representa el precio precalculado de una noche de una habitación.
+
+    Cotizar una estadía es una lectura por rango sobre el índice único
+    (habitacion, fecha) más una suma (ver gestion.tarifas.cotizar).
+
+    Attributes:
+        - habitacion: Habitación cotizada.
+        - fecha: Noche cotizada.
+        - precio: Precio de la noche con el plan aplicado.
+        - plan: Plan de tarifa aplicado, o vacío si rige el precio base.
+    """
+    habitacion = models.ForeignKey(Habitacion, on_delete=models.CASCADE)
+    fecha = models.DateField()
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    plan = models.ForeignKey(PlanTarifa, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['habitacion', 'fecha'], name='tarifa_habitacion_fecha_uniq'),
+        ]
+
+    def __str__(self):
+        """
+        Representa la tarifa diaria en forma de cadena.
+        """
+        return f"Habitación {self.habitacion_id} - {self.fecha}: {self.precio}"
+
+
+class RegistroCambio(models.Model):
+    """
+    Modelo que representa una entrada del registro de cambios para sincronizar canales externos.
+
+    Cada vez que se guarda o borra una reserva o una habitación se agrega una fila en
+    la misma transacción que el cambio (ver gestion.signals). El id es creciente, por
+    lo que sirve como cursor del feed incremental (ver gestion.sincronizacion).
+
+    Attributes:
+        - modelo: Entidad modificada (reserva o habitación).
+        - objeto_id: Id de la reserva o habitación modificada.
+        - borrado: Indica si el objeto fue borrado.
+        - fecha: Fecha y hora del cambio.
+    """
+    modelo = models.CharField(max_length=15, choices=[
+        ("reserva", "Reserva"),
+        ("habitacion", "Habitación"),
+    ])
+    objeto_id = models.BigIntegerField()
+    borrado = models.BooleanField(default=False)
+    fecha = models.DateTimeField(default=now)
+
+    def __str__(self):
+        """
+        Representa la entrada del registro de cambios en forma de cadena.
+        """
+        return f"Cambio {self.pk}: {self.modelo} {self.objeto_id}{' (borrado)' if self.borrado else ''}"
+
+
+class ReservaArchivada(models.Model):
+    """
+    Modelo que representa una reserva pagada o cancelada movida al archivo histórico.
+
+    Conserva el id y los datos de la reserva original. Solo la escribe el
+    archivado (ver gestion.archivo); el resto del sistema la consulta en modo de
+    lectura. Las noches ocupadas no se archivan: se deducen de la fecha de ingreso
+    y las noches.
+
+    Attributes:
+        - habitacion: Habitación reservada.
+        - trabajador: Trabajador que registró la reserva.
+        - cliente: Cliente de la reserva.
+        - origen, estado, fecha_registro, noches, precio_final, fecha_ingreso,
+          referencia_externa, canal, fecha_salida: Valores de la reserva al archivarla.
+        - archivada: Fecha y hora en que se movió al archivo.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    habitacion = models.ForeignKey('Habitacion', on_delete=models.CASCADE, related_name='reservas_archivadas')
+    trabajador = models.ForeignKey('Trabajador', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    cliente = models.ForeignKey('Cliente', on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='reservas_archivadas')
+    origen = models.CharField(max_length=20, choices=Reserva._meta.get_field('origen').choices)
+    estado = models.CharField(max_length=15, choices=Reserva._meta.get_field('estado').choices)
+    fecha_registro = models.DateTimeField()
+    noches = models.PositiveIntegerField()
+    precio_final = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    fecha_ingreso = models.DateTimeField()
+    referencia_externa = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    canal = models.CharField(max_length=32, null=True, blank=True)
+    fecha_salida = models.DateTimeField()
+    archivada = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['habitacion', 'fecha_ingreso'], name='archivada_hab_ingreso_idx'),
+            models.Index(fields=['fecha_ingreso'], name='archivada_ingreso_idx'),
+            models.Index(fields=['fecha_salida'], name='archivada_salida_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Representa la reserva archivada en forma de cadena.
+        """
+        return f"Reserva archivada {self.pk} - Habitación {self.habitacion_id}"
+
+
+class CheckInArchivado(models.Model):
+    """
+    Modelo que representa un registro de entrada (Check-In) de una reserva archivada.
+
+    Attributes:
+        - reserva: Reserva archivada asociada.
+        - fecha_hora: Fecha y hora del Check-In.
+        - qr_escaneado: Indica si el QR fue escaneado.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    reserva = models.ForeignKey(ReservaArchivada, on_delete=models.CASCADE)
+    fecha_hora = models.DateTimeField()
+    qr_escaneado = models.CharField(max_length=2, choices=CheckIn._meta.get_field('qr_escaneado').choices)
+
+    def __str__(self):
+        """
+        Representa el registro de entrada archivado en forma de cadena.
+        """
+        return f"Check-In de Reserva archivada {self.reserva_id}"
+
+
+class CheckOutArchivado(models.Model):
+    """
+    Modelo que representa un registro de salida (Check-Out) de una reserva archivada.
+
+    Attributes:
+        - reserva: Reserva archivada asociada.
+        - fecha_hora: Fecha y hora del Check-Out.
+        - qr_escaneado: Indica si el QR fue escaneado.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    reserva = models.ForeignKey(ReservaArchivada, on_delete=models.CASCADE)
+    fecha_hora = models.DateTimeField()
+    qr_escaneado = models.CharField(max_length=2, choices=CheckOut._meta.get_field('qr_escaneado').choices)
+
+    def __str__(self):
+        """
+        Representa el registro de salida archivado en forma de cadena.
+        """
+        return f"Check-Out de Reserva archivada {self.reserva_id}"
@@ -0,0 +1,191 @@
+"""
+Paginación por cursor (keyset) para las vistas de la aplicación gestion.
+
+A diferencia de la paginación con OFFSET, cada página se obtiene filtrando a
+partir de la última fila mostrada, por lo que el costo de la consulta no
+depende de cuántas páginas se hayan recorrido ni del tamaño de la tabla.
+
+También incluye un paginador con conteo estimado para los listados del panel de
+administración, donde la paginación numerada necesita el total de filas.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class PaginaCursor:
+    """
+    Página de resultados obtenida mediante paginación por cursor.
+
+    Attributes:
+        - objetos: Lista con los objetos de la página.
+        - siguiente: Cursor para solicitar la página siguiente, o None si es la última.
+        - actual: Cursor con el que se solicitó esta página, o None si es la primera.
+    """
+    def __init__(self, objetos, siguiente, actual=None):
+        self.objetos = objetos
+        self.siguiente = siguiente
+        self.actual = actual
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+
+def _campos_orden(orden):
+    """
+    Separa cada campo de ordenamiento en su nombre y su dirección.
+
+    Returns:
+        Lista de tuplas (nombre_campo, descendente).
+    """
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+
+def codificar_cursor(objeto, orden):
+    """
+    Genera el cursor que apunta a la posición inmediatamente posterior a `objeto`.
+
+    Returns:
+        Cadena segura para URL con los valores de ordenamiento del objeto.
+    """
+    opts = type(objeto)._meta
+    valores = [
+        opts.get_field(nombre).value_to_string(objeto)
+        for nombre, _ in _campos_orden(orden)
+    ]
+    datos = json.dumps(valores, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, orden):
+    """
+    Convierte un cursor en los valores de ordenamiento que representa.
+
+    Returns:
+        Lista de valores ya convertidos al tipo de cada campo, o None si el cursor
+        está vacío o no es válido.
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError):
+        return None
+
+    campos = _campos_orden(orden)
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+    try:
+        return [
+            modelo._meta.get_field(nombre).to_python(valor)
+            for (nombre, _), valor in zip(campos, valores)
+        ]
+    except ValidationError:
+        return None
+
+
+def _filtro_posterior(orden, valores):
+    """
+    Construye la condición "fila posterior al cursor" para un orden compuesto.
+
+    Para (a, b) genera `a > va OR (a = va AND b > vb)`, respetando la dirección
+    de cada campo.
+    """
+    filtro = Q()
+    previos = {}
+    for (nombre, descendente), valor in zip(_campos_orden(orden), valores):
+        operador = 'lt' if descendente else 'gt'
+        filtro |= Q(**previos, **{f'{nombre}__{operador}': valor})
+        previos[nombre] = valor
+    return filtro
+
+
+def paginar(queryset, orden, cursor=None, tamano=50):
+    """
+    Obtiene una página de `queryset` ordenada por `orden` a partir de `cursor`.
+
+    El último campo de `orden` debe ser único (normalmente `id`) para que el
+    recorrido sea estable aunque haya valores repetidos en los demás campos.
+
+    Attributes:
+        queryset: Consulta a paginar; puede incluir filtros y anotaciones.
+        orden: Lista de campos de ordenamiento, con prefijo '-' para orden descendente.
+        cursor: Cursor recibido de una página anterior, o None para la primera página.
+        tamano: Cantidad máxima de objetos por página.
+
+    Returns:
+        PaginaCursor: Objetos de la página y cursor de la página siguiente.
+    """
+    valores = decodificar_cursor(cursor, queryset.model, orden)
+    queryset = queryset.order_by(*orden)
+    if valores is not None:
+        queryset = queryset.filter(_filtro_posterior(orden, valores))
+    else:
+        cursor = None
+
+    objetos = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(objetos) > tamano:
+        objetos = objetos[:tamano]
+        siguiente = codificar_cursor(objetos[-1], orden)
+    return PaginaCursor(objetos, siguiente, cursor)
+
+
+def conteo_estimado(modelo, using='default'):
+    """
+    Obtiene la cantidad aproximada de filas de la tabla de un modelo desde las estadísticas del motor.
+
+    En MySQL (InnoDB) y PostgreSQL la estimación se lee del catálogo sin recorrer la
+    tabla, a diferencia de `COUNT(*)`, cuyo costo crece con la cantidad de filas.
+
+    Returns:
+        Cantidad estimada de filas, o None si el motor no ofrece una estimación.
+    """
+    conexion = connections[using]
+    tabla = modelo._meta.db_table
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [tabla])
+        elif conexion.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tabla])
+        else:
+            return None
+        fila = cursor.fetchone()
+    if fila is None or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+class PaginadorConteoEstimado(Paginator):
+    """
+    Paginador para listados grandes que evita `COUNT(*)` sobre la tabla completa.
+
+    Si el listado no tiene filtros y la estimación del motor supera `umbral`, usa la
+    estimación como total; en otro caso (tablas pequeñas, filtros o búsquedas) cuenta
+    las filas de forma exacta.
+
+    Attributes:
+        - umbral: Cantidad de filas desde la que se usa la estimación.
+    """
+    umbral = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimado = conteo_estimado(queryset.model, using=queryset.db)
+            if estimado is not None and estimado >= self.umbral:
+                return estimado
+        return super().count
@@ -0,0 +1,178 @@
+"""
+Reportes de ocupación e ingresos basados en resúmenes diarios precalculados.
+
+`ResumenDiario` guarda, por noche y origen, las habitaciones vendidas, los
+ingresos atribuidos y las cancelaciones. Cada vez que cambia una reserva se
+recalculan solo los días que toca, a partir de `Ocupacion` (una fila por noche
+ocupada), con un número constante de consultas. Los reportes y la exportación
+CSV leen únicamente los resúmenes, por lo que su costo depende de la cantidad
+de días consultados y no de la cantidad de reservas.
+
+Las noches con estadías archivadas (ver gestion.archivo) están cerradas: sus
+noches ocupadas ya no existen, así que sus resúmenes se conservan y no se
+recalculan.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils.timezone import make_aware
+
+from gestion.archivo import fecha_cierre
+from gestion.models import Ocupacion, Reserva, ResumenDiario
+
+CENTAVOS = Decimal('0.01')
+
+
+def _inicio_del_dia(fecha):
+    return make_aware(datetime.combine(fecha, time.min))
+
+
+def fechas_de_reservas(reservas):
+    """
+    Calcula las noches que ocupan las reservas indicadas.
+
+    Attributes:
+        reservas: Iterable de tuplas (fecha_ingreso, noches).
+
+    Returns:
+        Conjunto de fechas.
+    """
+    fechas = set()
+    for fecha_ingreso, noches in reservas:
+        reserva = Reserva(fecha_ingreso=fecha_ingreso, noches=noches)
+        fechas.update(reserva.noches_ocupadas())
+    return fechas
+
+
+def actualizar_resumen(fechas):
+    """
+    Recalcula los resúmenes diarios de las fechas indicadas.
+
+    Usa dos consultas de agregación (noches e ingresos desde `Ocupacion`, y
+    cancelaciones desde `Reserva`), sin importar cuántas reservas haya, y guarda
+    los resúmenes de esas fechas en una transacción. Cada resumen se actualiza o
+    se crea por su clave (fecha, origen), en orden, y solo se borran los que ya no
+    tienen datos: dos recálculos simultáneos con noches en común se esperan en las
+    mismas filas en lugar de insertar la misma clave dos veces. Omite las fechas
+    cerradas por el archivo histórico.
+
+    Attributes:
+        fechas: Iterable de fechas a recalcular.
+    """
+    fechas = sorted(set(fechas))
+    if not fechas:
+        return
+    cierre = fecha_cierre()
+    if cierre is not None:
+        fechas = [fecha for fecha in fechas if fecha >= cierre]
+        if not fechas:
+            return
+
+    tarifa_noche = ExpressionWrapper(
+        Coalesce('reserva__precio_final', F('reserva__habitacion__precio') * F('reserva__noches'))
+        / F('reserva__noches'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    resumenes = {}
+    ventas = (
+        Ocupacion.objects.filter(fecha__in=fechas)
+        .values('fecha', 'reserva__origen')
+        .annotate(noches=Count('id'), ingresos=Sum(tarifa_noche))
+        .order_by()
+    )
+    for fila in ventas:
+        resumen = resumenes.setdefault(
+            (fila['fecha'], fila['reserva__origen']),
+            ResumenDiario(fecha=fila['fecha'], origen=fila['reserva__origen']))
+        resumen.noches_vendidas = fila['noches']
+        resumen.ingresos = Decimal(fila['ingresos'] or 0).quantize(CENTAVOS)
+
+    cancelaciones = (
+        Reserva.objects.filter(
+            estado='cancelada',
+            fecha_ingreso__gte=_inicio_del_dia(fechas[0]),
+            fecha_ingreso__lt=_inicio_del_dia(fechas[-1] + timedelta(days=1)),
+        )
+        .annotate(dia=TruncDate('fecha_ingreso'))
+        .values('dia', 'origen')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    conjunto = set(fechas)
+    for fila in cancelaciones:
+        if fila['dia'] in conjunto:
+            resumen = resumenes.setdefault(
+                (fila['dia'], fila['origen']), ResumenDiario(fecha=fila['dia'], origen=fila['origen']))
+            resumen.cancelaciones = fila['total']
+
+    with transaction.atomic():
+        guardados = []
+        for (fecha, origen), resumen in sorted(resumenes.items()):
+            guardado, _ = ResumenDiario.objects.update_or_create(fecha=fecha, origen=origen, defaults={
+                'noches_vendidas': resumen.noches_vendidas,
+                'ingresos': resumen.ingresos,
+                'cancelaciones': resumen.cancelaciones,
+            })
+            guardados.append(guardado.pk)
+        ResumenDiario.objects.filter(fecha__in=fechas).exclude(pk__in=guardados).delete()
+
+
+def recalcular_rango(desde, hasta, dias_por_lote=31):
+    """
+    Recalcula los resúmenes de todas las fechas entre `desde` (inclusive) y `hasta` (exclusivo).
+
+    Útil para poblar los resúmenes por primera vez o corregirlos; procesa el rango
+    en lotes de `dias_por_lote` días.
+    """
+    dia = desde
+    while dia < hasta:
+        fin = min(dia + timedelta(days=dias_por_lote), hasta)
+        actualizar_resumen(dia + timedelta(days=i) for i in range((fin - dia).days))
+        dia = fin
+
+
+def resumen_por_dia(desde, hasta):
+    """
+    Obtiene el reporte diario entre `desde` (inclusive) y `hasta` (exclusivo) desde los resúmenes.
+
+    Returns:
+        Lista de diccionarios por día con noches vendidas, ingresos, cancelaciones y
+        el detalle por origen, ordenada por fecha.
+    """
+    dias = {}
+    for resumen in ResumenDiario.objects.filter(fecha__gte=desde, fecha__lt=hasta).order_by('fecha', 'origen'):
+        dia = dias.setdefault(resumen.fecha, {
+            'fecha': resumen.fecha, 'noches_vendidas': 0, 'ingresos': Decimal('0.00'),
+            'cancelaciones': 0, 'por_origen': {},
+        })
+        dia['noches_vendidas'] += resumen.noches_vendidas
+        dia['ingresos'] += resumen.ingresos
+        dia['cancelaciones'] += resumen.cancelaciones
+        dia['por_origen'][resumen.origen] = {
+            'noches_vendidas': resumen.noches_vendidas,
+            'ingresos': resumen.ingresos,
+            'cancelaciones': resumen.cancelaciones,
+        }
+    return [dias[fecha] for fecha in sorted(dias)]
+
+
+def totales(desde, hasta):
+    """
+    Suma los resúmenes entre `desde` (inclusive) y `hasta` (exclusivo), por origen.
+
+    Returns:
+        Lista de diccionarios con origen, noches vendidas, ingresos y cancelaciones.
+    """
+    return list(
+        ResumenDiario.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+        .values('origen')
+        .annotate(
+            noches_vendidas=Sum('noches_vendidas'),
+            ingresos=Sum('ingresos'),
+            cancelaciones=Sum('cancelaciones'),
+        )
+        .order_by('origen')
+    )
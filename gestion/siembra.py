@@ -0,0 +1,354 @@
+"""
+Generador de datos sintéticos para pruebas de carga (ver el comando `seed_hostal`).
+
+Genera trabajadores, habitaciones, clientes válidos (RUT con dígito verificador,
+teléfono +569 y correo únicos), reservas sin solapamiento por habitación y sus
+Check-In y Check-Out. Todo sale de un `random.Random(semilla)` y de una fecha
+base, de modo que la misma semilla y fecha producen exactamente los mismos datos.
+
+Las habitaciones y los trabajadores se escriben con `bulk_create`. Las tablas
+grandes (clientes, reservas, noches ocupadas, Check-In, Check-Out y registro de
+cambios) se escriben con un `executemany` por tabla y lote, a partir de tuplas:
+`bulk_create` instancia un modelo y compila cada valor por separado, lo que lo
+deja en unas 12.000 filas por segundo en SQLite. Las claves primarias son
+explícitas, así que las filas relacionadas se arman sin releer nada. No se llama a
+`save()` ni se envían señales; cada lote de reservas se confirma en su propia
+transacción junto con sus filas relacionadas, y lo que harían los hooks por fila
+se hace al final en bloque: estado de las habitaciones, resúmenes diarios,
+calendario de tarifas e invalidación de la caché. Durante la carga no se
+verifican las claves foráneas (las claves se generan consistentes) y los índices
+secundarios de las tablas grandes se borran y se recrean al final (ver
+`_carga_rapida`). La base debe estar vacía de habitaciones, clientes y reservas.
+"""
+import random
+import time as reloj
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.timezone import make_aware, now
+
+from gestion import cache, reportes, tarifas
+from gestion.models import (
+    CheckIn, CheckOut, Cliente, Habitacion, Ocupacion, RegistroCambio, Reserva, Trabajador, digito_verificador,
+    normalizar_rut, normalizar_texto,
+)
+
+# Reservas por lote; cada lote se escribe en su propia transacción.
+RESERVAS_POR_LOTE = 20000
+
+NOMBRES = ['Ana', 'José', 'María', 'Luis', 'Camila', 'Pedro', 'Valentina', 'Jorge', 'Sofía', 'Diego',
+           'Fernanda', 'Matías', 'Catalina', 'Benjamín', 'Javiera', 'Tomás', 'Constanza', 'Ignacio']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez',
+             'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya']
+TIPOS = [('estandar', 25000), ('doble', 35000), ('suite', 60000)]
+
+QR = ('sí', 'no')
+MINUTOS_DIA = 24 * 60
+
+# Columnas escritas por tabla, en el orden de las tuplas generadas.
+CAMPOS_CLIENTE = ('id', 'rut', 'nombre', 'apellido', 'correo', 'telefono', 'fecha_registro',
+                  'rut_normalizado', 'nombre_normalizado', 'apellido_normalizado')
+CAMPOS_RESERVA = ('id', 'habitacion', 'cliente', 'origen', 'estado', 'fecha_registro', 'noches',
+                  'fecha_ingreso', 'fecha_salida', 'version')
+CAMPOS_REGISTRO_RESERVA = ('reserva', 'fecha_hora', 'qr_escaneado')
+CAMPOS_REGISTRO = ('modelo', 'objeto_id', 'borrado', 'fecha')
+
+# Ajustes de SQLite durante la carga: sin esperar la escritura a disco, diario de
+# transacciones en memoria y caché de 256 MB para recrear los índices.
+PRAGMAS_CARGA = {'synchronous': 'OFF', 'journal_mode': 'MEMORY', 'temp_store': 'MEMORY', 'cache_size': -256000}
+
+# Tablas cuyos índices secundarios se recrean al final de la carga (ver `_carga_rapida`).
+TABLAS_MASIVAS = (Cliente, Reserva, Ocupacion, CheckIn, CheckOut, RegistroCambio)
+
+# Primer número de RUT de los clientes generados; el de cada cliente es este más su id.
+RUT_BASE = 10000000
+
+
+class ResultadoSiembra:
+    """
+    Resumen de una siembra.
+
+    Attributes:
+        - filas: Filas escritas por modelo.
+        - segundos: Duración de la escritura de las filas base (sin las tablas derivadas).
+        - segundos_derivados: Duración del recálculo de resúmenes, tarifas y caché.
+    """
+    def __init__(self):
+        self.filas = {}
+        self.segundos = 0.0
+        self.segundos_derivados = 0.0
+
+    @property
+    def total(self):
+        return sum(self.filas.values())
+
+    @property
+    def filas_por_segundo(self):
+        return self.total / self.segundos if self.segundos else 0
+
+    def sumar(self, modelo, cantidad):
+        self.filas[modelo.__name__] = self.filas.get(modelo.__name__, 0) + cantidad
+
+
+class _Valores:
+    """
+    Fechas y momentos ya convertidos al formato del motor, calculados una vez por valor distinto.
+
+    Los días se expresan como desplazamientos desde `inicio` y los momentos como
+    minutos desde el inicio de ese día, de modo que generar las filas solo suma enteros.
+    """
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self._fechas = {}
+        self._momentos = {}
+        self._campo_fecha = Ocupacion._meta.get_field('fecha')
+        self._campo_momento = Reserva._meta.get_field('fecha_ingreso')
+
+    def fecha(self, dia):
+        valor = self._fechas.get(dia)
+        if valor is None:
+            valor = self._fechas[dia] = self._campo_fecha.get_db_prep_save(
+                self.inicio + timedelta(days=dia), connection)
+        return valor
+
+    def momento(self, minuto):
+        valor = self._momentos.get(minuto)
+        if valor is None:
+            dia, minutos = divmod(minuto, MINUTOS_DIA)
+            fecha_hora = make_aware(
+                datetime.combine(self.inicio + timedelta(days=dia), time()) + timedelta(minutes=minutos))
+            valor = self._momentos[minuto] = self._campo_momento.get_db_prep_save(fecha_hora, connection)
+        return valor
+
+
+def _insertar(resultado, modelo, campos, filas):
+    """
+    Inserta filas con un solo `executemany`, sin instanciar modelos.
+
+    Attributes:
+        campos: Nombres de los campos, en el orden de los valores de cada fila.
+        filas: Lista de tuplas con valores ya en el formato del motor (ver `_Valores`).
+    """
+    if not filas:
+        return
+    campos = [modelo._meta.get_field(nombre) for nombre in campos]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(modelo._meta.db_table),
+        ', '.join(connection.ops.quote_name(campo.column) for campo in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, filas)
+    resultado.sumar(modelo, len(filas))
+
+
+def _clientes(azar, cantidad, registro):
+    for pk in range(1, cantidad + 1):
+        numero = RUT_BASE + pk
+        rut = f'{numero}-{digito_verificador(numero)}'
+        nombre, apellido = azar.choice(NOMBRES), azar.choice(APELLIDOS)
+        yield (pk, rut, nombre, apellido, f'cliente{pk}@hostal.example', f'+569{int(azar.random() * 10 ** 8):08d}',
+               registro, normalizar_rut(rut), normalizar_texto(nombre), normalizar_texto(apellido))
+
+
+def _estadias(azar, habitaciones, reservas):
+    """
+    Genera las estadías consecutivas de cada habitación, sin solapamiento.
+
+    Returns:
+        Generador de tuplas (habitacion_id, primera noche, noches), con la noche como desplazamiento en días.
+    """
+    por_habitacion = -(-reservas // habitaciones) if habitaciones else 0
+    pendientes = reservas
+    for habitacion in range(1, habitaciones + 1):
+        dia = int(azar.random() * 3)
+        for _ in range(min(por_habitacion, pendientes)):
+            noches = 1 + int(azar.random() * 5)
+            yield habitacion, dia, noches
+            dia += noches + int(azar.random() * 2)
+        pendientes -= min(por_habitacion, pendientes)
+
+
+@contextmanager
+def _carga_rapida(modelos):
+    """
+    Prepara el motor para una carga masiva en las tablas indicadas y lo restaura al terminar.
+
+    En SQLite aplica `PRAGMAS_CARGA` (solo fuera de una transacción) y borra los
+    índices secundarios, que se vuelven a crear al final: construir un índice de una vez es
+    mucho más rápido que mantenerlo fila por fila, y los índices únicos verifican
+    igualmente los datos al recrearse. En MySQL desactiva la verificación de claves
+    únicas de la sesión. Un corte en medio de la carga puede dejar
+    la base inservible, lo que no importa en una base sintética.
+    """
+    tablas = [modelo._meta.db_table for modelo in modelos]
+    indices, anteriores = [], {}
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # SQLite no permite cambiar estos ajustes dentro de una transacción
+            for pragma, valor in PRAGMAS_CARGA.items() if not connection.in_atomic_block else ():
+                cursor.execute(f'PRAGMA {pragma}')
+                anteriores[pragma] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {pragma} = {valor}')
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({})"
+                .format(', '.join(['%s'] * len(tablas))), tablas)
+            indices = cursor.fetchall()
+            for nombre, _ in indices:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(nombre)}')
+        elif connection.vendor == 'mysql':
+            cursor.execute('SET unique_checks = 0')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                for _, sql in indices:
+                    cursor.execute(sql)
+                for pragma, valor in anteriores.items():
+                    cursor.execute(f'PRAGMA {pragma} = {valor}')
+            elif connection.vendor == 'mysql':
+                cursor.execute('SET unique_checks = 1')
+
+
+def sembrar(habitaciones=500, clientes=50000, reservas=500000, trabajadores=5, semilla=0, fecha_base=None,
+            reservas_por_lote=RESERVAS_POR_LOTE):
+    """
+    Carga datos sintéticos válidos en una base sin habitaciones, clientes ni reservas.
+
+    Attributes:
+        habitaciones: Cantidad de habitaciones.
+        clientes: Cantidad de clientes.
+        reservas: Cantidad de reservas, repartidas entre las habitaciones.
+        trabajadores: Cantidad de trabajadores con su contraseña inicial.
+        semilla: Semilla de los datos generados.
+        fecha_base: Fecha que separa estadías pasadas y futuras (por defecto, hoy).
+        reservas_por_lote: Reservas escritas por transacción.
+
+    Returns:
+        ResultadoSiembra.
+
+    Raises:
+        ValueError: Si la base ya tiene habitaciones, clientes o reservas.
+    """
+    if Habitacion.objects.exists() or Cliente.objects.exists() or Reserva.objects.exists():
+        raise ValueError("La base ya tiene habitaciones, clientes o reservas; la siembra necesita una base vacía.")
+    azar = random.Random(semilla)
+    fecha_base = fecha_base or now().date()
+    # Cerca de un quinto de las estadías de cada habitación queda después de la fecha base
+    por_habitacion = -(-reservas // habitaciones) if habitaciones else 0
+    dias_pasados = int(por_habitacion * 3.5 * 0.8)
+    valores = _Valores(fecha_base - timedelta(days=dias_pasados))
+    minuto_base = dias_pasados * MINUTOS_DIA + 12 * 60
+    resultado = ResultadoSiembra()
+    inicio = reloj.perf_counter()
+
+    with connection.constraint_checks_disabled(), _carga_rapida(TABLAS_MASIVAS):
+        with transaction.atomic():
+            existentes = set(Trabajador.objects.values_list('rut', flat=True))
+            nuevos = []
+            for i in range(1, trabajadores + 1):
+                rut = f'{5000000 + i}-{digito_verificador(5000000 + i)}'
+                # Se sortea aunque el trabajador ya exista, para no desplazar el resto de los datos
+                nombre, apellido = azar.choice(NOMBRES), azar.choice(APELLIDOS)
+                if rut not in existentes:
+                    trabajador = Trabajador(rut=rut, nombre=nombre, apellido=apellido,
+                                            correo=f'trabajador{i}@hostal.example')
+                    trabajador.set_password(trabajador.contrasena_inicial(), temporal=True)
+                    nuevos.append(trabajador)
+            Trabajador.objects.bulk_create(nuevos)
+            resultado.sumar(Trabajador, len(nuevos))
+
+            tipos = [azar.choice(TIPOS) for _ in range(habitaciones)]
+            Habitacion.objects.bulk_create([
+                Habitacion(pk=pk, numero_habitacion=f'{pk:04d}', tipo=tipo, precio=Decimal(precio))
+                for pk, (tipo, precio) in enumerate(tipos, start=1)
+            ], batch_size=1000)
+            resultado.sumar(Habitacion, habitaciones)
+            _insertar(resultado, RegistroCambio, CAMPOS_REGISTRO, [
+                ('habitacion', pk, False, valores.momento(minuto_base)) for pk in range(1, habitaciones + 1)])
+
+            lote = []
+            registro = valores.momento(minuto_base - 365 * 3 * MINUTOS_DIA)
+            for cliente in _clientes(azar, clientes, registro):
+                lote.append(cliente)
+                if len(lote) == reservas_por_lote:
+                    _insertar(resultado, Cliente, CAMPOS_CLIENTE, lote)
+                    lote = []
+            _insertar(resultado, Cliente, CAMPOS_CLIENTE, lote)
+
+        reservadas = set()
+        lote = []
+        for pk, (habitacion, dia, noches) in enumerate(_estadias(azar, habitaciones, reservas), start=1):
+            lote.append((pk, habitacion, dia, noches))
+            if len(lote) == reservas_por_lote:
+                _escribir_reservas(resultado, azar, valores, lote, clientes, minuto_base, reservadas)
+                lote = []
+        _escribir_reservas(resultado, azar, valores, lote, clientes, minuto_base, reservadas)
+
+    with transaction.atomic():
+        # Estado que dejaría Reserva.save: reservada si tiene una estadía activa que no ha terminado
+        Habitacion.objects.filter(pk__in=reservadas).update(estado='reservada')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Habitacion, Cliente, Reserva]):
+                cursor.execute(sql)
+    resultado.segundos = reloj.perf_counter() - inicio
+
+    # Lo que hacen las señales por fila, una sola vez para todo el rango
+    inicio = reloj.perf_counter()
+    primera = Reserva.objects.order_by('fecha_ingreso').values_list('fecha_ingreso', flat=True).first()
+    if primera is not None:
+        ultima = Reserva.objects.order_by('-fecha_salida').values_list('fecha_salida', flat=True).first()
+        reportes.recalcular_rango(primera.date(), ultima.date() + timedelta(days=1))
+    tarifas.recalcular_tarifas()
+    cache.invalidar_catalogo()
+    cache.invalidar_ocupacion()
+    resultado.segundos_derivados = reloj.perf_counter() - inicio
+    return resultado
+
+
+def _escribir_reservas(resultado, azar, valores, lote, clientes, minuto_base, reservadas):
+    """
+    Escribe un lote de reservas con sus noches ocupadas, registros de entrada y salida y entradas del registro de cambios.
+
+    Attributes:
+        valores: Conversión de días y minutos al formato del motor (ver `_Valores`).
+        lote: Lista de tuplas (pk, habitacion_id, primera noche, noches).
+        minuto_base: Momento que separa estadías pasadas y futuras.
+        reservadas: Conjunto donde se agregan las habitaciones con estadías activas por terminar.
+    """
+    if not lote:
+        return
+    aleatorio = azar.random
+    momento, fecha = valores.momento, valores.fecha
+    filas, ocupaciones, entradas, salidas = [], [], [], []
+    for pk, habitacion, dia, noches in lote:
+        ingreso = dia * MINUTOS_DIA + 15 * 60
+        salida = ingreso + noches * MINUTOS_DIA
+        sorteo = aleatorio()
+        estado = 'pendiente' if sorteo < 0.2 else 'pagada' if sorteo < 0.9 else 'cancelada'
+        filas.append((
+            pk, habitacion, 1 + int(aleatorio() * clientes) if clientes else None,
+            'otra_plataforma' if aleatorio() < 0.3 else 'manual', estado,
+            momento(ingreso - (1 + int(aleatorio() * 60)) * MINUTOS_DIA), noches, momento(ingreso), momento(salida), 0,
+        ))
+        if estado == 'cancelada':
+            continue
+        ocupaciones.extend((habitacion, pk, fecha(dia + i)) for i in range(noches))
+        if salida > minuto_base:
+            reservadas.add(habitacion)
+        if ingreso <= minuto_base:
+            entradas.append((pk, momento(ingreso + 15 * int(aleatorio() * 20)), QR[aleatorio() < 0.5]))
+        if salida <= minuto_base:
+            salidas.append((pk, momento(salida - 15 * int(aleatorio() * 16)), QR[aleatorio() < 0.5]))
+
+    with transaction.atomic():
+        _insertar(resultado, Reserva, CAMPOS_RESERVA, filas)
+        _insertar(resultado, Ocupacion, ('habitacion', 'reserva', 'fecha'), ocupaciones)
+        _insertar(resultado, CheckIn, CAMPOS_REGISTRO_RESERVA, entradas)
+        _insertar(resultado, CheckOut, CAMPOS_REGISTRO_RESERVA, salidas)
+        _insertar(resultado, RegistroCambio, CAMPOS_REGISTRO, [
+            ('reserva', pk, False, momento(minuto_base)) for pk, _, _, _ in lote])
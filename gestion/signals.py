@@ -0,0 +1,121 @@
+"""
+Señales de la aplicación gestion.
+
+Los receptores mantienen la caché coherente con la base de datos, actualizan
+los resúmenes diarios de los reportes y el calendario de tarifas, y escriben el
+registro de cambios para los canales externos cuando se guardan o borran
+habitaciones, reservas y planes de tarifa. Las operaciones en lote (`update`,
+`bulk_create`) no disparan `post_save`, por lo que envían
+`reservas_actualizadas` antes de confirmar su transacción, para que el registro
+de cambios se confirme junto con ellas.
+
+Los resúmenes y las tarifas por ocupación se recalculan al confirmar, cuando la
+reserva ya está guardada: un error en ese recálculo se reintenta y, si persiste,
+se registra en el log sin llegar a la solicitud. Lo mismo vale para el
+calendario de tarifas al cambiar planes o habitaciones.
+"""
+import logging
+
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from gestion import cache, reportes, sincronizacion, tarifas
+from gestion.models import Reserva
+
+# Enviada por las operaciones en lote sobre reservas, dentro de su transacción, con
+# los argumentos `reservas` (ids de las reservas modificadas) y `habitaciones` (ids
+# de las habitaciones cuyo estado pudo cambiar).
+reservas_actualizadas = Signal()
+
+# Intentos de cada recálculo al confirmar antes de darlo por fallido.
+INTENTOS_RECALCULO = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidar(*funciones):
+    """
+    Invalida de inmediato y otra vez al confirmar la transacción, para que una lectura
+    concurrente no vuelva a guardar en caché datos anteriores al commit.
+    """
+    for funcion in funciones:
+        funcion()
+        transaction.on_commit(funcion)
+
+
+@receiver(post_save, sender='gestion.Habitacion')
+@receiver(post_delete, sender='gestion.Habitacion')
+def habitacion_modificada(sender, instance, signal, **kwargs):
+    _invalidar(cache.invalidar_catalogo, cache.invalidar_ocupacion)
+    sincronizacion.registrar(habitaciones=[instance.pk], borrado=signal is post_delete)
+    # Los cambios de estado no afectan las tarifas; solo el precio base o el tipo
+    if signal is post_save and instance.cambia_tarifa():
+        habitaciones = sender.objects.filter(pk=instance.pk)
+        transaction.on_commit(lambda: _recalcular(tarifas.recalcular_tarifas, habitaciones=habitaciones))
+
+
+@receiver(post_save, sender='gestion.PlanTarifa')
+@receiver(post_delete, sender='gestion.PlanTarifa')
+def plan_tarifa_modificado(sender, **kwargs):
+    # Un plan puede cambiar de tipo o de fechas: se recalcula todo el horizonte
+    transaction.on_commit(lambda: _recalcular(tarifas.recalcular_tarifas))
+
+
+def _recalcular(funcion, *args, **kwargs):
+    """
+    Ejecuta un recálculo posterior a la confirmación sin que sus errores lleguen a la solicitud.
+
+    Cada intento corre en su propia transacción. Un bloqueo mutuo o una clave
+    duplicada por otra transacción simultánea se reintenta; si todos los intentos
+    fallan se registra el error, y los datos se corrigen en el próximo cambio de
+    esas noches o con `recalcular_rango` / `recalcular_tarifas`.
+    """
+    for intento in range(1, INTENTOS_RECALCULO + 1):
+        try:
+            with transaction.atomic():
+                funcion(*args, **kwargs)
+            return
+        except DatabaseError:
+            if intento == INTENTOS_RECALCULO:
+                logger.exception("No se pudo ejecutar %s después de %d intentos.", funcion.__qualname__, intento)
+
+
+def _actualizar_resumen(fechas, habitaciones):
+    """
+    Recalcula los resúmenes y las tarifas por ocupación de las fechas al confirmar la
+    transacción, cuando las filas de `Ocupacion` ya reflejan el cambio.
+    """
+    if fechas:
+        transaction.on_commit(lambda: _recalcular(reportes.actualizar_resumen, fechas))
+        transaction.on_commit(lambda: _recalcular(tarifas.actualizar_por_ocupacion, fechas, habitaciones))
+
+
+@receiver(post_save, sender='gestion.Reserva')
+@receiver(post_delete, sender='gestion.Reserva')
+def reserva_modificada(sender, instance, signal, created=False, **kwargs):
+    _invalidar(cache.invalidar_ocupacion)
+    sincronizacion.registrar(reservas=[instance.pk], borrado=signal is post_delete)
+
+    # Noches actuales más las que tenía antes del cambio (valores recordados al cargarla)
+    fechas = set(instance.noches_ocupadas())
+    habitaciones = {instance.habitacion_id}
+    anteriores = getattr(instance, '_valores_cargados', {})
+    if not created and 'fecha_ingreso' in anteriores and 'noches' in anteriores:
+        fechas |= reportes.fechas_de_reservas([(anteriores['fecha_ingreso'], anteriores['noches'])])
+    if not created and 'habitacion_id' in anteriores:
+        habitaciones.add(anteriores['habitacion_id'])
+    _actualizar_resumen(fechas, habitaciones)
+
+
+@receiver(reservas_actualizadas)
+def reservas_modificadas_en_lote(sender, reservas=(), habitaciones=(), **kwargs):
+    sincronizacion.registrar(reservas=reservas, habitaciones=habitaciones)
+    if habitaciones:
+        _invalidar(cache.invalidar_catalogo)
+    _invalidar(cache.invalidar_ocupacion)
+    if reservas:
+        filas = list(Reserva.objects.filter(pk__in=reservas).values_list('fecha_ingreso', 'noches', 'habitacion_id'))
+        _actualizar_resumen(
+            reportes.fechas_de_reservas((ingreso, noches) for ingreso, noches, _ in filas),
+            {habitacion_id for _, _, habitacion_id in filas})
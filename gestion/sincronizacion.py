@@ -0,0 +1,282 @@
+"""
+Sincronización con administradores de canales (otras plataformas de reservas).
+
+Feed incremental: cada cambio de una reserva o habitación agrega una fila a
+`RegistroCambio` en la misma transacción que el cambio (ver gestion.signals). El
+canal pide los cambios posteriores a su cursor (el id de la última entrada que
+leyó) y recibe el estado actual de cada objeto modificado, sin comparar tablas
+completas. Los ids se asignan al insertar y no al confirmar, así que las entradas
+más recientes que `settings.SYNC_MARGEN_SEGUNDOS` no se entregan todavía: una
+transacción más antigua aún sin confirmar podría ocupar un id menor y el canal
+la saltaría al avanzar su cursor. Las reservas movidas al archivo histórico (ver
+gestion.archivo) se entregan con sus últimos datos y `archivada`, no como borradas.
+Cada canal recibe todos los datos solo de sus propias reservas; de las demás
+(de otros canales o del hostal) recibe únicamente la ocupación: habitación,
+noches y si siguen ocupándola.
+
+Carga de reservas: las reservas del canal se crean o actualizan por su
+`referencia_externa`. Las nuevas se escriben en lote con el importador
+(gestion.importacion) y las existentes se guardan solo si algún dato cambió, de
+modo que repetir la misma solicitud no modifica nada ni genera cambios en el feed.
+Las referencias de reservas archivadas no se vuelven a crear: se informan como error.
+Cada reserva queda asociada al canal que la creó, y ningún otro canal puede
+modificarla.
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import now
+
+from gestion.filas import ESTADOS_VALIDOS, leer_fecha_ingreso, leer_noches, texto
+from gestion.models import Habitacion, RegistroCambio, Reserva, ReservaArchivada
+from gestion.tarifas import cotizar_lote
+
+# Datos de la estadía que determinan su precio.
+CAMPOS_COTIZADOS = ('habitacion_id', 'fecha_ingreso', 'noches')
+
+
+def registrar(reservas=(), habitaciones=(), borrado=False):
+    """
+    Agrega al registro de cambios las reservas y habitaciones indicadas con una sola consulta.
+
+    Attributes:
+        reservas: Ids de las reservas modificadas.
+        habitaciones: Ids de las habitaciones modificadas.
+        borrado: Indica si los objetos fueron borrados.
+    """
+    fecha = now()
+    entradas = [
+        RegistroCambio(modelo=modelo, objeto_id=objeto_id, borrado=borrado, fecha=fecha)
+        for modelo, ids in (('reserva', reservas), ('habitacion', habitaciones))
+        for objeto_id in ids
+    ]
+    if entradas:
+        RegistroCambio.objects.bulk_create(entradas)
+
+
+def _visibles():
+    return RegistroCambio.objects.filter(fecha__lte=now() - timedelta(seconds=settings.SYNC_MARGEN_SEGUNDOS))
+
+
+def ultimo_cursor():
+    """
+    Obtiene el id de la última entrada del registro que ya se entrega en el feed.
+
+    Returns:
+        Id de la entrada, o 0 si no hay ninguna.
+    """
+    return _visibles().order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def serializar_reserva(reserva, canal=None):
+    """
+    Representa una reserva como diccionario serializable en JSON para los canales.
+
+    Attributes:
+        reserva: Reserva (o ReservaArchivada) a representar.
+        canal: Canal que recibe el feed. Si la reserva no es suya, solo se entrega la
+            ocupación (habitación, noches y si sigue ocupada), sin datos del huésped ni precios.
+    """
+    if canal is None or reserva.canal != canal:
+        return {
+            'habitacion': reserva.habitacion.numero_habitacion,
+            'fecha_ingreso': reserva.fecha_ingreso.isoformat(),
+            'fecha_salida': reserva.fecha_salida.isoformat(),
+            'noches': reserva.noches,
+            'ocupada': reserva.estado != 'cancelada',
+        }
+    return {
+        'referencia_externa': reserva.referencia_externa,
+        'habitacion': reserva.habitacion.numero_habitacion,
+        'origen': reserva.origen,
+        'estado': reserva.estado,
+        'fecha_ingreso': reserva.fecha_ingreso.isoformat(),
+        'fecha_salida': reserva.fecha_salida.isoformat(),
+        'noches': reserva.noches,
+        'precio_final': str(reserva.precio_final) if reserva.precio_final is not None else None,
+    }
+
+
+def serializar_habitacion(habitacion):
+    """
+    Representa una habitación como diccionario serializable en JSON para los canales.
+    """
+    return {
+        'numero_habitacion': habitacion.numero_habitacion,
+        'tipo': habitacion.tipo,
+        'precio': str(habitacion.precio),
+        'estado': habitacion.estado,
+    }
+
+
+def cambios_desde(cursor, limite, canal=None):
+    """
+    Obtiene los cambios posteriores a un cursor con un número constante de consultas.
+
+    Si un objeto cambió varias veces dentro de la página se entrega una sola vez,
+    con su estado actual y el cursor de su último cambio.
+
+    Attributes:
+        cursor: Id de la última entrada ya leída por el canal (0 para empezar desde el inicio).
+        limite: Cantidad máxima de entradas del registro leídas.
+        canal: Canal que lee el feed; solo sus reservas se entregan con todos los datos.
+
+    Returns:
+        Diccionario con `cambios`, el `cursor` para la siguiente solicitud y `hay_mas`.
+    """
+    entradas = list(_visibles().filter(pk__gt=cursor).order_by('pk')[:limite + 1])
+    hay_mas = len(entradas) > limite
+    entradas = entradas[:limite]
+
+    ultimas = {}
+    for entrada in entradas:
+        ultimas[(entrada.modelo, entrada.objeto_id)] = entrada
+    ids = {'reserva': set(), 'habitacion': set()}
+    for entrada in ultimas.values():
+        if not entrada.borrado:
+            ids[entrada.modelo].add(entrada.objeto_id)
+    objetos = {
+        'reserva': Reserva.objects.select_related('habitacion').in_bulk(ids['reserva']),
+        'habitacion': Habitacion.objects.in_bulk(ids['habitacion']),
+    }
+    archivadas = ids['reserva'] - objetos['reserva'].keys()
+    if archivadas:
+        objetos['reserva'].update(ReservaArchivada.objects.select_related('habitacion').in_bulk(archivadas))
+    serializar = {
+        'reserva': lambda reserva: serializar_reserva(reserva, canal),
+        'habitacion': serializar_habitacion,
+    }
+
+    cambios = []
+    for entrada in sorted(ultimas.values(), key=lambda entrada: entrada.pk):
+        cambio = {'cursor': entrada.pk, 'modelo': entrada.modelo, 'id': entrada.objeto_id}
+        objeto = objetos[entrada.modelo].get(entrada.objeto_id)
+        if objeto is None:
+            cambio['borrado'] = True
+        else:
+            cambio['datos'] = serializar[entrada.modelo](objeto)
+            if isinstance(objeto, ReservaArchivada):
+                cambio['archivada'] = True
+        cambios.append(cambio)
+    return {'cambios': cambios, 'cursor': entradas[-1].pk if entradas else cursor, 'hay_mas': hay_mas}
+
+
+def _valores(fila, habitaciones):
+    """
+    Lee de una fila del canal los datos de la estadía que trae.
+
+    Returns:
+        Diccionario {campo: valor} solo con los campos presentes en la fila.
+
+    Raises:
+        ValueError: Si algún dato no es válido.
+    """
+    valores = {}
+    if texto(fila, 'habitacion'):
+        habitacion = habitaciones.get(texto(fila, 'habitacion'))
+        if habitacion is None:
+            raise ValueError(f"La habitación {texto(fila, 'habitacion')!r} no existe.")
+        valores['habitacion_id'] = habitacion.pk
+    if texto(fila, 'fecha_ingreso'):
+        valores['fecha_ingreso'] = leer_fecha_ingreso(texto(fila, 'fecha_ingreso'))
+    if texto(fila, 'noches'):
+        valores['noches'] = leer_noches(texto(fila, 'noches'))
+    if texto(fila, 'estado'):
+        if texto(fila, 'estado') not in ESTADOS_VALIDOS:
+            raise ValueError(f"El estado {texto(fila, 'estado')!r} no es válido.")
+        valores['estado'] = texto(fila, 'estado')
+    if texto(fila, 'precio_final'):
+        try:
+            valores['precio_final'] = Decimal(texto(fila, 'precio_final'))
+        except InvalidOperation:
+            raise ValueError("El precio final no es un número válido.")
+    return valores
+
+
+def upsert_reservas(filas, canal):
+    """
+    Crea o actualiza reservas de un canal según su referencia externa, de forma idempotente.
+
+    Las reservas nuevas se crean en lote con el importador y quedan a nombre del
+    canal; las existentes se actualizan una por una solo si cambia la habitación,
+    la fecha de ingreso, las noches, el estado o el precio final. Si cambia la
+    habitación, la fecha de ingreso o las noches y el canal no envía el precio
+    final, se vuelve a cotizar con las tarifas del hostal (ver gestion.tarifas).
+    Las reservas de otro canal, o cargadas sin canal, no se modifican y se
+    informan como error, igual que las referencias de reservas ya archivadas.
+
+    Attributes:
+        filas: Lista de diccionarios con referencia_externa, habitacion, fecha_ingreso,
+            noches y opcionalmente rut, correo, estado y precio_final.
+        canal: Nombre del canal que envía las reservas.
+
+    Returns:
+        Diccionario con las referencias `creadas`, `actualizadas` y `sin_cambios`, y los
+        `errores` ({"referencia", "mensaje"}).
+    """
+    # gestion.importacion envía gestion.signals, que importa este módulo
+    from gestion.importacion import importar_reservas
+
+    resultado = {'creadas': [], 'actualizadas': [], 'sin_cambios': [], 'errores': []}
+    referencias = [texto(fila, 'referencia_externa') for fila in filas]
+    existentes = Reserva.objects.in_bulk(set(referencias) - {''}, field_name='referencia_externa')
+
+    nuevas = [(indice, fila) for indice, fila in enumerate(filas) if referencias[indice] not in existentes]
+    if nuevas:
+        fallidas = dict(importar_reservas(nuevas, canal=canal).errores)
+        for indice, _ in nuevas:
+            if indice in fallidas:
+                resultado['errores'].append({'referencia': referencias[indice], 'mensaje': fallidas[indice]})
+            else:
+                resultado['creadas'].append(referencias[indice])
+
+    actualizar = [(indice, fila) for indice, fila in enumerate(filas) if referencias[indice] in existentes]
+    habitaciones = Habitacion.objects.only('id', 'numero_habitacion').in_bulk(
+        {texto(fila, 'habitacion') for _, fila in actualizar} - {''}, field_name='numero_habitacion')
+    modificadas = []
+    for indice, fila in actualizar:
+        reserva = existentes[referencias[indice]]
+        if reserva.canal != canal:
+            resultado['errores'].append({
+                'referencia': reserva.referencia_externa,
+                'mensaje': "La reserva pertenece a otro canal.",
+            })
+            continue
+        try:
+            valores = _valores(fila, habitaciones)
+            cambiados = [campo for campo, valor in valores.items() if getattr(reserva, campo) != valor]
+            if not cambiados:
+                resultado['sin_cambios'].append(reserva.referencia_externa)
+                continue
+            for campo in cambiados:
+                setattr(reserva, campo, valores[campo])
+            reserva.calcular_fecha_salida()
+        except OverflowError:
+            resultado['errores'].append({
+                'referencia': reserva.referencia_externa,
+                'mensaje': "La fecha de salida está fuera del rango permitido.",
+            })
+            continue
+        except ValueError as error:
+            resultado['errores'].append({'referencia': reserva.referencia_externa, 'mensaje': str(error)})
+            continue
+        modificadas.append((reserva, 'precio_final' in valores, cambiados))
+
+    # Sin precio del canal, las estadías que cambian de habitación o fechas se vuelven a cotizar juntas
+    recotizar = [reserva for reserva, con_precio, cambiados in modificadas
+                 if not con_precio and set(cambiados) & set(CAMPOS_COTIZADOS)]
+    precios = cotizar_lote([(r.habitacion_id, r.fecha_ingreso, r.noches) for r in recotizar])
+    for reserva, precio in zip(recotizar, precios):
+        reserva.precio_final = precio
+
+    for reserva, _, _ in modificadas:
+        try:
+            with transaction.atomic():
+                reserva.save()
+            resultado['actualizadas'].append(reserva.referencia_externa)
+        except ValidationError as error:
+            resultado['errores'].append({'referencia': reserva.referencia_externa, 'mensaje': error.messages[0]})
+    return resultado
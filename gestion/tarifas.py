@@ -0,0 +1,258 @@
+"""
+Motor de tarifas: precio por noche según planes de temporada, día de la semana y ocupación.
+
+Los planes (PlanTarifa) se evalúan una sola vez por habitación y noche y el
+resultado se guarda en TarifaDiaria, un calendario con una fila
+(habitacion, fecha, precio) por noche dentro del horizonte
+`settings.TARIFAS_HORIZONTE_DIAS`. Cotizar una estadía es entonces una lectura por
+rango sobre el índice único (habitacion, fecha) más una suma, sin evaluar planes
+ni consultar noche por noche. Las noches que no están en el calendario (más allá
+del horizonte) se calculan al vuelo con las mismas reglas.
+
+El calendario se recalcula al guardar o borrar planes, al cambiar el precio base
+o el tipo de una habitación y, si hay planes por ocupación, al cambiar las noches
+ocupadas (ver gestion.signals). El comando `recalcular_tarifas` avanza el
+horizonte cada día.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils.timezone import is_aware, localdate, localtime
+
+from gestion.models import Habitacion, Ocupacion, PlanTarifa, TarifaDiaria
+
+CENTAVOS = Decimal('0.01')
+
+
+def primera_noche(valor):
+    """
+    Convierte la fecha de ingreso (fecha o fecha y hora) en la fecha local de la primera noche.
+    """
+    if isinstance(valor, datetime):
+        return (localtime(valor) if is_aware(valor) else valor).date()
+    return valor
+
+
+def horizonte():
+    """
+    Rango de noches que se mantiene precalculado: desde hoy hasta `TARIFAS_HORIZONTE_DIAS` días después.
+
+    Returns:
+        Tupla (desde, hasta), con `hasta` exclusivo.
+    """
+    hoy = localdate()
+    return hoy, hoy + timedelta(days=settings.TARIFAS_HORIZONTE_DIAS)
+
+
+def planes_activos():
+    """
+    Obtiene los planes activos en el orden en que se evalúan (mayor prioridad primero).
+    """
+    return list(PlanTarifa.objects.filter(activo=True).order_by('-prioridad', 'pk'))
+
+
+def precio_noche(base, tipo, fecha, planes, ocupacion=0):
+    """
+    Calcula el precio de una noche aplicando el primer plan que rige.
+
+    Attributes:
+        base: Precio base de la habitación.
+        tipo: Tipo de la habitación.
+        fecha: Noche a cotizar.
+        planes: Planes activos ordenados por prioridad (ver `planes_activos`).
+        ocupacion: Porcentaje de habitaciones del tipo ocupadas esa noche.
+
+    Returns:
+        Tupla (precio, plan aplicado o None).
+    """
+    base = Decimal(str(base))
+    for plan in planes:
+        if plan.aplica(tipo, fecha, ocupacion):
+            return (base * (100 + plan.ajuste) / 100).quantize(CENTAVOS, ROUND_HALF_UP), plan
+    return base.quantize(CENTAVOS, ROUND_HALF_UP), None
+
+
+def ocupacion_por_tipo(desde, hasta, tipos):
+    """
+    Calcula el porcentaje de habitaciones ocupadas por tipo y noche con dos consultas de agregación.
+
+    Attributes:
+        desde: Primera noche.
+        hasta: Noche final, exclusiva.
+        tipos: Tipos de habitación a considerar.
+
+    Returns:
+        Diccionario {(tipo, fecha): porcentaje}; las noches sin ocupación no aparecen.
+    """
+    totales = dict(
+        Habitacion.objects.filter(tipo__in=tipos).values_list('tipo').annotate(total=Count('id')).order_by())
+    ocupadas = (
+        Ocupacion.objects.filter(fecha__gte=desde, fecha__lt=hasta, habitacion__tipo__in=tipos)
+        .values_list('habitacion__tipo', 'fecha')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {(tipo, fecha): total * 100 / totales[tipo] for tipo, fecha, total in ocupadas if totales.get(tipo)}
+
+
+def calcular(habitaciones, desde, hasta, planes=None):
+    """
+    Evalúa los planes para cada habitación y noche entre `desde` y `hasta`, sin usar el calendario.
+
+    Attributes:
+        habitaciones: Instancias de Habitacion (se usan id, precio y tipo).
+        desde: Primera noche.
+        hasta: Noche final, exclusiva.
+        planes: Planes activos ordenados; si se omiten, se consultan.
+
+    Returns:
+        Generador de tuplas (habitacion, fecha, precio, plan).
+    """
+    planes = planes_activos() if planes is None else planes
+    ocupacion = {}
+    if any(plan.ocupacion_minima is not None for plan in planes):
+        ocupacion = ocupacion_por_tipo(desde, hasta, {habitacion.tipo for habitacion in habitaciones})
+    fechas = [desde + timedelta(days=i) for i in range((hasta - desde).days)]
+    for habitacion in habitaciones:
+        for fecha in fechas:
+            precio, plan = precio_noche(
+                habitacion.precio, habitacion.tipo, fecha, planes, ocupacion.get((habitacion.tipo, fecha), 0))
+            yield habitacion, fecha, precio, plan
+
+
+def recalcular_tarifas(desde=None, hasta=None, habitaciones=None):
+    """
+    Reemplaza el calendario de tarifas entre `desde` y `hasta`, recortado al horizonte.
+
+    Los planes se leen una vez y las tarifas se reemplazan en una transacción con
+    un DELETE por rango y un `bulk_create`. Antes se bloquean las filas de las
+    habitaciones, en orden, de modo que dos recálculos simultáneos de las mismas
+    habitaciones se ejecutan uno después del otro (el segundo, con los datos que
+    confirmó el primero) en lugar de insertar a la vez las mismas claves.
+
+    Attributes:
+        desde: Primera noche (por defecto, hoy).
+        hasta: Noche final, exclusiva (por defecto, el fin del horizonte).
+        habitaciones: QuerySet de Habitacion a recalcular (por defecto, todas).
+
+    Returns:
+        Cantidad de tarifas guardadas.
+    """
+    inicio, fin = horizonte()
+    desde = max(desde or inicio, inicio)
+    hasta = min(hasta or fin, fin)
+    if desde >= hasta:
+        return 0
+    if habitaciones is None:
+        habitaciones = Habitacion.objects.all()
+    with transaction.atomic():
+        habitaciones = list(habitaciones.order_by('pk').select_for_update().only('id', 'precio', 'tipo'))
+        tarifas = [
+            TarifaDiaria(habitacion_id=habitacion.pk, fecha=fecha, precio=precio, plan=plan)
+            for habitacion, fecha, precio, plan in calcular(habitaciones, desde, hasta)
+        ]
+        TarifaDiaria.objects.filter(
+            habitacion__in=[habitacion.pk for habitacion in habitaciones], fecha__gte=desde, fecha__lt=hasta,
+        ).delete()
+        TarifaDiaria.objects.bulk_create(tarifas, batch_size=1000)
+    return len(tarifas)
+
+
+def actualizar_por_ocupacion(fechas, habitaciones):
+    """
+    Recalcula las noches indicadas para los tipos de las habitaciones indicadas, si algún plan depende de la ocupación.
+
+    Attributes:
+        fechas: Noches cuya ocupación cambió.
+        habitaciones: Ids de las habitaciones cuyas noches cambiaron.
+    """
+    fechas = sorted(set(fechas))
+    if not fechas or not PlanTarifa.objects.filter(activo=True, ocupacion_minima__isnull=False).exists():
+        return
+    tipos = Habitacion.objects.filter(pk__in=habitaciones).values('tipo')
+    recalcular_tarifas(fechas[0], fechas[-1] + timedelta(days=1), Habitacion.objects.filter(tipo__in=tipos))
+
+
+def cotizar(habitacion, desde, noches):
+    """
+    Cotiza una estadía con una lectura por rango del calendario y una suma en la base de datos.
+
+    Attributes:
+        habitacion: Instancia de Habitacion (se usan id, precio y tipo).
+        desde: Fecha, o fecha y hora, de ingreso.
+        noches: Cantidad de noches.
+
+    Returns:
+        Decimal con el precio total de la estadía.
+    """
+    primera = primera_noche(desde)
+    ultima = primera + timedelta(days=noches)
+    calendario = TarifaDiaria.objects.filter(
+        habitacion_id=habitacion.pk, fecha__gte=primera, fecha__lt=ultima,
+    ).aggregate(total=Sum('precio'), noches=Count('id'))
+    if calendario['noches'] == noches:
+        return Decimal(calendario['total']).quantize(CENTAVOS)
+    # Alguna noche no está en el calendario (fuera del horizonte): se calcula la estadía al vuelo
+    return sum((precio for _, _, precio, _ in calcular([habitacion], primera, ultima)), Decimal('0.00'))
+
+
+def cotizar_lote(consultas):
+    """
+    Cotiza muchas combinaciones de habitación y fechas con un número constante de consultas.
+
+    Lee las habitaciones y el rango de calendario que cubre todas las consultas; las
+    noches que falten se calculan al vuelo una por una, con los planes leídos una sola
+    vez, de modo que el trabajo crece con las noches consultadas y no con la distancia
+    entre las fechas.
+
+    Attributes:
+        consultas: Lista de tuplas (habitacion_id, desde, noches).
+
+    Returns:
+        Lista con el precio total de cada consulta, en el mismo orden, o None si la habitación no existe.
+    """
+    consultas = [(habitacion_id, primera_noche(desde), noches) for habitacion_id, desde, noches in consultas]
+    if not consultas:
+        return []
+    habitaciones = Habitacion.objects.only('id', 'precio', 'tipo').in_bulk(
+        {habitacion_id for habitacion_id, _, _ in consultas})
+    desde = min(primera for _, primera, _ in consultas)
+    hasta = max(primera + timedelta(days=noches) for _, primera, noches in consultas)
+    precios = {
+        (habitacion_id, fecha): precio
+        for habitacion_id, fecha, precio in TarifaDiaria.objects.filter(
+            habitacion_id__in=list(habitaciones), fecha__gte=desde, fecha__lt=hasta,
+        ).values_list('habitacion_id', 'fecha', 'precio').iterator()
+    }
+
+    noches_de = {}
+    faltantes = defaultdict(set)
+    for consulta in consultas:
+        habitacion_id, primera, noches = consulta
+        if habitacion_id not in habitaciones:
+            continue
+        noches_de[consulta] = [(habitacion_id, primera + timedelta(days=i)) for i in range(noches)]
+        for noche in noches_de[consulta]:
+            if noche not in precios:
+                faltantes[habitacion_id].add(noche[1])
+    if faltantes:
+        planes = planes_activos()
+        ocupacion = {}
+        if any(plan.ocupacion_minima is not None for plan in planes):
+            fechas = set().union(*faltantes.values())
+            ocupacion = ocupacion_por_tipo(
+                min(fechas), max(fechas) + timedelta(days=1), {habitaciones[pk].tipo for pk in faltantes})
+        for habitacion_id, fechas in faltantes.items():
+            habitacion = habitaciones[habitacion_id]
+            for fecha in fechas:
+                precios[habitacion_id, fecha], _ = precio_noche(
+                    habitacion.precio, habitacion.tipo, fecha, planes, ocupacion.get((habitacion.tipo, fecha), 0))
+
+    return [
+        sum((precios[noche] for noche in noches_de[consulta]), Decimal('0.00')) if consulta in noches_de else None
+        for consulta in consultas
+    ]
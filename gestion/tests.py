@@ -1,11 +1,47 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import time as reloj
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, router, transaction
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from .models import Cliente, Trabajador, Habitacion, Reserva
+from .models import normalizar_texto, Cliente, Trabajador, Habitacion, Reserva, Ocupacion, HabitacionNoDisponible, ReservaDesactualizada, ResumenDiario, CheckIn, CheckOut, PlanTarifa, TarifaDiaria, RegistroCambio, ReservaArchivada, CheckInArchivado, CheckOutArchivado
 from django.db.utils import IntegrityError
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.urls import reverse
+from . import cache as cache_hostal
+from . import archivo
+from . import calendario
+from . import checkin
+from . import exportacion
+from . import reportes
+from . import tarifas
+from .forms import ReservaForm
+from .importacion import importar_reservas, leer_filas
+from .disponibilidad import habitacion_disponible, habitaciones_disponibles
+from .paginacion import paginar
+from .siembra import sembrar
+from sistemaHostal import instrumentacion
+from sistemaHostal.db import replicas
+from sistemaHostal.db.pool import PoolConexiones
 
 class ReservaIntegradaTest(TestCase):
 
@@ -203,3 +239,1606 @@ class ReservaIntegradaTest(TestCase):
         # Verificar que el trabajador está asociado correctamente a la reserva
         self.assertEqual(reserva.trabajador.nombre, 'Luis')
         self.assertEqual(reserva.trabajador.rut, '22334455-6')
+
+
+class HomePaginadaTest(TestCase):
+    """
+    Pruebas de la vista principal paginada por cursor.
+    """
+
+    def setUp(self):
+        self.trabajador = Trabajador.objects.create(rut='22334455-6', nombre='Luis', apellido='Martínez')
+        session = self.client.session
+        session['trabajador_id'] = self.trabajador.id
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+
+    def crear_reservas(self, cantidad, inicio=0):
+        for i in range(inicio, inicio + cantidad):
+            cliente = Cliente.objects.create(
+                rut=f'{10000000 + i}-1', nombre='Ana', apellido='Soto',
+                correo=f'ana{i}@example.com', telefono='+56912345678'
+            )
+            habitacion = Habitacion.objects.create(numero_habitacion=f'H{i}', precio=1000, estado='disponible')
+            Reserva.objects.create(
+                habitacion=habitacion, cliente=cliente, noches=2,
+                fecha_ingreso=timezone.now() + timedelta(days=i + 1)
+            )
+
+    # 1. La cantidad de consultas no depende del número de reservas
+    def test_consultas_constantes(self):
+        self.crear_reservas(2)
+        with self.assertNumQueries(1):  # Solo la página de reservas: sesión en caché y trabajador en la sesión
+            respuesta = self.client.get(reverse('home'))
+        self.assertContains(respuesta, '$2000.00')
+
+        self.crear_reservas(8, inicio=2)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('home'))
+
+    # 2. Recorrer todas las páginas con el cursor devuelve cada reserva una sola vez
+    def test_recorrido_por_cursor(self):
+        self.crear_reservas(5)
+        vistos = []
+        cursor = None
+        while True:
+            pagina = paginar(Reserva.objects.con_detalle(), ['fecha_ingreso', 'id'], cursor, tamano=2)
+            vistos.extend(r.id for r in pagina)
+            cursor = pagina.siguiente
+            if not cursor:
+                break
+        esperados = list(Reserva.objects.order_by('fecha_ingreso', 'id').values_list('id', flat=True))
+        self.assertEqual(vistos, esperados)
+
+    # 3. Filtro por estado
+    def test_filtro_estado(self):
+        self.crear_reservas(3)
+        Reserva.objects.filter(id=Reserva.objects.first().id).update(estado='pagada')
+        respuesta = self.client.get(reverse('home'), {'estado': 'pagada'})
+        self.assertEqual(len(respuesta.context['reservas']), 1)
+
+
+class DisponibilidadTest(TestCase):
+    """
+    Pruebas del motor de disponibilidad por rango de fechas.
+    """
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.h1 = Habitacion.objects.create(numero_habitacion='201', precio=1000)
+        self.h2 = Habitacion.objects.create(numero_habitacion='202', precio=1000)
+        self.h3 = Habitacion.objects.create(numero_habitacion='203', precio=1000, estado='mantenimiento')
+        # La habitación 201 queda reservada del día +30 al +33
+        self.reserva = Reserva.objects.create(
+            habitacion=self.h1, noches=3,
+            fecha_ingreso=timezone.make_aware(datetime.combine(self.hoy + timedelta(days=30), time.min))
+        )
+
+    # 1. Una reserva del próximo mes no bloquea la noche de hoy
+    def test_reserva_futura_no_bloquea_hoy(self):
+        libres = habitaciones_disponibles(self.hoy, self.hoy + timedelta(days=1))
+        self.assertEqual(list(libres), [self.h1, self.h2])
+
+    # 2. Los rangos que se cruzan con la reserva excluyen la habitación, en una sola consulta
+    def test_rango_solapado(self):
+        with self.assertNumQueries(1):
+            libres = list(habitaciones_disponibles(self.hoy + timedelta(days=32), self.hoy + timedelta(days=35)))
+        self.assertEqual(libres, [self.h2])
+        # El día de salida ya está libre
+        self.assertTrue(habitacion_disponible(self.h1, self.hoy + timedelta(days=33), self.hoy + timedelta(days=34)))
+
+    # 3. Las reservas canceladas liberan el intervalo
+    def test_cancelada_libera(self):
+        self.reserva.estado = 'cancelada'
+        self.reserva.save()
+        self.assertTrue(habitacion_disponible(self.h1, self.hoy + timedelta(days=30), self.hoy + timedelta(days=31)))
+
+    # 4. No se puede validar una reserva que se cruza con otra
+    def test_clean_rechaza_solapamiento(self):
+        reserva = Reserva(
+            habitacion=self.h1, noches=2,
+            fecha_ingreso=self.reserva.fecha_ingreso + timedelta(days=1)
+        )
+        with self.assertRaises(ValidationError):
+            reserva.full_clean()
+
+    # 5. Con hora de ingreso, la disponibilidad, la validación y el guardado cuentan las mismas noches
+    def test_ingreso_con_hora(self):
+        ingreso = timezone.make_aware(datetime.combine(self.hoy + timedelta(days=10), time(15)))
+        Reserva.objects.create(habitacion=self.h2, noches=1, fecha_ingreso=ingreso)
+        siguiente = self.hoy + timedelta(days=11)
+        self.assertTrue(habitacion_disponible(self.h2, siguiente, siguiente + timedelta(days=1)))
+        self.assertIn(self.h2, habitaciones_disponibles(siguiente, siguiente + timedelta(days=1)))
+        self.assertFalse(habitacion_disponible(self.h2, ingreso, ingreso + timedelta(days=1)))
+
+        otra = Reserva(habitacion=self.h2, noches=1, fecha_ingreso=ingreso + timedelta(days=1))
+        otra.full_clean()
+        otra.save()
+        self.assertEqual(sorted(Ocupacion.objects.filter(habitacion=self.h2).values_list('fecha', flat=True)),
+                         [self.hoy + timedelta(days=10), siguiente])
+        with self.assertRaises(ValidationError):
+            Reserva(habitacion=self.h2, noches=1, fecha_ingreso=ingreso + timedelta(hours=2)).full_clean()
+
+
+class ReservaConcurrenteTest(TestCase):
+    """
+    Pruebas de la protección contra reservas duplicadas.
+    """
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='301', precio=1000)
+        self.fecha = timezone.now() + timedelta(days=5)
+        self.reserva = Reserva.objects.create(habitacion=self.habitacion, noches=3, fecha_ingreso=self.fecha)
+
+    # 1. La restricción de la base de datos rechaza noches ya ocupadas, sin pasar por clean()
+    def test_restriccion_rechaza_solapamiento(self):
+        with self.assertRaises(HabitacionNoDisponible):
+            Reserva.objects.create(habitacion=self.habitacion, noches=2, fecha_ingreso=self.fecha + timedelta(days=2))
+        self.assertEqual(Reserva.objects.filter(habitacion=self.habitacion).count(), 1)
+        self.assertEqual(Ocupacion.objects.filter(habitacion=self.habitacion).count(), 3)
+
+    # 2. Cancelar libera las noches y cambiar las fechas las reubica
+    def test_cancelar_y_mover(self):
+        self.reserva.fecha_ingreso = self.fecha + timedelta(days=10)
+        self.reserva.save()
+        self.assertEqual(
+            set(Ocupacion.objects.values_list('fecha', flat=True)), set(self.reserva.noches_ocupadas()))
+        self.reserva.estado = 'cancelada'
+        self.reserva.save()
+        self.assertFalse(Ocupacion.objects.exists())
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ReservaConcurrenteCargaTest(TransactionTestCase):
+    """
+    Prueba de carga: intentos paralelos sobre una habitación producen una sola reserva.
+    """
+
+    def test_intentos_paralelos(self):
+        from gestion.management.commands.prueba_concurrencia import intentar_reserva
+
+        habitacion = Habitacion.objects.create(numero_habitacion='302', precio=1000)
+        fecha = timezone.now() + timedelta(days=1)
+        with ThreadPoolExecutor(max_workers=8) as ejecutor:
+            resultados = list(ejecutor.map(lambda _: intentar_reserva(habitacion.id, fecha, 2), range(20)))
+        self.assertEqual([r for r, _ in resultados].count('exito'), 1)
+        self.assertEqual(Reserva.objects.filter(habitacion=habitacion).count(), 1)
+
+
+class PruebaConcurrenciaComandoTest(TestCase):
+    """
+    Pruebas de la protección del comando prueba_concurrencia contra bases que no son locales.
+    """
+
+    # 1. Sin --confirmar no escribe en una base que no es local ni de pruebas
+    def test_exige_confirmacion(self):
+        from gestion.management.commands import prueba_concurrencia
+
+        self.assertTrue(prueba_concurrencia.base_local())
+        with mock.patch.object(prueba_concurrencia, 'base_local', return_value=False):
+            with self.assertRaisesMessage(CommandError, '--confirmar'):
+                call_command('prueba_concurrencia', stdout=io.StringIO())
+        self.assertFalse(Habitacion.objects.exists())
+
+
+class ImportacionReservasTest(TestCase):
+    """
+    Pruebas de la importación masiva de reservas de otras plataformas.
+    """
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='401', precio=1000)
+        Habitacion.objects.create(numero_habitacion='402', precio=2000)
+        self.cliente = Cliente.objects.create(
+            rut='11111111-1', nombre='Ana', apellido='Soto', correo='ana@example.com', telefono='+56912345678')
+        self.fecha = (timezone.localdate() + timedelta(days=10)).isoformat()
+
+    def csv(self, *filas):
+        encabezado = 'referencia_externa,habitacion,rut,correo,fecha_ingreso,noches,estado,precio_final\n'
+        return io.StringIO(encabezado + '\n'.join(filas) + '\n')
+
+    # 1. Importa las filas válidas y reporta las inválidas sin abortar el lote
+    def test_importar_csv(self):
+        archivo = self.csv(
+            f'A1,401,11111111-1,,{self.fecha},2,pagada,',
+            f'A2,999,,,{self.fecha},1,,',                       # habitación inexistente
+            f'A3,401,,,{self.fecha},1,,',                       # se cruza con A1
+            f'A4,402,,ANA@example.com,{self.fecha},3,,5000',    # cliente por correo
+            f'A1,402,,,{self.fecha},1,,',                       # referencia repetida
+        )
+        resultado = importar_reservas(leer_filas(archivo, 'csv'), tamano_lote=2)
+        self.assertEqual(resultado.filas, 5)
+        self.assertEqual(resultado.creadas, 2)
+        self.assertEqual([fila for fila, _ in resultado.errores], [3, 4, 6])
+
+        a1 = Reserva.objects.get(referencia_externa='A1')
+        self.assertEqual((a1.cliente, a1.origen, a1.precio_final), (self.cliente, 'otra_plataforma', 2000))
+        self.assertEqual(Reserva.objects.get(referencia_externa='A4').cliente, self.cliente)
+        self.assertEqual(Ocupacion.objects.count(), 5)
+        self.habitacion.refresh_from_db()
+        self.assertEqual(self.habitacion.estado, 'reservada')
+
+    # 2. El endpoint acepta JSON Lines y devuelve el resumen
+    def test_endpoint_jsonl(self):
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session.save()
+        contenido = (
+            json.dumps({'referencia_externa': 'B1', 'habitacion': '401', 'fecha_ingreso': self.fecha, 'noches': 1})
+            + '\nno es json\n'
+        ).encode()
+        archivo = SimpleUploadedFile('reservas.jsonl', contenido)
+        respuesta = self.client.post(reverse('importar_reservas'), {'archivo': archivo})
+        datos = respuesta.json()
+        self.assertEqual((datos['creadas'], datos['con_error']), (1, 1))
+
+    # 3. Las noches fuera de rango y las salidas imposibles son errores de la fila
+    def test_noches_fuera_de_rango(self):
+        archivo = self.csv(
+            f'C1,401,,,{self.fecha},9999999999,,',
+            f'C2,401,,,{self.fecha},366,,',
+            'C3,401,,,9999-12-31,1,,',
+            f'C4,402,,,{self.fecha},365,,',
+        )
+        resultado = importar_reservas(leer_filas(archivo, 'csv'))
+        self.assertEqual(resultado.creadas, 1)
+        self.assertEqual([fila for fila, _ in resultado.errores], [2, 3, 4])
+        self.assertTrue(Reserva.objects.filter(referencia_externa='C4').exists())
+
+    # 4. El formulario de importación de la página principal exige el token CSRF
+    def test_formulario_con_csrf(self):
+        cliente = Client(enforce_csrf_checks=True)
+        session = cliente.session
+        session['trabajador_id'] = 1
+        session.save()
+        pagina = cliente.get(reverse('home'))
+        self.assertContains(pagina, 'name="csrfmiddlewaretoken"')
+        archivo = SimpleUploadedFile('reservas.csv', self.csv(f'D1,401,,,{self.fecha},1,,').getvalue().encode())
+        self.assertEqual(cliente.post(reverse('importar_reservas'), {'archivo': archivo}).status_code, 403)
+        archivo.seek(0)
+        token = pagina.context['csrf_token']
+        respuesta = cliente.post(reverse('importar_reservas'), {'archivo': archivo, 'csrfmiddlewaretoken': token})
+        self.assertEqual(respuesta.json()['creadas'], 1)
+
+
+class TransicionEstadoTest(TestCase):
+    """
+    Pruebas del rastreo de cambios de Reserva y de las transiciones de estado en lote.
+    """
+
+    def setUp(self):
+        self.fecha = timezone.now() + timedelta(days=3)
+
+    def crear_reservas(self, cantidad):
+        reservas = []
+        for i in range(cantidad):
+            habitacion = Habitacion.objects.create(numero_habitacion=f'5{i:02d}', precio=1000)
+            reservas.append(Reserva.objects.create(habitacion=habitacion, noches=2, fecha_ingreso=self.fecha))
+        return reservas
+
+    # 1. Actualizar una reserva cargada no vuelve a leerla
+    def test_actualizar_sin_releer(self):
+        reserva = Reserva.objects.get(pk=self.crear_reservas(1)[0].pk)
+        reserva.estado = 'pagada'
+        with self.assertNumQueries(2):  # UPDATE más el registro de cambios para los canales
+            reserva.save()
+
+        reserva.estado = 'cancelada'
+        with CaptureQueriesContext(connection) as consultas:
+            reserva.save()
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT') and f"FROM {connection.ops.quote_name('gestion_reserva')}" in q['sql']
+            for q in consultas))
+        reserva.habitacion.refresh_from_db()
+        self.assertEqual(reserva.habitacion.estado, 'disponible')
+        self.assertFalse(Ocupacion.objects.filter(reserva=reserva).exists())
+
+    # 2. La transición en lote usa un número constante de consultas
+    def test_transicion_consultas_constantes(self):
+        pocas = [r.pk for r in self.crear_reservas(2)]
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(Reserva.objects.transition(pocas, 'cancelada'), 2)
+        Reserva.objects.all().delete()
+        Habitacion.objects.all().delete()
+
+        muchas = [r.pk for r in self.crear_reservas(8)]
+        with self.assertNumQueries(len(consultas)):
+            self.assertEqual(Reserva.objects.transition(muchas, 'cancelada'), 8)
+        self.assertFalse(Ocupacion.objects.exists())
+        self.assertFalse(Habitacion.objects.exclude(estado='disponible').exists())
+
+    # 3. Reactivar una reserva cancelada vuelve a ocupar sus noches
+    def test_reactivar(self):
+        reserva = self.crear_reservas(1)[0]
+        Reserva.objects.transition([reserva.pk], 'cancelada')
+        Reserva.objects.transition([reserva.pk], 'pagada')
+        self.assertEqual(Ocupacion.objects.filter(reserva=reserva).count(), 2)
+        self.assertEqual(Habitacion.objects.get(pk=reserva.habitacion_id).estado, 'reservada')
+
+    # 4. Dos ediciones de la misma reserva no se sobrescriben en silencio
+    def test_edicion_concurrente(self):
+        pk = self.crear_reservas(1)[0].pk
+        primera, segunda = Reserva.objects.get(pk=pk), Reserva.objects.get(pk=pk)
+        primera.precio_final = Decimal('1500')
+        primera.save()
+        segunda.estado = 'pagada'
+        with self.assertRaises(ReservaDesactualizada), transaction.atomic():
+            segunda.save()
+        self.assertEqual(Reserva.objects.values_list('estado', 'precio_final').get(pk=pk), ('pendiente', 1500))
+        Reserva.objects.transition([pk], 'pagada')  # También las transiciones en lote cambian la versión
+        with self.assertRaises(ReservaDesactualizada), transaction.atomic():
+            primera.save()
+
+        # Desde el formulario, la versión es la que se mostró al abrirlo
+        sesion = self.client.session
+        sesion['trabajador_id'] = 1
+        sesion.save()
+        reserva = Reserva.objects.get(pk=pk)
+        datos = {'habitacion': reserva.habitacion_id, 'origen': 'manual', 'estado': 'cancelada',
+                 'fecha_ingreso': reserva.fecha_ingreso.date().isoformat(), 'noches': 2,
+                 'version': reserva.version - 1}
+        respuesta = self.client.post(reverse('editar_reserva', args=[pk]), datos)
+        self.assertRedirects(respuesta, reverse('editar_reserva', args=[pk]))
+        self.assertEqual(Reserva.objects.get(pk=pk).estado, 'pagada')
+        datos['version'] = reserva.version
+        self.assertRedirects(self.client.post(reverse('editar_reserva', args=[pk]), datos), reverse('home'))
+        self.assertEqual(Reserva.objects.get(pk=pk).estado, 'cancelada')
+
+
+class DirectorioClientesTest(TestCase):
+    """
+    Pruebas de la búsqueda y paginación del directorio de clientes.
+    """
+
+    def setUp(self):
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        self.jose = Cliente.objects.create(
+            rut='12345678-5', nombre='José', apellido='Pérez', correo='jose@example.com', telefono='+56912345678')
+        self.maria = Cliente.objects.create(
+            rut='9876543-K', nombre='María José', apellido='Núñez', correo='mnunez@example.com', telefono='+56912345678')
+
+    # 1. La búsqueda ignora tildes, mayúsculas y el formato del RUT
+    def test_buscar(self):
+        self.assertEqual(list(Cliente.objects.buscar('perez')), [self.jose])
+        self.assertEqual(list(Cliente.objects.buscar('NUÑ')), [self.maria])
+        self.assertEqual(list(Cliente.objects.buscar('12.345')), [self.jose])
+        self.assertEqual(list(Cliente.objects.buscar('9876543-k')), [self.maria])
+        self.assertEqual(list(Cliente.objects.buscar('mnunez@')), [self.maria])
+        self.assertEqual(list(Cliente.objects.buscar('maria nu')), [self.maria])
+        self.assertEqual(list(Cliente.objects.buscar('jose')), [self.jose])
+
+    # 2. El endpoint JSON respeta el tope de resultados
+    def test_endpoint_json(self):
+        for i in range(30):
+            Cliente.objects.create(
+                rut=f'{20000000 + i}-1', nombre='Pedro', apellido='Rojas',
+                correo=f'pedro{i}@example.com', telefono='+56912345678')
+        datos = self.client.get(reverse('buscar_clientes'), {'q': 'rojas', 'limite': 100}).json()
+        self.assertEqual(len(datos['resultados']), 20)
+        self.assertEqual(datos['resultados'][0]['texto'], 'Pedro Rojas (20000000-1)')
+
+    # 3. El directorio pagina y conserva la búsqueda
+    def test_tabla_paginada(self):
+        respuesta = self.client.get(reverse('tabla_clientes'), {'q': 'p'})
+        self.assertEqual(list(respuesta.context['clientes']), [self.jose])
+        self.assertContains(respuesta, 'value="p"')
+
+
+class AutocompletarReservaTest(TestCase):
+    """
+    Pruebas de los campos con autocompletado de ReservaForm.
+    """
+
+    def setUp(self):
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session.save()
+        self.habitacion = Habitacion.objects.create(numero_habitacion='601', precio=1000)
+        self.cliente = Cliente.objects.create(
+            rut='12345678-5', nombre='José', apellido='Pérez', correo='jose@example.com', telefono='+56912345678')
+
+    def crear_clientes(self, cantidad):
+        Cliente.objects.bulk_create(
+            Cliente(rut=f'{30000000 + i}-1', nombre='Ana', apellido='Soto',
+                    correo=f'a{i}@example.com', telefono='+56912345678')
+            for i in range(cantidad))
+
+    # 1. Renderizar el formulario no depende de la cantidad de clientes
+    def test_render_sin_opciones(self):
+        reserva = Reserva.objects.create(
+            habitacion=self.habitacion, cliente=self.cliente, noches=1,
+            fecha_ingreso=timezone.now() + timedelta(days=1))
+        url = reverse('editar_reserva', args=[reserva.pk])
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(url)
+        self.crear_clientes(50)
+        with self.assertNumQueries(len(consultas)):
+            respuesta = self.client.get(url)
+        self.assertNotContains(respuesta, '<option value="%s"' % self.cliente.pk)
+        self.assertContains(respuesta, 'José Pérez (12345678-5)')
+        self.assertContains(respuesta, 'gestion/autocompletar.js')
+
+    # 2. El formulario valida solo la clave primaria elegida
+    def test_validacion_por_pk(self):
+        datos = {
+            'habitacion': self.habitacion.pk, 'cliente': self.cliente.pk, 'origen': 'manual',
+            'estado': 'pendiente', 'fecha_ingreso': timezone.localdate() + timedelta(days=2), 'noches': 1,
+        }
+        self.assertTrue(ReservaForm(datos).is_valid())
+        datos['cliente'] = 999999
+        self.assertIn('cliente', ReservaForm(datos).errors)
+
+    # 3. La búsqueda de habitaciones filtra por número y disponibilidad
+    def test_buscar_habitaciones(self):
+        Habitacion.objects.create(numero_habitacion='602', precio=1000)
+        fecha = timezone.localdate() + timedelta(days=1)
+        Reserva.objects.create(
+            habitacion=self.habitacion, noches=1,
+            fecha_ingreso=timezone.make_aware(datetime.combine(fecha, time.min)))
+        url = reverse('buscar_habitaciones')
+        self.assertEqual(len(self.client.get(url, {'q': '60'}).json()['resultados']), 2)
+        libres = self.client.get(url, {'q': '60', 'desde': fecha, 'hasta': fecha + timedelta(days=1)}).json()
+        self.assertEqual([h['numero_habitacion'] for h in libres['resultados']], ['602'])
+
+
+class CacheCatalogoTest(TestCase):
+    """
+    Pruebas de la caché del catálogo de habitaciones y de la ocupación diaria.
+    """
+
+    def setUp(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        self.habitacion = Habitacion.objects.create(numero_habitacion='701', precio=1000)
+
+    # 1. La tabla de habitaciones no consulta la base de datos con la caché llena
+    def test_tabla_habitaciones_desde_cache(self):
+        self.client.get(reverse('tabla_habitaciones'))
+        with self.assertNumQueries(0):  # Catálogo y sesión (cached_db) desde la caché
+            respuesta = self.client.get(reverse('tabla_habitaciones'))
+        self.assertContains(respuesta, '701')
+
+        # Guardar una habitación invalida el catálogo
+        self.habitacion.precio = 2500
+        self.habitacion.save()
+        self.assertContains(self.client.get(reverse('tabla_habitaciones')), '2500')
+
+    # 2. La ocupación diaria se invalida al crear o cancelar reservas
+    def test_ocupacion_invalidada(self):
+        fecha = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(cache_hostal.habitaciones_libres(fecha), [self.habitacion])
+        reserva = Reserva.objects.create(
+            habitacion=self.habitacion, noches=1,
+            fecha_ingreso=timezone.make_aware(datetime.combine(fecha, time.min)))
+        self.assertEqual(cache_hostal.ocupacion_del_dia(fecha), {self.habitacion.id: reserva.id})
+        Reserva.objects.transition([reserva.id], 'cancelada')
+        self.assertEqual(cache_hostal.ocupacion_del_dia(fecha), {})
+
+    # 3. Los contadores registran aciertos y fallos
+    def test_estadisticas(self):
+        antes = cache_hostal.estadisticas()['catalogo']
+        cache_hostal.catalogo_habitaciones()
+        cache_hostal.catalogo_habitaciones()
+        datos = self.client.get(reverse('estadisticas_cache')).json()['catalogo']
+        self.assertEqual(datos['fallos'] - antes['fallos'], 1)
+        self.assertEqual(datos['aciertos'] - antes['aciertos'], 1)
+
+
+class ReportesTest(TestCase):
+    """
+    Pruebas de los resúmenes diarios y del reporte de ocupación e ingresos.
+    """
+
+    def setUp(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        self.h1 = Habitacion.objects.create(numero_habitacion='801', precio=1000)
+        self.h2 = Habitacion.objects.create(numero_habitacion='802', precio=2000)
+        self.dia = timezone.localdate() + timedelta(days=7)
+
+    def reservar(self, habitacion, noches, origen='manual', precio_final=None, dias=0):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reserva.objects.create(
+                habitacion=habitacion, noches=noches, origen=origen, precio_final=precio_final,
+                fecha_ingreso=timezone.make_aware(datetime.combine(self.dia + timedelta(days=dias), time.min)))
+
+    def resumen(self, dias, origen='manual'):
+        return ResumenDiario.objects.get(fecha=self.dia + timedelta(days=dias), origen=origen)
+
+    # 1. Los resúmenes se mantienen al crear, mover y cancelar reservas
+    def test_resumen_incremental(self):
+        reserva = self.reservar(self.h1, 2, precio_final=3000)
+        self.reservar(self.h2, 1, origen='otra_plataforma')
+        self.assertEqual((self.resumen(0).noches_vendidas, self.resumen(0).ingresos), (1, 1500))
+        self.assertEqual(self.resumen(0, 'otra_plataforma').ingresos, 2000)
+
+        reserva.fecha_ingreso += timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.save()
+        self.assertFalse(ResumenDiario.objects.filter(fecha=self.dia, origen='manual').exists())
+        self.assertEqual(self.resumen(2).noches_vendidas, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.transition([reserva.pk], 'cancelada')
+        self.assertEqual(self.resumen(1).noches_vendidas, 0)
+        self.assertEqual(self.resumen(1).cancelaciones, 1)
+        self.assertFalse(ResumenDiario.objects.filter(fecha=self.dia + timedelta(days=2)).exists())
+
+    # 2. El reporte lee solo los resúmenes
+    def test_reporte_y_csv(self):
+        self.reservar(self.h1, 3)
+        url = reverse('reporte_ocupacion')
+        parametros = {'desde': self.dia, 'hasta': self.dia + timedelta(days=5)}
+        self.client.get(url, parametros)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, parametros)
+        self.assertFalse(any(connection.ops.quote_name('gestion_reserva') in q['sql'] for q in consultas))
+        self.assertEqual([d['ocupacion'] for d in respuesta.context['dias']], [50, 50, 50])
+
+        csv_texto = self.client.get(reverse('exportar_reporte_csv'), parametros).content.decode()
+        self.assertEqual(csv_texto.splitlines()[1], f'{self.dia.isoformat()},manual,1,1000.00,0')
+
+    # 3. Un choque con otro recálculo se reintenta y un error persistente no llega a la solicitud
+    def test_recalculo_no_falla_la_reserva(self):
+        recalcular, intentos = reportes.actualizar_resumen, []
+
+        def falla_una_vez(fechas):
+            intentos.append(fechas)
+            if len(intentos) == 1:
+                raise IntegrityError
+            recalcular(fechas)
+
+        with mock.patch.object(reportes, 'actualizar_resumen', falla_una_vez):
+            self.reservar(self.h1, 2)
+        self.assertEqual(len(intentos), 2)
+        self.assertEqual(self.resumen(1).noches_vendidas, 1)
+
+        def falla(fechas):
+            raise IntegrityError
+
+        with mock.patch.object(reportes, 'actualizar_resumen', falla), self.assertLogs('gestion.signals', 'ERROR'):
+            self.reservar(self.h2, 1)
+        self.assertTrue(Reserva.objects.filter(habitacion=self.h2).exists())
+
+        # Recalcular fechas con resúmenes existentes los actualiza en su lugar
+        reportes.actualizar_resumen([self.dia, self.dia + timedelta(days=1)])
+        reportes.actualizar_resumen([self.dia + timedelta(days=1), self.dia + timedelta(days=2)])
+        self.assertEqual(self.resumen(0).noches_vendidas, 2)
+        self.assertEqual(ResumenDiario.objects.filter(fecha__gte=self.dia).count(), 2)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ReportesConcurrentesTest(TransactionTestCase):
+    """
+    Prueba de carga: reservas simultáneas con noches en común mantienen los resúmenes sin errores.
+    """
+
+    def test_actualizaciones_solapadas(self):
+        habitaciones = [Habitacion.objects.create(numero_habitacion=f'85{i}', precio=1000) for i in range(8)]
+        ingreso = timezone.now() + timedelta(days=3)
+
+        def reservar(indice):
+            try:
+                Reserva.objects.create(habitacion=habitaciones[indice], noches=2 + indice % 2,
+                                       fecha_ingreso=ingreso + timedelta(days=indice % 2))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as ejecutor:
+            list(ejecutor.map(reservar, range(8)))
+        primera = timezone.localtime(ingreso).date()
+        self.assertEqual(ResumenDiario.objects.get(fecha=primera + timedelta(days=1)).noches_vendidas, 8)
+
+
+
+class CalendarioTest(TestCase):
+    """
+    Pruebas de la matriz de ocupación que alimenta la grilla del calendario.
+    """
+
+    def setUp(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        self.desde = timezone.localdate() + timedelta(days=5)
+        self.h1 = Habitacion.objects.create(numero_habitacion='101', precio=1000)
+        self.h2 = Habitacion.objects.create(numero_habitacion='102', precio=1000)
+
+    def ingreso(self, dias):
+        return timezone.make_aware(datetime.combine(self.desde + timedelta(days=dias), time(15)))
+
+    # 1. Los bits y las reservas se recortan a los bordes de la ventana
+    def test_mapa_de_bits(self):
+        cliente = Cliente.objects.create(rut='11111111-1', nombre='Ana', apellido='Soto', correo='ana@example.com',
+                                         telefono='+56911111111', fecha_registro=now())
+        Reserva.objects.create(habitacion=self.h1, cliente=cliente, noches=3, fecha_ingreso=self.ingreso(-1))
+        Reserva.objects.create(habitacion=self.h1, noches=5, fecha_ingreso=self.ingreso(8))
+        Reserva.objects.create(habitacion=self.h2, noches=1, fecha_ingreso=self.ingreso(4), estado='cancelada')
+        matriz = calendario.matriz_ocupacion(self.desde, 10)
+        self.assertEqual([h['ocupadas'] for h in matriz['habitaciones']], [format(0b1100000011, 'x'), '0'])
+        self.assertEqual([(r['inicio'], r['noches']) for r in matriz['reservas']], [(0, 2), (8, 2)])
+        self.assertEqual(matriz['reservas'][0]['cliente'], 'Ana Soto')
+        self.assertEqual(matriz['ocupadas_por_dia'], [1, 1, 0, 0, 0, 0, 0, 0, 1, 1])
+
+    # 2. 200 habitaciones por 90 días se resuelven con una consulta y bien por debajo de un segundo
+    def test_consulta_unica(self):
+        Habitacion.objects.bulk_create(
+            Habitacion(numero_habitacion=f'{i:03d}', precio=1000) for i in range(200, 400))
+        habitaciones = list(Habitacion.objects.all())
+        reservas = []
+        for habitacion in habitaciones:
+            for inicio in range(-2, 90, 4):
+                ingreso = self.ingreso(inicio)
+                reservas.append(Reserva(habitacion=habitacion, noches=3, fecha_ingreso=ingreso,
+                                        fecha_salida=ingreso + timedelta(days=3)))
+        Reserva.objects.bulk_create(reservas, batch_size=1000)
+        Ocupacion.objects.bulk_create(  # Como el importador, que escribe las noches junto con las reservas
+            [ocupacion for reserva in Reserva.objects.all() for ocupacion in Ocupacion.para_reserva(reserva)],
+            batch_size=1000)
+        cache_hostal.catalogo_habitaciones()
+
+        url = reverse('calendario_datos')
+        inicio = timezone.now()
+        with self.assertNumQueries(1):
+            datos = self.client.get(url, {'desde': self.desde, 'dias': 90}).json()
+        self.assertLess((timezone.now() - inicio).total_seconds(), 1)
+        self.assertEqual(len(datos['habitaciones']), 202)
+        self.assertEqual(datos['ocupadas_por_dia'][:4], [202, 0, 202, 202])
+
+    # 3. La página carga la grilla y los parámetros se acotan
+    def test_pagina_y_limites(self):
+        respuesta = self.client.get(reverse('calendario'), {'dias': 1000})
+        self.assertContains(respuesta, 'gestion/calendario.js')
+        self.assertEqual(respuesta.context['dias'], calendario.MAX_DIAS)
+        self.assertEqual(self.client.get(reverse('calendario_datos'), {'dias': 'x'}).json()['dias'],
+                         calendario.DIAS_POR_DEFECTO)
+
+
+
+class PresupuestoVistasTest(TestCase):
+    """
+    Pruebas del presupuesto de consultas de las vistas (ver benchmarks/vistas.json).
+    """
+
+    def setUp(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        Trabajador.objects.create(rut='11111111-1', nombre='Luis', apellido='Martínez')
+
+    def consultas(self, rutas):
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        resultado = {}
+        for vista, ruta in rutas.items():
+            self.client.get(ruta)  # Calentamiento, como en el comando
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.get(ruta).status_code, 200)
+            resultado[vista] = len(capturadas)
+        return resultado
+
+    # 1. Cada vista respeta el presupuesto de consultas de la línea base sin importar el volumen
+    def test_consultas_dentro_del_presupuesto(self):
+        from .management.commands.benchmark_vistas import LINEA_BASE, rutas_vistas
+        presupuesto = {vista: base['consultas'] for vista, base in json.loads(LINEA_BASE.read_text())['vistas'].items()}
+        sembrar(habitaciones=5, clientes=10, reservas=20)
+        pocas = self.consultas(rutas_vistas())
+        Reserva.objects.all().delete()
+        Cliente.objects.all().delete()
+        Habitacion.objects.all().delete()
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        sembrar(habitaciones=40, clientes=200, reservas=400, semilla=1)
+        muchas = self.consultas(rutas_vistas())
+        self.assertEqual(muchas, pocas)
+        for vista, cantidad in muchas.items():
+            self.assertLessEqual(cantidad, presupuesto[vista], vista)
+
+    # 2. El comando falla si una vista supera su presupuesto
+    def test_comando_falla_fuera_de_presupuesto(self):
+        from django.core.management.base import CommandError
+        with tempfile.TemporaryDirectory() as carpeta:
+            archivo = os.path.join(carpeta, 'vistas.json')
+            opciones = {'solicitudes': 1, 'linea_base': archivo, 'host': 'testserver', 'stdout': io.StringIO()}
+            call_command('benchmark_vistas', sembrar=True, habitaciones=2, clientes=2, reservas=4, guardar=True, **opciones)
+            call_command('benchmark_vistas', tolerancia=1000, **opciones)
+
+            linea_base = json.load(open(archivo))
+            linea_base['vistas']['editar_reserva']['consultas'] = 0
+            json.dump(linea_base, open(archivo, 'w'))
+            with self.assertRaisesMessage(CommandError, 'editar_reserva'):
+                call_command('benchmark_vistas', tolerancia=1000, **opciones)
+
+
+
+class SiembraTest(TestCase):
+    """
+    Pruebas del generador de datos sintéticos (ver gestion/siembra.py).
+    """
+
+    def indices(self):
+        with connection.cursor() as cursor:
+            return sorted(
+                nombre for modelo in (Cliente, Reserva, Ocupacion, CheckIn, CheckOut, RegistroCambio)
+                for nombre, datos in connection.introspection.get_constraints(cursor, modelo._meta.db_table).items()
+                if datos['index'] or datos['unique'])
+
+    def filas(self):
+        return (list(Cliente.objects.order_by('pk').values_list('rut', 'nombre', 'telefono')),
+                list(Reserva.objects.order_by('pk').values_list('habitacion_id', 'cliente_id', 'estado', 'fecha_ingreso',
+                                                                 'fecha_salida')),
+                list(CheckIn.objects.order_by('reserva_id').values_list('reserva_id', 'fecha_hora')))
+
+    # 1. La misma semilla y fecha base generan exactamente los mismos datos
+    def test_determinista(self):
+        fecha_base = timezone.localdate()
+        sembrar(habitaciones=4, clientes=20, reservas=60, trabajadores=1, semilla=7, fecha_base=fecha_base)
+        primera = self.filas()
+        Reserva.objects.all().delete()
+        Cliente.objects.all().delete()
+        Habitacion.objects.all().delete()
+        sembrar(habitaciones=4, clientes=20, reservas=60, trabajadores=1, semilla=7, fecha_base=fecha_base)
+        self.assertEqual(self.filas(), primera)
+        self.assertEqual(Trabajador.objects.count(), 1)
+
+    # 2. Los clientes son válidos y las estadías no se solapan ni pierden sus noches ocupadas
+    def test_datos_validos(self):
+        resultado = sembrar(habitaciones=3, clientes=10, reservas=45, trabajadores=1)
+        self.assertEqual(resultado.filas['Reserva'], 45)
+        self.assertEqual(Cliente.objects.get(pk=1).rut, '10000001-6')
+        for cliente in Cliente.objects.all():
+            cliente.full_clean()
+        for reserva in Reserva.objects.exclude(estado='cancelada'):
+            self.assertFalse(Reserva.objects.filter(habitacion_id=reserva.habitacion_id).exclude(pk=reserva.pk)
+                             .exclude(estado='cancelada').solapadas(reserva.fecha_ingreso, reserva.fecha_salida).exists())
+            self.assertEqual(Ocupacion.objects.filter(reserva=reserva).count(), reserva.noches)
+        self.assertFalse(CheckOut.objects.exclude(reserva__fecha_salida__lte=timezone.now()).exists())
+
+    # 3. Tras la siembra quedan los índices, las tablas derivadas y las secuencias listas para seguir creando
+    def test_base_lista_para_usar(self):
+        indices = self.indices()
+        sembrar(habitaciones=3, clientes=5, reservas=30, trabajadores=1)
+        self.assertEqual(self.indices(), indices)
+        self.assertTrue(ResumenDiario.objects.exists())
+        self.assertEqual(Reserva.objects.create(habitacion_id=1, noches=1, fecha_ingreso=now() + timedelta(days=900)).pk, 31)
+        self.assertEqual(RegistroCambio.objects.filter(modelo='reserva').count(), 31)
+        with self.assertRaises(ValueError):
+            sembrar(habitaciones=1, clientes=1, reservas=1)
+
+
+
+class InstrumentacionTest(TestCase):
+    """
+    Pruebas del middleware de instrumentación por solicitud.
+    """
+
+    def setUp(self):
+        instrumentacion.reiniciar()
+        session = self.client.session
+        session['trabajador_id'] = 1
+        session['trabajador_nombre'] = 'Luis Martínez'
+        session.save()
+        Habitacion.objects.create(numero_habitacion='101', precio=1000)
+
+    # 1. Las solicitudes medidas reciben Server-Timing y suman consultas al histograma de su ruta
+    @override_settings(INSTRUMENTACION_MUESTREO=1)
+    def test_server_timing(self):
+        respuesta = self.client.get(reverse('home'))
+        metricas = [metrica.split(';')[0] for metrica in respuesta['Server-Timing'].split(', ')]
+        self.assertEqual(metricas, ['bd', 'plantillas', 'vista', 'total'])
+        home = instrumentacion.histogramas()['rutas']['home']
+        self.assertEqual((home['solicitudes'], home['muestras']), (1, 1))
+        self.assertGreater(home['consultas_promedio'], 0)
+        self.assertGreater(home['plantillas_promedio_ms'], 0)
+
+    # 2. Las consultas repetidas se marcan y las solicitudes lentas se registran en el log
+    @override_settings(INSTRUMENTACION_MUESTREO=1, INSTRUMENTACION_LENTA_MS=0)
+    def test_repetidas_y_log(self):
+        medicion = instrumentacion.Medicion()
+        with connection.execute_wrapper(medicion):
+            for numero in ('101', '102', '103'):
+                Habitacion.objects.filter(numero_habitacion=numero).exists()
+            Cliente.objects.exists()
+        self.assertEqual([veces for _, veces in medicion.repetidas()], [3])
+        self.assertEqual(medicion.total_consultas, 4)
+        with self.assertLogs('sistemaHostal.instrumentacion', 'WARNING') as registros:
+            self.client.get(reverse('tabla_habitaciones'))
+        self.assertIn('(tabla_habitaciones) 200', registros.output[0])
+
+    # 3. Sin muestreo solo se cuenta la duración, visible en el endpoint de métricas
+    @override_settings(INSTRUMENTACION_MUESTREO=0)
+    def test_sin_muestreo(self):
+        respuesta = self.client.get(reverse('tabla_habitaciones'))
+        self.assertNotIn('Server-Timing', respuesta)
+        datos = self.client.get(reverse('metricas_solicitudes')).json()
+        ruta = datos['rutas']['tabla_habitaciones']
+        self.assertEqual((ruta['solicitudes'], ruta['muestras'], ruta['consultas_promedio']), (1, 0, None))
+        self.assertEqual(sum(ruta['conteos']), 1)
+        self.assertEqual(len(ruta['conteos']), len(datos['limites_ms']) + 1)
+
+
+class ConexionesTest(TestCase):
+
+    # 1. El pool reutiliza primero la última conexión devuelta y respeta su tamaño
+    def test_pool_conexiones(self):
+        pool = PoolConexiones(2)
+        conexiones = [object() for _ in range(3)]
+        self.assertEqual([pool.devolver(c) for c in conexiones], [True, True, False])
+        self.assertIs(pool.tomar()[0], conexiones[1])
+
+        with ThreadPoolExecutor(max_workers=8) as ejecutor:
+            tomadas = list(ejecutor.map(lambda _: pool.tomar(), range(8)))
+        self.assertEqual(len([t for t in tomadas if t is not None]), 1)
+        self.assertEqual((pool.reutilizadas, pool.descartadas, len(pool)), (2, 1, 0))
+
+    # 2. El benchmark atiende solicitudes reales por cada modo de conexión
+    def test_benchmark_conexiones(self):
+        Trabajador.objects.create(rut='33444555-6', nombre='Eva', apellido='Soto')
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('benchmark_conexiones', solicitudes=2, modos=['nueva', 'persistente'], host='testserver', stdout=salida, stderr=errores)
+        self.assertIn('nueva', salida.getvalue())
+        self.assertIn('persistente', salida.getvalue())
+        self.assertEqual(errores.getvalue(), '')
+        self.assertEqual(connection.settings_dict.get('CONN_MAX_AGE'), settings.DATABASES['default'].get('CONN_MAX_AGE'))
+
+
+class IndicesConsultaTest(TestCase):
+
+    def setUp(self):
+        self.inicio = now() + timedelta(days=1)
+        habitaciones = [Habitacion.objects.create(numero_habitacion=str(300 + i), precio=1000) for i in range(3)]
+        for i in range(12):
+            reserva = Reserva.objects.create(
+                habitacion=habitaciones[i % 3], fecha_ingreso=self.inicio + timedelta(days=i), noches=1,
+                estado='confirmada' if i % 2 else 'pendiente')
+            CheckIn.objects.create(reserva=reserva)
+            CheckOut.objects.create(reserva=reserva)
+        self.habitacion = habitaciones[0]
+        self.reserva = reserva
+
+    def assertUsaIndice(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(indice, plan, f"La consulta no usa {indice}:\n{plan}")
+
+    # 1. El listado y la disponibilidad usan los índices de Reserva
+    def test_indices_reserva(self):
+        self.assertUsaIndice(
+            Reserva.objects.filter(estado='confirmada', fecha_ingreso__gte=self.inicio).order_by('fecha_ingreso', 'id'),
+            'reserva_estado_ingreso_idx')
+        self.assertUsaIndice(
+            Reserva.objects.activas().solapadas(self.inicio, self.inicio + timedelta(days=2)).filter(habitacion=self.habitacion),
+            'reserva_hab_intervalo_idx')
+        self.assertUsaIndice(
+            Reserva.objects.filter(fecha_registro__gte=now() - timedelta(days=1)), 'reserva_fecha_registro_idx')
+
+    # 2. Los registros de entrada y salida se buscan por reserva y fecha sin recorrer la tabla
+    def test_indices_checkin_checkout(self):
+        self.assertUsaIndice(
+            CheckIn.objects.filter(reserva=self.reserva, fecha_hora__gte=self.inicio - timedelta(days=1)),
+            'checkin_reserva_fecha_idx')
+        self.assertUsaIndice(
+            CheckOut.objects.filter(reserva=self.reserva, fecha_hora__gte=self.inicio - timedelta(days=1)),
+            'checkout_reserva_fecha_idx')
+        self.assertUsaIndice(CheckIn.objects.filter(fecha_hora__gte=self.inicio), 'checkin_fecha_idx')
+
+
+class CheckInQRTest(TestCase):
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='401', precio=1000)
+        self.reserva = Reserva.objects.create(habitacion=self.habitacion, fecha_ingreso=now() + timedelta(hours=1), noches=2)
+        sesion = self.client.session
+        sesion['trabajador_id'] = 1
+        sesion['trabajador_nombre'] = 'Ana'
+        sesion.save()
+        self.url = reverse('registrar_qr')
+
+    def escanear(self, token, accion='checkin'):
+        return self.client.post(self.url, json.dumps({'token': token, 'accion': accion}), content_type='application/json')
+
+    # 1. El escaneo registra el Check-In y ocupa la habitación; repetirlo no duplica
+    def test_checkin_qr(self):
+        token = checkin.generar_token(self.reserva)
+        self.escanear(checkin.generar_token(Reserva.objects.create(
+            habitacion=Habitacion.objects.create(numero_habitacion='402', precio=1000),
+            fecha_ingreso=now() + timedelta(hours=1))))
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.escanear(token)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(len(consultas), 6)  # Reserva, insert, update y registro de cambios, más el savepoint del TestCase
+        self.assertEqual(CheckIn.objects.get(reserva=self.reserva).qr_escaneado, 'sí')
+        self.habitacion.refresh_from_db()
+        self.assertEqual(self.habitacion.estado, 'en uso')
+
+        respuesta = self.escanear(token)
+        self.assertEqual((respuesta.status_code, respuesta.json()['creado']), (200, False))
+        self.assertEqual(CheckIn.objects.filter(reserva=self.reserva).count(), 1)
+
+    # 2. La firma se verifica sin consultar la base de datos y rechaza tokens alterados
+    def test_token_invalido(self):
+        token = checkin.generar_token(self.reserva)
+        with self.assertNumQueries(0):
+            self.assertEqual(checkin.leer_token(token), self.reserva.pk)
+        otro = checkin.generar_token(self.reserva.pk + 1)
+        alterado = otro.split(':')[0] + token[token.index(':'):]
+        self.assertEqual(self.escanear(alterado).status_code, 400)
+        self.assertEqual(self.escanear(token, accion='checkout').status_code, 409)
+
+    # 3. El Check-Out libera la habitación
+    def test_checkout_qr(self):
+        token = checkin.generar_token(self.reserva)
+        self.escanear(token)
+        self.assertEqual(self.escanear(token, accion='checkout').status_code, 201)
+        self.habitacion.refresh_from_db()
+        self.assertEqual(self.habitacion.estado, 'disponible')
+        self.assertTrue(CheckOut.objects.filter(reserva=self.reserva, qr_escaneado='sí').exists())
+
+    # 4. El token que muestra la reserva es el que acepta el lector
+    def test_token_mostrado_en_la_reserva(self):
+        respuesta = self.client.get(reverse('editar_reserva', args=[self.reserva.pk]))
+        token = respuesta.context['token_qr']
+        self.assertContains(respuesta, token)
+        self.assertEqual(self.escanear(token).status_code, 201)
+        self.assertTrue(CheckIn.objects.filter(reserva=self.reserva).exists())
+
+
+class CheckInGrupalTest(TestCase):
+
+    def setUp(self):
+        self.habitaciones = [Habitacion.objects.create(numero_habitacion=str(500 + i), precio=1000) for i in range(40)]
+        self.reservas = [
+            Reserva.objects.create(habitacion=h, fecha_ingreso=now() + timedelta(hours=1), noches=1)
+            for h in self.habitaciones
+        ]
+        sesion = self.client.session
+        sesion['trabajador_id'] = 1
+        sesion['trabajador_nombre'] = 'Ana'
+        sesion.save()
+
+    # 1. Un grupo de 40 reservas se registra con un número constante de consultas
+    def test_grupo_consultas_constantes(self):
+        entradas = [r.pk for r in self.reservas[:20]] + [checkin.generar_token(r) for r in self.reservas[20:]]
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = checkin.registrar_grupo(entradas)
+        self.assertLessEqual(len(consultas), 6)  # Reservas, bulk_create, update y registro de cambios, más savepoints
+        self.assertEqual(len(resultado['registradas']), 40)
+        self.assertEqual(CheckIn.objects.count(), 40)
+        self.assertFalse(Habitacion.objects.exclude(estado='en uso').exists())
+
+    # 2. Los errores se informan por reserva sin detener al resto del grupo
+    def test_errores_por_reserva(self):
+        checkin.registrar(self.reservas[0].pk, 'checkin')
+        Reserva.objects.transition([self.reservas[1].pk], 'cancelada')
+        respuesta = self.client.post(reverse('registrar_grupo_qr'), json.dumps({
+            'reservas': [self.reservas[0].pk, self.reservas[1].pk, 'falso', 999999, self.reservas[2].pk],
+        }), content_type='application/json')
+        resultado = respuesta.json()
+        self.assertEqual(resultado['registradas'], [self.reservas[2].pk])
+        self.assertEqual(resultado['ya_registradas'], [self.reservas[0].pk])
+        self.assertEqual([e['entrada'] for e in resultado['errores']], ['falso', self.reservas[1].pk, 999999])
+
+    # 3. Con la sesión del trabajador, un POST sin token CSRF (de otro sitio) se rechaza
+    def test_exige_csrf(self):
+        navegador = Client(enforce_csrf_checks=True)
+        navegador.cookies = self.client.cookies
+        cuerpo = json.dumps({'reservas': [self.reservas[0].pk], 'accion': 'checkin'})
+        for url in (reverse('registrar_grupo_qr'), reverse('registrar_qr')):
+            self.assertEqual(navegador.post(url, cuerpo, content_type='application/json').status_code, 403)
+        self.assertFalse(CheckIn.objects.exists())
+
+        navegador.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        respuesta = navegador.post(reverse('registrar_grupo_qr'), cuerpo, content_type='application/json',
+                                   HTTP_X_CSRFTOKEN='a' * 32)
+        self.assertEqual(respuesta.json()['registradas'], [self.reservas[0].pk])
+
+
+@override_settings(TRABAJADOR_HASH_ITERACIONES=1000, LOGIN_MAX_INTENTOS=3)
+class LoginTrabajadorTest(TestCase):
+
+    def setUp(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        self.trabajador = Trabajador.objects.create(rut='11222333-4', nombre='Marta', apellido='Rojas')
+        self.trabajador.set_password('Hostal-clave-2026')
+        self.trabajador.save()
+
+    def login(self, password, rut='11222333-4'):
+        return self.client.post(reverse('login'), {'rut': rut, 'password': password})
+
+    # 1. La contraseña se guarda con hash y la sesión evita consultar al trabajador
+    def test_login_y_sesion_sin_consultas(self):
+        self.assertTrue(self.trabajador.password.startswith('pbkdf2_trabajador$1000$'))
+        self.assertRedirects(self.login('Hostal-clave-2026'), reverse('home'))
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('tabla_habitaciones'))
+        self.assertEqual(str(respuesta.context['trabajador']), 'Marta Rojas')
+        self.assertFalse(any('gestion_trabajador' in q['sql'] for q in consultas))
+        self.client.get(reverse('logout'))
+        self.assertRedirects(self.client.get(reverse('home')), reverse('login'))
+        self.assertEqual(self.client.get(reverse('buscar_clientes')).status_code, 401)
+
+    # 2. Tras varios fallos el login se bloquea sin consultar la base de datos
+    def test_limite_de_intentos(self):
+        for password in ('mala', 'otra', 'tercera'):
+            self.assertEqual(self.login(password).status_code, 200)
+        self.assertEqual(self.login('x', rut='99999999-9').status_code, 200)  # RUT inexistente, mismo mensaje
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.login('Hostal-clave-2026')
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertFalse(any('gestion_trabajador' in q['sql'] for q in consultas))
+
+    # 3. Cambiar el factor de trabajo recalcula el hash al iniciar sesión
+    def test_actualiza_factor_de_trabajo(self):
+        with self.settings(TRABAJADOR_HASH_ITERACIONES=2000):
+            self.assertRedirects(self.login('Hostal-clave-2026'), reverse('home'))
+        self.trabajador.refresh_from_db()
+        self.assertTrue(self.trabajador.password.startswith('pbkdf2_trabajador$2000$'))
+        self.assertFalse(self.trabajador.password_temporal)
+
+    # 4. La contraseña inicial obliga a cambiarla y luego se ingresa con la nueva
+    def test_cambio_de_contrasena_inicial(self):
+        trabajador = Trabajador.objects.create(rut='22333444-5', nombre='Pablo', apellido='Núñez')
+        self.assertTrue(trabajador.password_temporal)
+        self.assertRedirects(self.login('núñpab', rut='22333444-5'), reverse('cambiar_password'))
+        self.assertRedirects(self.client.get(reverse('home')), reverse('cambiar_password'))
+        self.assertEqual(self.client.get(reverse('buscar_clientes')).status_code, 403)
+
+        datos = {'actual': 'núñpab', 'nueva': 'núñpab', 'confirmacion': 'núñpab'}
+        self.assertEqual(self.client.post(reverse('cambiar_password'), datos).status_code, 200)
+        datos = {'actual': 'núñpab', 'nueva': 'Recepcion-nocturna-9', 'confirmacion': 'Recepcion-nocturna-9'}
+        self.assertRedirects(self.client.post(reverse('cambiar_password'), datos), reverse('home'))
+        self.assertEqual(self.client.get(reverse('buscar_clientes')).status_code, 200)
+
+        self.client.get(reverse('logout'))
+        self.assertEqual(self.login('núñpab', rut='22333444-5').status_code, 200)
+        self.assertRedirects(self.login('Recepcion-nocturna-9', rut='22333444-5'), reverse('home'))
+
+    # 5. El comando asigna una contraseña definitiva validada
+    def test_comando_cambiar_password(self):
+        with self.assertRaises(CommandError):
+            call_command('cambiar_password', '11222333-4', password='123', stdout=io.StringIO())
+        call_command('cambiar_password', '11222333-4', password='Turno-de-manana-7', stdout=io.StringIO())
+        self.assertRedirects(self.login('Turno-de-manana-7'), reverse('home'))
+
+
+class SesionesTest(TestCase):
+
+    def setUp(self):
+        trabajador = Trabajador(rut='44555666-7', nombre='Rosa', apellido='Vera')
+        trabajador.set_password('Hostal-clave-2026')
+        trabajador.save()
+
+    # 1. Con sesiones en cookies firmadas una página autenticada no consulta la base de datos
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies', TRABAJADOR_HASH_ITERACIONES=1000)
+    def test_sesion_en_cookie_firmada(self):
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        self.client.post(reverse('login'), {'rut': '44555666-7', 'password': 'Hostal-clave-2026'})
+        self.client.get(reverse('tabla_habitaciones'))
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(reverse('tabla_habitaciones'))
+        self.assertEqual(str(respuesta.context['trabajador']), 'Rosa Vera')
+
+    # 2. El benchmark compara los motores de sesión indicados
+    def test_benchmark_sesiones(self):
+        salida = io.StringIO()
+        call_command('benchmark_sesiones', solicitudes=3, modos=['db', 'signed_cookies'], host='testserver', stdout=salida)
+        lineas = salida.getvalue().splitlines()
+        self.assertEqual([linea.split()[0] for linea in lineas], ['db', 'signed_cookies'])
+        self.assertIn('consultas/solicitud: 1.00', lineas[0])
+        self.assertIn('consultas/solicitud: 0.00', lineas[1])
+
+
+class ExportacionTest(TestCase):
+
+    def setUp(self):
+        habitacion = Habitacion.objects.create(numero_habitacion='601', precio=1000)
+        for i in range(5):
+            cliente = Cliente.objects.create(
+                rut=f'1000000{i}-{i}', nombre='Ana', apellido=f'Díaz {i}', correo=f'ana{i}@example.com',
+                telefono='+56911111111', fecha_registro=now())
+            Reserva.objects.create(habitacion=habitacion, cliente=cliente, noches=1,
+                                   fecha_ingreso=now() + timedelta(days=1 + i * 2))
+        sesion = self.client.session
+        sesion['trabajador_id'] = 1
+        sesion['trabajador_nombre'] = 'Luis Martínez'
+        sesion.save()
+
+    # 1. El CSV se entrega en streaming, con el encabezado antes de consultar y una consulta por lote
+    def test_csv_por_lotes(self):
+        partes = exportacion.exportar('reservas', 'csv', tamano=2)
+        with self.assertNumQueries(0):
+            encabezado = next(partes)
+        self.assertTrue(encabezado.decode().startswith('﻿id,referencia_externa'))
+        with self.assertNumQueries(3):  # Lotes de 2, 2 y 1 filas
+            filas = list(csv.reader(b''.join(partes).decode().splitlines()))
+        self.assertEqual(len(filas), 5)
+        self.assertEqual((filas[0][8], filas[0][10], Decimal(filas[0][15])), ('601', '10000000-0', 1000))
+
+        respuesta = self.client.get(reverse('exportar_datos', args=['clientes']))
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(len(b''.join(respuesta.streaming_content).decode().splitlines()), 6)
+
+    # 2. El XLSX es un libro válido generado sin seek
+    def test_xlsx(self):
+        respuesta = self.client.get(reverse('exportar_datos', args=['reservas']), {'formato': 'xlsx'})
+        libro = zipfile.ZipFile(io.BytesIO(b''.join(respuesta.streaming_content)))
+        self.assertIn('xl/workbook.xml', libro.namelist())
+        hoja = libro.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(hoja.count('<row>'), 6)
+        self.assertIn('<t>Díaz 4</t>', hoja)
+        self.assertEqual(self.client.get(reverse('exportar_datos', args=['trabajadores'])).status_code, 404)
+
+    # 3. El comando escribe el archivo completo
+    def test_comando_exportar(self):
+        ruta = os.path.join(tempfile.mkdtemp(), 'clientes.csv')
+        call_command('exportar_datos', 'clientes', salida=ruta, lote=2, stdout=io.StringIO())
+        with open(ruta, encoding='utf-8-sig') as archivo:
+            self.assertEqual(len(list(csv.DictReader(archivo))), 5)
+
+        # La vista y el comando incluyen las reservas que ingresan el día `hasta`
+        desde, hasta = timezone.localdate().isoformat(), (timezone.localdate() + timedelta(days=3)).isoformat()
+        contenido = b''.join(self.client.get(
+            reverse('exportar_datos', args=['reservas']), {'desde': desde, 'hasta': hasta}).streaming_content)
+        ruta = os.path.join(os.path.dirname(ruta), 'reservas.csv')
+        call_command('exportar_datos', 'reservas', salida=ruta, desde=desde, hasta=hasta, stdout=io.StringIO())
+        with open(ruta, 'rb') as archivo:
+            self.assertEqual(archivo.read(), contenido)
+        self.assertEqual(len(contenido.decode('utf-8-sig').splitlines()), 3)  # Encabezado y dos reservas
+
+    # 4. El enlace de exportación de la página principal conserva el filtro de estado
+    def test_exportar_con_estado(self):
+        Reserva.objects.transition(list(Reserva.objects.values_list('pk', flat=True)[:2]), 'pagada')
+        pagina = self.client.get(reverse('home'), {'estado': 'pagada'})
+        enlace = f"{reverse('exportar_datos', args=['reservas'])}?formato=xlsx&estado=pagada"
+        self.assertContains(pagina, enlace)
+        respuesta = self.client.get(reverse('exportar_datos', args=['reservas']), {'formato': 'xlsx', 'estado': 'pagada'})
+        hoja = zipfile.ZipFile(io.BytesIO(b''.join(respuesta.streaming_content))).read('xl/worksheets/sheet1.xml')
+        self.assertEqual(hoja.decode().count('<row>'), 3)  # Encabezado y dos reservas pagadas
+
+        ruta = os.path.join(tempfile.mkdtemp(), 'pagadas.csv')
+        call_command('exportar_datos', 'reservas', salida=ruta, estado='pagada', stdout=io.StringIO())
+        with open(ruta, encoding='utf-8-sig') as archivo:
+            self.assertEqual({fila['estado'] for fila in csv.DictReader(archivo)}, {'pagada'})
+
+
+class AdminListadosTest(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+        self.habitacion = Habitacion.objects.create(numero_habitacion='701', precio=1000)
+
+    def crear_reservas(self, cantidad, inicio=0):
+        for i in range(inicio, inicio + cantidad):
+            cliente = Cliente.objects.create(
+                rut=f'2000000{i}-{i}', nombre='José' if i == 0 else 'Ana', apellido=f'Pérez {i}',
+                correo=f'cliente{i}@example.com', telefono='+56922222222', fecha_registro=now())
+            reserva = Reserva.objects.create(habitacion=self.habitacion, cliente=cliente, noches=i + 1,
+                                             fecha_ingreso=now() + timedelta(days=1 + i * 20))
+            CheckIn.objects.create(reserva=reserva)
+
+    def consultas_listado(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas)
+
+    # 1. Los listados usan una cantidad constante de consultas sin importar las filas
+    def test_consultas_constantes(self):
+        self.crear_reservas(3)
+        urls = [reverse(f'admin:gestion_{modelo}_changelist') for modelo in ('reserva', 'checkin', 'checkout', 'cliente')]
+        antes = [self.consultas_listado(url) for url in urls]
+        self.crear_reservas(7, inicio=3)
+        self.assertEqual([self.consultas_listado(url) for url in urls], antes)
+
+    # 2. El valor total se calcula en la base de datos y permite ordenar
+    def test_valor_total_ordenable(self):
+        self.crear_reservas(3)
+        respuesta = self.client.get(reverse('admin:gestion_reserva_changelist'), {'o': '-8'})
+        totales = [reserva.total for reserva in respuesta.context['cl'].result_list]
+        self.assertEqual(totales, [3000, 2000, 1000])
+
+    # 3. La búsqueda es por prefijo sin acentos y el paginador cuenta exacto en tablas pequeñas
+    def test_busqueda_y_conteo(self):
+        from .paginacion import PaginadorConteoEstimado
+        self.crear_reservas(3)
+        respuesta = self.client.get(reverse('admin:gestion_reserva_changelist'), {'q': 'jose'})
+        self.assertEqual([r.cliente.nombre for r in respuesta.context['cl'].result_list], ['José'])
+        respuesta = self.client.get(reverse('admin:gestion_checkin_changelist'), {'q': 'ana pere'})
+        self.assertEqual(respuesta.context['cl'].result_count, 2)
+        reserva = Reserva.objects.order_by('pk').last()
+        respuesta = self.client.get(reverse('admin:gestion_checkin_changelist'), {'q': str(reserva.pk)})
+        self.assertEqual([c.reserva_id for c in respuesta.context['cl'].result_list], [reserva.pk])
+        self.assertEqual(PaginadorConteoEstimado(Reserva.objects.order_by('pk'), 2).count, 3)
+
+
+class TarifasTest(TestCase):
+
+    def setUp(self):
+        self.doble = Habitacion.objects.create(numero_habitacion='801', precio=1000, tipo='doble')
+        self.otra_doble = Habitacion.objects.create(numero_habitacion='802', precio=1000, tipo='doble')
+        self.suite = Habitacion.objects.create(numero_habitacion='803', precio=3000, tipo='suite')
+        self.desde = timezone.localdate() + timedelta(days=1)
+        PlanTarifa.objects.create(nombre='Fin de semana', dias_semana='56', ajuste=50, prioridad=1)
+        PlanTarifa.objects.create(
+            nombre='Temporada alta', tipo_habitacion='suite', fecha_desde=self.desde,
+            fecha_hasta=self.desde + timedelta(days=7), ajuste=20, prioridad=2)
+        tarifas.recalcular_tarifas()
+
+    def esperado(self, habitacion, noches):
+        return sum(precio for _, _, precio, _ in tarifas.calcular([habitacion], self.desde, self.desde + timedelta(days=noches)))
+
+    # 1. Cotizar una estadía es una sola lectura por rango del calendario
+    def test_cotizar_estadia(self):
+        with self.assertNumQueries(1):
+            total = tarifas.cotizar(self.suite, self.desde, 14)
+        self.assertEqual(total, self.esperado(self.suite, 14))
+        # 7 noches de temporada alta (+20%), 4 de fin de semana fuera de ella (+50%) y 3 normales
+        fines_de_semana = sum(1 for i in range(7, 14) if (self.desde + timedelta(days=i)).weekday() >= 5)
+        self.assertEqual(total, 7 * 3600 + fines_de_semana * 4500 + (7 - fines_de_semana) * 3000)
+        with override_settings(TARIFAS_HORIZONTE_DIAS=3):  # Noches fuera del calendario: se calculan al vuelo
+            self.assertEqual(tarifas.cotizar(self.doble, self.desde + timedelta(days=400), 5),
+                             sum(p for *_, p, _ in tarifas.calcular(
+                                 [self.doble], self.desde + timedelta(days=400), self.desde + timedelta(days=405))))
+
+    # 2. La cotización en bloque usa un número constante de consultas
+    def test_cotizar_lote(self):
+        consultas = [(h.pk, self.desde + timedelta(days=i), 1 + i % 5)
+                     for h in (self.doble, self.otra_doble, self.suite) for i in range(100)]
+        with self.assertNumQueries(2):
+            totales = tarifas.cotizar_lote(consultas + [(0, self.desde, 1)])
+        self.assertIsNone(totales[-1])
+        self.assertEqual(totales[205], tarifas.cotizar(self.suite, self.desde + timedelta(days=5), 1))
+
+        # Las noches fuera del calendario se calculan por consulta, no por todo el rango entre fechas
+        lejanas = [(self.doble.pk, datetime(1, 1, 1).date(), 2), (self.doble.pk, datetime(9999, 12, 1).date(), 2)]
+        with self.assertNumQueries(3):  # Habitaciones, calendario y planes
+            totales = tarifas.cotizar_lote(lejanas)
+        self.assertEqual(totales, [
+            sum(p for *_, p, _ in tarifas.calcular([self.doble], desde, desde + timedelta(days=noches)))
+            for _, desde, noches in lejanas])
+
+        cuerpo = json.dumps({'consultas': [
+            {'habitacion': '803', 'desde': self.desde.isoformat(), 'noches': 14},
+            {'habitacion': '999', 'desde': self.desde.isoformat(), 'noches': 1},
+            {'habitacion': '801', 'desde': '9999-12-31', 'noches': 1},
+            {'habitacion': '801', 'desde': '0001-01-01', 'noches': 1},
+        ]})
+        sesion = self.client.session
+        sesion['trabajador_id'] = 1
+        sesion.save()
+        # La sesión no basta: el endpoint es para canales y exige su token
+        self.assertEqual(self.client.post(reverse('cotizar_tarifas'), cuerpo, content_type='application/json').status_code, 401)
+        with override_settings(SYNC_CANALES={'booking': 'secreto'}):
+            respuesta = self.client.post(reverse('cotizar_tarifas'), cuerpo, content_type='application/json',
+                                         HTTP_AUTHORIZATION='Bearer secreto')
+        datos = respuesta.json()
+        self.assertEqual(Decimal(datos['cotizaciones'][0]['total']), self.esperado(self.suite, 14))
+        self.assertEqual([error['consulta'] for error in datos['errores']], [1, 2, 3])
+
+    # 3. Los planes por ocupación se recalculan al cambiar las noches ocupadas
+    def test_plan_por_ocupacion(self):
+        plan = PlanTarifa.objects.create(nombre='Alta demanda', tipo_habitacion='doble', ocupacion_minima=50,
+                                         ajuste=30, prioridad=5)
+        tarifas.recalcular_tarifas()
+        self.assertEqual(tarifas.cotizar(self.otra_doble, self.desde + timedelta(days=20), 1), 1000 * (
+            Decimal('1.5') if (self.desde + timedelta(days=20)).weekday() >= 5 else 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = Reserva(habitacion=self.doble, noches=1,
+                              fecha_ingreso=timezone.now() + timedelta(days=21), fecha_registro=timezone.now())
+            reserva.full_clean()
+            reserva.save()
+        self.assertEqual(TarifaDiaria.objects.get(habitacion=self.otra_doble, fecha=reserva.noches_ocupadas()[0]).plan, plan)
+
+        # La reserva guarda el precio cotizado y rechaza uno distinto
+        reserva = Reserva(habitacion=self.suite, noches=2, precio_final=6000,
+                          fecha_ingreso=timezone.now() + timedelta(days=1), fecha_registro=timezone.now())
+        with self.assertRaises(ValidationError):
+            reserva.full_clean()
+
+    # 4. Los recálculos solapados reemplazan las mismas tarifas y sus errores no llegan a la reserva
+    def test_recalculo_solapado(self):
+        tarifas.recalcular_tarifas(self.desde, self.desde + timedelta(days=10))
+        tarifas.recalcular_tarifas(self.desde + timedelta(days=5), self.desde + timedelta(days=15))
+        self.assertEqual(TarifaDiaria.objects.count(), 3 * settings.TARIFAS_HORIZONTE_DIAS)
+
+        def falla(fechas, habitaciones):
+            raise IntegrityError
+
+        with mock.patch.object(tarifas, 'actualizar_por_ocupacion', falla), \
+                self.assertLogs('gestion.signals', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.create(habitacion=self.doble, noches=1, fecha_ingreso=timezone.now() + timedelta(days=2))
+        self.assertTrue(Reserva.objects.filter(habitacion=self.doble).exists())
+
+
+class CanalFalso:
+    """
+    Canal externo simulado: mantiene su copia de reservas y habitaciones leyendo el
+    feed con GET condicional (guarda el ETag de cada URL, como una caché HTTP) y
+    carga reservas con su token.
+    """
+    def __init__(self, client, token):
+        self.client = client
+        self.encabezados = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.cursor = 0
+        self.etags = {}
+        self.descargas = 0
+        self.objetos = {'reserva': {}, 'habitacion': {}}
+
+    def sincronizar(self):
+        while True:
+            encabezados = dict(self.encabezados)
+            if self.cursor in self.etags:
+                encabezados['HTTP_IF_NONE_MATCH'] = self.etags[self.cursor]
+            respuesta = self.client.get(reverse('sync_cambios'), {'cursor': self.cursor}, **encabezados)
+            if respuesta.status_code == 304:
+                return
+            self.descargas += 1
+            self.etags[self.cursor] = respuesta['ETag']
+            datos = respuesta.json()
+            for cambio in datos['cambios']:
+                if cambio.get('borrado'):
+                    self.objetos[cambio['modelo']].pop(cambio['id'], None)
+                else:
+                    self.objetos[cambio['modelo']][cambio['id']] = cambio['datos']
+            self.cursor = datos['cursor']
+            if not datos['hay_mas']:
+                return
+
+    def cargar(self, reservas):
+        return self.client.post(reverse('sync_reservas'), json.dumps({'reservas': reservas}),
+                                content_type='application/json', **self.encabezados).json()
+
+
+@override_settings(SYNC_CANALES={'booking': 'secreto'}, SYNC_MARGEN_SEGUNDOS=0)
+class SincronizacionCanalTest(TestCase):
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='901', precio=1000)
+        Habitacion.objects.create(numero_habitacion='902', precio=2000)
+        self.canal = CanalFalso(self.client, 'secreto')
+        self.ingreso = (timezone.localdate() + timedelta(days=3)).isoformat()
+
+    # 1. El feed entrega solo los cambios nuevos y responde 304 si no los hay
+    def test_feed_incremental(self):
+        reserva = Reserva.objects.create(habitacion=self.habitacion, noches=2, fecha_ingreso=now() + timedelta(days=1),
+                                         canal='booking')
+        self.canal.sincronizar()
+        self.assertEqual(self.canal.objetos['reserva'][reserva.pk]['estado'], 'pendiente')
+        self.assertEqual(self.canal.objetos['habitacion'][self.habitacion.pk]['estado'], 'reservada')
+
+        self.canal.sincronizar()  # Primera lectura con el cursor al día: página vacía con su ETag
+        descargas = self.canal.descargas
+        with self.assertNumQueries(1):  # Solo el último cursor
+            self.canal.sincronizar()
+        self.assertEqual(self.canal.descargas, descargas)
+
+        Reserva.objects.transition([reserva.pk], 'cancelada')  # Operación en lote, sin post_save
+        self.canal.sincronizar()
+        self.assertEqual(self.canal.objetos['reserva'][reserva.pk]['estado'], 'cancelada')
+        self.assertEqual(self.canal.objetos['habitacion'][self.habitacion.pk]['estado'], 'disponible')
+
+        reserva.delete()
+        self.canal.sincronizar()
+        self.assertNotIn(reserva.pk, self.canal.objetos['reserva'])
+
+    # 2. La carga por referencia externa es idempotente
+    def test_carga_idempotente(self):
+        reservas = [
+            {'referencia_externa': 'BK-1', 'habitacion': '901', 'fecha_ingreso': self.ingreso, 'noches': 2},
+            {'referencia_externa': 'BK-2', 'habitacion': '999', 'fecha_ingreso': self.ingreso, 'noches': 1},
+        ]
+        resultado = self.canal.cargar(reservas)
+        self.assertEqual((resultado['creadas'], resultado['errores'][0]['referencia']), (['BK-1'], 'BK-2'))
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').origen, 'otra_plataforma')
+
+        entradas = RegistroCambio.objects.count()
+        self.assertEqual(self.canal.cargar(reservas[:1])['sin_cambios'], ['BK-1'])
+        self.assertEqual(RegistroCambio.objects.count(), entradas)
+
+        reservas[0].update(noches=3, estado='pagada')
+        self.assertEqual(self.canal.cargar(reservas[:1])['actualizadas'], ['BK-1'])
+        self.assertEqual(Ocupacion.objects.filter(reserva__referencia_externa='BK-1').count(), 3)
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').precio_final, 3000)  # Cotizada de nuevo
+        self.canal.sincronizar()
+        cargada = [r for r in self.canal.objetos['reserva'].values() if r['referencia_externa'] == 'BK-1']
+        self.assertEqual((cargada[0]['noches'], cargada[0]['estado']), (3, 'pagada'))
+
+        # Las noches fuera de rango y las salidas imposibles son errores de la reserva
+        for cambio in ({'noches': 9999999999}, {'noches': 366}, {'fecha_ingreso': '9999-12-31'}):
+            fallida = self.canal.cargar([dict(reservas[0], **cambio)])
+            self.assertEqual(fallida['errores'][0]['referencia'], 'BK-1')
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').noches, 3)
+
+        # Con precio del canal no se cotiza
+        self.canal.cargar([dict(reservas[0], habitacion='902', precio_final='1234.50')])
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').precio_final, Decimal('1234.50'))
+
+    # 3. El canal necesita su token y no recibe cambios dentro del margen de confirmación
+    def test_token_y_margen(self):
+        self.assertEqual(self.client.get(reverse('sync_cambios')).status_code, 401)
+        self.assertEqual(CanalFalso(self.client, 'otro').cargar([]), {'error': "Token de canal no válido."})
+        with override_settings(SYNC_MARGEN_SEGUNDOS=60):
+            self.canal.sincronizar()
+        self.assertEqual((self.canal.cursor, self.canal.objetos['habitacion']), (0, {}))
+
+    # 4. Un canal no modifica las reservas creadas por otro canal ni las importadas
+    @override_settings(SYNC_CANALES={'booking': 'secreto', 'airbnb': 'otro'})
+    def test_reservas_de_otro_canal(self):
+        reserva = {'referencia_externa': 'BK-1', 'habitacion': '901', 'fecha_ingreso': self.ingreso, 'noches': 2}
+        self.canal.cargar([reserva])
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').canal, 'booking')
+        importar_reservas([(2, dict(reserva, referencia_externa='CSV-1', habitacion='902'))])
+
+        otro = CanalFalso(self.client, 'otro')
+        resultado = otro.cargar([dict(reserva, estado='cancelada'), dict(reserva, referencia_externa='CSV-1')])
+        self.assertEqual([error['referencia'] for error in resultado['errores']], ['BK-1', 'CSV-1'])
+        self.assertEqual(Reserva.objects.get(referencia_externa='BK-1').estado, 'pendiente')
+        self.assertEqual(self.canal.cargar([dict(reserva, estado='cancelada')])['actualizadas'], ['BK-1'])
+
+    # 5. Un canal solo ve la ocupación de las reservas que no son suyas
+    @override_settings(SYNC_CANALES={'booking': 'secreto', 'airbnb': 'otro'})
+    def test_feed_de_otro_canal(self):
+        reserva = {'referencia_externa': 'BK-1', 'habitacion': '901', 'fecha_ingreso': self.ingreso,
+                   'noches': 2, 'precio_final': '5000'}
+        self.canal.cargar([reserva])
+        propia = Reserva.objects.get(referencia_externa='BK-1')
+
+        otro = CanalFalso(self.client, 'otro')
+        otro.sincronizar()
+        self.assertEqual(otro.objetos['reserva'][propia.pk], {
+            'habitacion': '901', 'fecha_ingreso': propia.fecha_ingreso.isoformat(),
+            'fecha_salida': propia.fecha_salida.isoformat(), 'noches': 2, 'ocupada': True,
+        })
+        self.canal.sincronizar()
+        self.assertEqual(self.canal.objetos['reserva'][propia.pk]['precio_final'], '5000.00')
+
+        self.canal.cargar([dict(reserva, estado='cancelada')])
+        otro.sincronizar()
+        self.assertFalse(otro.objetos['reserva'][propia.pk]['ocupada'])
+
+
+
+@override_settings(DB_REPLICAS=['replica1'])
+class ReplicasTest(TestCase):
+    """
+    Pruebas del router de réplicas de lectura (ver sistemaHostal/db/replicas.py).
+    """
+
+    def setUp(self):
+        self.sesion = SessionStore()
+        self.sesion['trabajador_id'] = 1
+        self.sesion.save()
+        self.leer = replicas.lectura_en_replica(lambda request: HttpResponse(Cliente.objects.all().db))
+
+    def solicitud(self, vista, metodo='get', sesion=None):
+        request = getattr(RequestFactory(), metodo)('/')
+        request.session = sesion or self.sesion
+        return replicas.ReplicasMiddleware(vista)(request)
+
+    def escribir(self, request):
+        numero = Habitacion.objects.count() + 101
+        return HttpResponse(Habitacion.objects.create(numero_habitacion=str(numero), precio=Decimal('20000')).pk)
+
+    # 1. Las vistas marcadas leen de la réplica; las escrituras, las sesiones y las demás vistas usan la primaria
+    def test_enrutamiento(self):
+        self.assertEqual(self.solicitud(self.leer).content, b'replica1')
+        self.assertEqual(self.solicitud(self.leer, 'post').content, b'default')
+        self.assertEqual(self.solicitud(lambda request: HttpResponse(Cliente.objects.all().db)).content, b'default')
+        with replicas.leer_de('replica1'):
+            self.assertEqual((router.db_for_write(Cliente), Session.objects.all().db), ('default', 'default'))
+        with override_settings(DB_REPLICAS=[]):
+            self.assertEqual(self.solicitud(self.leer).content, b'default')
+
+    # 2. Tras escribir, la sesión lee de la primaria durante la ventana; sin sesión no se crea una
+    def test_ventana_primaria(self):
+        self.solicitud(self.escribir, 'post')
+        self.assertGreater(self.sesion[replicas.CLAVE_SESION], reloj.time())
+        self.assertEqual(self.solicitud(self.leer).content, b'default')
+        self.sesion[replicas.CLAVE_SESION] = reloj.time() - 1
+        self.assertEqual(self.solicitud(self.leer).content, b'replica1')
+
+        anonima = SessionStore()
+        self.solicitud(self.escribir, 'post', sesion=anonima)
+        self.assertTrue(anonima.is_empty())
+
+    # 3. Las respuestas en streaming siguen leyendo de la réplica y la caché se llena desde la primaria
+    def test_streaming_y_cache(self):
+        exportar = replicas.lectura_en_replica(
+            lambda request: StreamingHttpResponse(Cliente.objects.all().db for _ in range(2)))
+        respuesta = self.solicitud(exportar)
+        self.assertEqual(b''.join(respuesta.streaming_content), b'replica1replica1')
+        self.assertEqual(Cliente.objects.all().db, 'default')
+
+        caches[settings.HOSTAL_CACHE_ALIAS].clear()
+        Habitacion.objects.create(numero_habitacion='101', precio=Decimal('20000'))
+        with replicas.leer_de('sin_conexion'):  # Una lectura en la réplica fallaría
+            self.assertEqual(len(cache_hostal.catalogo_habitaciones()), 1)
+
+
+
+@override_settings(SYNC_CANALES={'booking': 'secreto'}, SYNC_MARGEN_SEGUNDOS=0, ARCHIVO_HORIZONTE_DIAS=30)
+class ArchivoTest(TestCase):
+    """
+    Pruebas del archivo histórico de reservas (ver gestion/archivo.py).
+    """
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='501', precio=Decimal('20000'))
+        hace = lambda dias: now() - timedelta(days=dias)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pagada = Reserva.objects.create(habitacion=self.habitacion, noches=2, estado='pagada',
+                                                 fecha_ingreso=hace(100))
+            self.cancelada = Reserva.objects.create(habitacion=self.habitacion, noches=1, estado='cancelada',
+                                                    fecha_ingreso=hace(90))
+            self.pendiente = Reserva.objects.create(habitacion=self.habitacion, noches=1, fecha_ingreso=hace(80))
+            self.reciente = Reserva.objects.create(habitacion=self.habitacion, noches=1, estado='pagada',
+                                                   fecha_ingreso=hace(10))
+        CheckIn.objects.create(reserva=self.pagada, fecha_hora=hace(100), qr_escaneado='sí')
+        CheckOut.objects.create(reserva=self.pagada, fecha_hora=hace(98))
+
+    # 1. Se mueven por lotes las estadías pagadas o canceladas anteriores al horizonte, con sus registros
+    def test_archivar(self):
+        resultado = archivo.archivar(lote=1)
+        self.assertEqual(resultado, {'lotes': 2, 'reservas': 2, 'checkins': 1, 'checkouts': 1, 'noches': 2})
+        self.assertEqual(set(Reserva.objects.values_list('pk', flat=True)), {self.pendiente.pk, self.reciente.pk})
+        archivada = ReservaArchivada.objects.get(pk=self.pagada.pk)
+        self.assertEqual((archivada.noches, archivada.fecha_salida, archivada.habitacion), (2, self.pagada.fecha_salida, self.habitacion))
+        self.assertEqual(CheckInArchivado.objects.get().reserva_id, self.pagada.pk)
+        self.assertEqual(CheckOutArchivado.objects.count(), 1)
+        self.assertFalse(Ocupacion.objects.filter(reserva_id=self.pagada.pk).exists())
+        self.assertFalse(CheckIn.objects.exists())
+        self.assertEqual(archivo.archivar()['reservas'], 0)
+
+    # 2. Archivar no es un borrado: ni el feed ni los resúmenes diarios pierden las estadías
+    def test_feed_y_resumenes(self):
+        noches = sorted(self.pagada.noches_ocupadas())
+        resumenes = list(ResumenDiario.objects.filter(fecha__in=noches).values_list('fecha', 'noches_vendidas'))
+        self.assertEqual(len(resumenes), 2)
+        entradas = RegistroCambio.objects.count()
+        archivo.archivar()
+        self.assertEqual(RegistroCambio.objects.count(), entradas)
+        self.assertEqual(archivo.fecha_cierre(), timezone.localtime(self.cancelada.fecha_salida).date())
+
+        reportes.recalcular_rango(noches[0], timezone.localdate())
+        self.assertEqual(list(ResumenDiario.objects.filter(fecha__in=noches).values_list('fecha', 'noches_vendidas')), resumenes)
+        self.assertTrue(ResumenDiario.objects.filter(fecha=self.pendiente.noches_ocupadas()[0]).exists())
+
+        canal = CanalFalso(self.client, 'secreto')
+        canal.sincronizar()
+        self.assertEqual(canal.objetos['reserva'][self.pagada.pk]['noches'], 2)  # Sin canal: solo la ocupación
+        self.assertFalse(canal.objetos['reserva'][self.cancelada.pk]['ocupada'])
+
+    # 3. El comando usa el horizonte indicado y el archivo es de solo lectura en el panel de administración
+    def test_comando_y_admin(self):
+        salida = io.StringIO()
+        call_command('archivar_reservas', dias=95, stdout=salida)
+        self.assertIn('1 reservas archivadas en 1 lotes', salida.getvalue())
+        call_command('archivar_reservas', stdout=salida)
+        self.assertEqual(ReservaArchivada.objects.count(), 2)
+
+        from django.contrib.admin.sites import site
+        modelo_admin = site._registry[ReservaArchivada]
+        self.assertFalse(modelo_admin.has_change_permission(None) or modelo_admin.has_delete_permission(None))
+
+    # 4. Las referencias externas archivadas no se vuelven a crear como reservas activas
+    def test_referencia_archivada(self):
+        Reserva.objects.filter(pk=self.pagada.pk).update(referencia_externa='BK-9', canal='booking')
+        archivo.archivar()
+        fila = {'referencia_externa': 'BK-9', 'habitacion': '501',
+                'fecha_ingreso': (timezone.localdate() + timedelta(days=5)).isoformat(), 'noches': 1}
+
+        resultado = CanalFalso(self.client, 'secreto').cargar([fila])
+        self.assertEqual((resultado['creadas'], resultado['errores'][0]['referencia']), ([], 'BK-9'))
+        self.assertEqual(importar_reservas([(2, fila)]).errores[0][0], 2)
+        self.assertFalse(Reserva.objects.filter(referencia_externa='BK-9').exists())
+
@@ -1,19 +1,78 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from urllib.parse import urlencode
+import csv
+import json
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.views.decorators.csrf import csrf_exempt, csrf_protect, ensure_csrf_cookie
+from django.views.decorators.http import condition, require_GET, require_POST
 from django.contrib.auth import logout
 from django.contrib import messages
 from django.urls import reverse  
-from gestion.models import Trabajador, Reserva, Cliente, Habitacion
-from gestion.forms import ClienteForm, ReservaForm
+from gestion.models import (
+    Reserva, Cliente, Habitacion, HabitacionNoDisponible, ReservaDesactualizada, Trabajador, noche_local,
+)
+from gestion.forms import CambioPasswordForm, ClienteForm, ReservaForm
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate, make_aware, now
+from gestion.importacion import importar_reservas as importar_filas, leer_filas
+from gestion.disponibilidad import habitacion_disponible, habitaciones_disponibles
+from gestion.paginacion import paginar
+from gestion import cache as cache_hostal
+from gestion import reportes
+from gestion import checkin
+from gestion import autenticacion
+from gestion import exportacion
+from gestion import tarifas
+from gestion import sincronizacion
+from gestion import calendario as calendario_ocupacion
+from gestion.autenticacion import canal_requerido, trabajador_requerido
+from sistemaHostal import instrumentacion
+from sistemaHostal.db.replicas import lectura_en_replica
+
+# Cantidad de reservas mostradas por página en la vista principal.
+RESERVAS_POR_PAGINA = 50
+
+# Cantidad de clientes por página del directorio y tope de resultados de la búsqueda JSON.
+CLIENTES_POR_PAGINA = 50
+MAX_RESULTADOS_BUSQUEDA = 20
+
+# Cantidad máxima de reservas por solicitud de Check-In grupal.
+MAX_GRUPO_CHECKIN = 500
+
+# Cantidad máxima de cotizaciones por solicitud y de noches por cotización.
+MAX_COTIZACIONES = 1000
+MAX_NOCHES_COTIZACION = 90
+
+# Entradas del registro de cambios por página del feed y reservas por carga de un canal.
+CAMBIOS_POR_PAGINA = 500
+MAX_RESERVAS_CANAL = 500
+
+
+def _fecha_param(request, nombre):
+    """
+    Lee una fecha (AAAA-MM-DD) desde los parámetros GET de la solicitud.
+
+    Returns:
+        date o None si el parámetro no existe o no es una fecha válida.
+    """
+    try:
+        return parse_date(request.GET.get(nombre) or '')
+    except ValueError:
+        return None
 
 def login_trabajador(request):
     """
     Maneja el inicio de sesión para los trabajadores del sistema.
 
-    Este método permite autenticar a un trabajador utilizando su RUT y una contraseña generada a partir de sus datos personales.
-    Si las credenciales son correctas, se almacena la sesión del trabajador y se redirige a la página principal.
+    Este método permite autenticar a un trabajador utilizando su RUT y su contraseña, que se
+    verifica contra el hash guardado en tiempo constante. Los intentos fallidos se limitan
+    por RUT y por IP (gestion.autenticacion); mientras el límite está vigente, el intento se
+    rechaza sin consultar la base de datos. Si las credenciales son correctas, se almacena
+    la identidad del trabajador en una sesión nueva y se redirige a la página principal, o
+    a cambiar la contraseña si aún es la temporal.
 
     Attributes:
         request: Solicitud HTTP que contiene los datos del formulario de inicio de sesión.
@@ -22,29 +81,59 @@ def login_trabajador(request):
         HttpResponse: Página de inicio de sesión o redirección a la página principal si el login es exitoso.
     """
     if request.method == "POST":
-        rut = request.POST.get("rut")
+        rut = (request.POST.get("rut") or '').strip()
         password = request.POST.get("password")
 
         if not rut or not password:
             messages.error(request, "Por favor, ingrese su RUT y contraseña.")
             return render(request, 'gestion/login.html')
 
-        try:
-            trabajador = Trabajador.objects.get(rut=rut)
-            expected_password = trabajador.apellido[:3].lower() + trabajador.nombre[:3].lower()
-
-            if password.lower() == expected_password:
-                request.session['trabajador_id'] = trabajador.id
-                request.session['trabajador_nombre'] = f"{trabajador.nombre} {trabajador.apellido}"
-                messages.success(request, "Inicio de sesión exitoso.")
-                return redirect('home')
-            else:
-                messages.error(request, "Credenciales incorrectas.")
-        except Trabajador.DoesNotExist:
-            messages.error(request, "Credenciales incorrectas.")
-    
+        if autenticacion.login_bloqueado(request, rut):
+            messages.error(request, "Demasiados intentos fallidos. Intente nuevamente en unos minutos.")
+            return render(request, 'gestion/login.html', status=429)
+
+        trabajador = autenticacion.autenticar(rut, password)
+        if trabajador is not None:
+            autenticacion.limpiar_intentos(request, rut)
+            autenticacion.iniciar_sesion(request, trabajador)
+            if trabajador.password_temporal:
+                messages.warning(request, "Debe cambiar su contraseña antes de continuar.")
+                return redirect('cambiar_password')
+            messages.success(request, "Inicio de sesión exitoso.")
+            return redirect('home')
+
+        autenticacion.registrar_fallo(request, rut)
+        messages.error(request, "Credenciales incorrectas.")
+
     return render(request, 'gestion/login.html')
 
+@csrf_protect
+def cambiar_password(request):
+    """
+    Permite al trabajador autenticado reemplazar su contraseña por una definitiva.
+
+    Es la única vista disponible mientras la contraseña sea la temporal; al guardarla,
+    la sesión se renueva sin esa restricción y se redirige a la página principal.
+
+    Attributes:
+        request: Solicitud HTTP con la contraseña actual y la nueva (POST).
+
+    Returns:
+        HttpResponse: Formulario de cambio de contraseña o redirección a la página principal.
+    """
+    if getattr(request, 'trabajador', None) is None:
+        return redirect('login')
+    trabajador = get_object_or_404(Trabajador, pk=request.trabajador.id)
+    if request.method == "POST":
+        form = CambioPasswordForm(trabajador, request.POST)
+        if form.is_valid():
+            autenticacion.iniciar_sesion(request, form.save())
+            messages.success(request, "Contraseña actualizada correctamente.")
+            return redirect('home')
+    else:
+        form = CambioPasswordForm(trabajador)
+    return render(request, 'gestion/cambiar_password.html', {'form': form})
+
 def logout_trabajador(request):
     """
     Finaliza la sesión activa de un trabajador y lo redirige al formulario de inicio de sesión.
@@ -59,6 +148,7 @@ def logout_trabajador(request):
     return redirect('login')
 
 
+@trabajador_requerido
 def agregar_cliente(request):
     """
     Procesa un formulario para registrar un nuevo cliente en el sistema.
@@ -87,6 +177,7 @@ def agregar_cliente(request):
         form = ClienteForm()
         return render(request, 'gestion/agregar_cliente.html', {'form': form})
 
+@trabajador_requerido
 def editar_cliente(request, cliente_id):
     """
     Permite modificar los datos de un cliente existente.
@@ -113,12 +204,13 @@ def editar_cliente(request, cliente_id):
         form = ClienteForm(instance=cliente)
     return render(request, 'gestion/editar_cliente.html', {'form': form, 'cliente': cliente})
 
+@trabajador_requerido
 def agregar_reserva(request):
     """
     Maneja la creación de nuevas reservas para habitaciones.
 
-    Incluye lógica para calcular el costo total basado en el precio de la habitación y el número de noches, 
-    además de actualizar el estado de la habitación.
+    Incluye lógica para cotizar el costo total con las tarifas diarias de la habitación (gestion.tarifas),
+    verificar que la habitación esté libre durante toda la estadía y actualizar el estado de la habitación.
 
     Attributes:
         request: Solicitud HTTP que puede contener datos de un formulario enviado por POST.
@@ -136,24 +228,26 @@ def agregar_reserva(request):
             fecha_registro = datetime.now()
 
             # Validar que la fecha de ingreso no sea anterior a la actual
-            if fecha_ingreso < now().date():  # Comparar con la fecha actual
+            if fecha_ingreso.date() < now().date():  # Comparar con la fecha actual
                 messages.error(request, "La fecha de ingreso no puede ser anterior a la actual.")
                 return render(request, 'gestion/agregar_reserva.html', {'form': form})
 
-            # Verificar si la habitación está ocupada
-            if habitacion.estado == "ocupada":
-                messages.error(request, "La habitación está ocupada y no puede ser reservada.")
+            # Verificar que la habitación esté libre durante toda la estadía
+            primera = noche_local(fecha_ingreso)
+            if not habitacion_disponible(habitacion, primera, primera + timedelta(days=noches)):
+                messages.error(request, "La habitación ya está reservada en esas fechas.")
                 return render(request, 'gestion/agregar_reserva.html', {'form': form})
 
-            precio_final = habitacion.precio * noches
+            precio_final = tarifas.cotizar(habitacion, fecha_ingreso, noches)
             reserva = form.save(commit=False)
             reserva.precio_final = precio_final
             reserva.estado = "pendiente"
             reserva.fecha_registro = fecha_registro
-            reserva.save()
-
-            habitacion.estado = "reservada"
-            habitacion.save()
+            try:
+                reserva.save()  # Bloquea la habitación y registra las noches de forma atómica
+            except HabitacionNoDisponible as error:
+                messages.error(request, error.message)
+                return render(request, 'gestion/agregar_reserva.html', {'form': form})
 
             messages.success(request, "Reserva agregada correctamente.")
             return redirect('home')  # Redirige a la página principal después de crear la reserva
@@ -162,15 +256,26 @@ def agregar_reserva(request):
     else:
         form = ReservaForm()
 
-    habitaciones_disponibles = Habitacion.objects.filter(estado="disponible")
-    data = {'form': form, 'habitaciones': habitaciones_disponibles}
+    # Habitaciones libres en el rango consultado (por defecto, la noche de hoy).
+    # Para una sola noche se usan el catálogo y la ocupación en caché.
+    desde = _fecha_param(request, 'desde') or now().date()
+    hasta = _fecha_param(request, 'hasta') or desde + timedelta(days=1)
+    if hasta == desde + timedelta(days=1):
+        habitaciones = cache_hostal.habitaciones_libres(desde)
+    else:
+        habitaciones = habitaciones_disponibles(desde, hasta)
+    data = {'form': form, 'habitaciones': habitaciones, 'desde': desde}
     return render(request, 'gestion/agregar_reserva.html', data)
 
+@trabajador_requerido
 def editar_reserva(request, pk):
     """
     Permite editar una reserva existente.
 
-    Carga los datos de una reserva específica para que puedan ser actualizados mediante un formulario.
+    Carga los datos de una reserva específica para que puedan ser actualizados mediante un formulario,
+    y muestra el token firmado de su QR para registrar el Check-In / Check-Out en `/api/qr/`. Si
+    otra persona guardó la reserva después de abrir el formulario, no se sobrescribe: se vuelve a
+    mostrar con los datos actuales.
 
     Attributes:
         request: Solicitud HTTP que puede contener datos de un formulario enviado por POST.
@@ -183,23 +288,37 @@ def editar_reserva(request, pk):
     if request.method == "POST":
         form = ReservaForm(request.POST, instance=reserva)
         if form.is_valid():
-            form.save()
+            try:
+                form.save()
+            except HabitacionNoDisponible as error:
+                messages.error(request, error.message)
+                return render(request, "gestion/editar_reserva.html",
+                              {"form": form, "reserva": reserva, "token_qr": checkin.generar_token(reserva)})
+            except ReservaDesactualizada as error:
+                # Otra persona la guardó después de abrirla: se vuelve a mostrar con los datos actuales.
+                messages.error(request, error.message)
+                return redirect("editar_reserva", pk=pk)
             messages.success(request, "Reserva actualizada correctamente.")
             return redirect("home")
         else:
             messages.error(request, "Corrige el formulario.")
     else:
         form = ReservaForm(instance=reserva)
-    return render(request, "gestion/editar_reserva.html", {"form": form, "reserva": reserva})
+    data = {"form": form, "reserva": reserva, "token_qr": checkin.generar_token(reserva)}
+    return render(request, "gestion/editar_reserva.html", data)
 
 
 
+@ensure_csrf_cookie
+@trabajador_requerido
 def home(request):
     """
     Renderiza la página principal del sistema.
 
     Muestra las reservas activas y permite acceder a otras funciones del sistema,
-    siempre que el trabajador haya iniciado sesión correctamente.
+    siempre que el trabajador haya iniciado sesión correctamente. Las reservas se
+    filtran por estado y rango de fechas de ingreso, y se paginan por cursor sobre
+    (fecha_ingreso, id), de modo que cada página usa un número constante de consultas.
 
     Attributes:
         request: Solicitud HTTP.
@@ -207,32 +326,46 @@ def home(request):
     Returns:
         HttpResponse: Página principal del sistema o redirección al login si no hay sesión activa.
     """
-    trabajador_id = request.session.get('trabajador_id')
-    if not trabajador_id:
-        messages.error(request, "Debes iniciar sesión para acceder a esta página.")
-        return redirect('login')
-    try:
-        trabajador = Trabajador.objects.get(id=trabajador_id)
-    except Trabajador.DoesNotExist:
-        del request.session['trabajador_id']
-        messages.error(request, "Tu sesión no es válida. Por favor, inicia sesión nuevamente.")
-        return redirect('login')
+    reservas = Reserva.objects.con_detalle()
 
-    reservas = Reserva.objects.all()
-    cliente_form = ClienteForm()
-    reserva_form = ReservaForm()
+    # Filtros del lado del servidor: estado y rango de fechas de ingreso.
+    estado = request.GET.get('estado', '')
+    if estado in dict(Reserva._meta.get_field('estado').choices):
+        reservas = reservas.filter(estado=estado)
+    else:
+        estado = ''
+
+    desde = _fecha_param(request, 'desde')
+    hasta = _fecha_param(request, 'hasta')
+    if desde:
+        reservas = reservas.filter(fecha_ingreso__gte=make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        reservas = reservas.filter(fecha_ingreso__lt=make_aware(datetime.combine(hasta + timedelta(days=1), time.min)))
+
+    pagina = paginar(
+        reservas,
+        orden=['fecha_ingreso', 'id'],
+        cursor=request.GET.get('cursor'),
+        tamano=RESERVAS_POR_PAGINA,
+    )
+    filtros = {'estado': estado, 'desde': desde or '', 'hasta': hasta or ''}
     data = {
-        'trabajador': trabajador,
-        'reservas': reservas,
-        'cliente_form': cliente_form,
-        'reserva_form': reserva_form,
+        'trabajador': request.trabajador,
+        'reservas': pagina,
+        'filtros': filtros,
+        'filtros_query': urlencode({k: v for k, v in filtros.items() if v}),
+        'estados': Reserva._meta.get_field('estado').choices,
     }
     return render(request, 'gestion/home.html', data)
 
+@trabajador_requerido
+@lectura_en_replica
 def tabla_clientes(request):
     """
-    Muestra una lista con todos los clientes registrados.
+    Muestra el directorio de clientes registrados, con búsqueda y paginación.
 
+    La búsqueda (parámetro `q`) cubre RUT, nombre, apellido y correo mediante
+    prefijos sobre columnas indexadas, y la tabla se pagina por cursor sobre `id`.
     Solo permite el acceso si hay un trabajador autenticado en la sesión.
 
     Attributes:
@@ -241,18 +374,98 @@ def tabla_clientes(request):
     Returns:
         HttpResponse: Página con la tabla de clientes o redirección al login si no hay sesión activa.
     """
-    if 'trabajador_id' not in request.session:
-        return redirect('login')
 
-    clientes = Cliente.objects.all()
-    trabajador = request.session['trabajador_nombre']
-    data = {'clientes': clientes, 'trabajador': trabajador}
+    busqueda = request.GET.get('q', '').strip()
+    clientes = paginar(
+        Cliente.objects.buscar(busqueda),
+        orden=['id'],
+        cursor=request.GET.get('cursor'),
+        tamano=CLIENTES_POR_PAGINA,
+    )
+    data = {
+        'clientes': clientes,
+        'trabajador': request.trabajador,
+        'busqueda': busqueda,
+        'filtros_query': urlencode({'q': busqueda}) if busqueda else '',
+    }
     return render(request, 'gestion/clientes.html', data)
 
+@trabajador_requerido(api=True)
+def buscar_clientes(request):
+    """
+    Busca clientes por RUT, nombre, apellido o correo y devuelve el resultado en JSON.
+
+    Pensado para campos con autocompletado: devuelve como máximo `limite`
+    resultados (tope MAX_RESULTADOS_BUSQUEDA) y solo las columnas necesarias.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros `q` y, opcionalmente, `limite`.
+
+    Returns:
+        JsonResponse: Lista de clientes en la clave `resultados`.
+    """
+
+    busqueda = request.GET.get('q', '').strip()
+    if not busqueda:
+        return JsonResponse({'resultados': []})
+    try:
+        limite = min(max(int(request.GET.get('limite', 10)), 1), MAX_RESULTADOS_BUSQUEDA)
+    except ValueError:
+        limite = 10
+
+    clientes = (
+        Cliente.objects.buscar(busqueda)
+        .order_by('apellido_normalizado', 'nombre_normalizado', 'id')
+        .values('id', 'rut', 'nombre', 'apellido', 'correo')[:limite]
+    )
+    resultados = [
+        dict(cliente, texto=f"{cliente['nombre']} {cliente['apellido']} ({cliente['rut']})")
+        for cliente in clientes
+    ]
+    return JsonResponse({'resultados': resultados})
+
+@trabajador_requerido(api=True)
+def buscar_habitaciones(request):
+    """
+    Busca habitaciones por número y devuelve el resultado en JSON.
+
+    Pensado para campos con autocompletado. Si se indican `desde` y `hasta`, solo
+    devuelve habitaciones libres en ese rango. El resultado se limita a
+    MAX_RESULTADOS_BUSQUEDA habitaciones.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros `q` y, opcionalmente, `desde` y `hasta`.
+
+    Returns:
+        JsonResponse: Lista de habitaciones en la clave `resultados`.
+    """
+
+    desde = _fecha_param(request, 'desde')
+    hasta = _fecha_param(request, 'hasta')
+    if desde and hasta and desde < hasta:
+        habitaciones = habitaciones_disponibles(desde, hasta)
+    else:
+        habitaciones = Habitacion.objects.order_by('numero_habitacion')
+
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        habitaciones = habitaciones.filter(numero_habitacion__istartswith=busqueda)
+    resultados = [
+        {'id': pk, 'numero_habitacion': numero, 'precio': str(precio), 'estado': estado,
+         'texto': f"Habitación {numero} - {estado}"}
+        for pk, numero, precio, estado in habitaciones.values_list(
+            'id', 'numero_habitacion', 'precio', 'estado')[:MAX_RESULTADOS_BUSQUEDA]
+    ]
+    return JsonResponse({'resultados': resultados})
+
+@trabajador_requerido
+@lectura_en_replica
 def tabla_habitaciones(request):
     """
     Muestra una lista con todas las habitaciones disponibles en el sistema.
 
+    El catálogo se lee desde la caché (gestion.cache), que se invalida al guardar o
+    borrar habitaciones, por lo que la vista normalmente no consulta la base de datos.
     Solo permite el acceso si hay un trabajador autenticado en la sesión.
 
     Attributes:
@@ -261,10 +474,438 @@ def tabla_habitaciones(request):
     Returns:
         HttpResponse: Página con la tabla de habitaciones o redirección al login si no hay sesión activa.
     """
-    if 'trabajador_id' not in request.session:
-        return redirect('login')
 
-    habitaciones = Habitacion.objects.all()
-    trabajador = request.session['trabajador_nombre']
-    data = {'habitaciones': habitaciones, 'trabajador': trabajador}
+    habitaciones = cache_hostal.catalogo_habitaciones()
+    data = {'habitaciones': habitaciones, 'trabajador': request.trabajador}
     return render(request, 'gestion/habitaciones.html', data)
+
+@csrf_protect
+@require_POST
+@trabajador_requerido(api=True)
+def importar_reservas(request):
+    """
+    Importa en lote reservas de otras plataformas desde un archivo CSV o JSON Lines.
+
+    El archivo se procesa en streaming y por lotes; las filas con errores se informan
+    sin detener la importación del resto. Se autentica con la sesión del trabajador,
+    por lo que exige el token CSRF del formulario de importación de la página principal.
+
+    Attributes:
+        request: Solicitud HTTP con el archivo en el campo `archivo` y, opcionalmente,
+            el campo `formato` ("csv" o "jsonl").
+
+    Returns:
+        JsonResponse: Resumen con filas leídas, reservas creadas, errores por fila y rendimiento.
+    """
+
+    archivo = request.FILES.get('archivo')
+    if archivo is None:
+        return JsonResponse({'error': "Debe adjuntar un archivo en el campo 'archivo'."}, status=400)
+    formato = request.POST.get('formato') or ('jsonl' if archivo.name.endswith(('.jsonl', '.ndjson')) else 'csv')
+    if formato not in ('csv', 'jsonl'):
+        return JsonResponse({'error': "El formato debe ser 'csv' o 'jsonl'."}, status=400)
+
+    resultado = importar_filas(leer_filas(archivo.file, formato))
+    return JsonResponse(resultado.como_dict())
+
+@csrf_protect
+@require_POST
+@trabajador_requerido(api=True)
+def registrar_qr(request):
+    """
+    Registra un Check-In o Check-Out a partir del token leído desde el QR de la reserva.
+
+    Pensada para lectores QR en recepción: recibe JSON (o un formulario) con los
+    campos `token` y `accion` ("checkin" o "checkout"), verifica la firma sin
+    consultar la base de datos y registra el movimiento en una transacción corta.
+    Se autentica con la sesión del trabajador, por lo que exige el token CSRF
+    (encabezado X-CSRFToken) como cualquier otro formulario del sistema.
+
+    Attributes:
+        request: Solicitud HTTP POST con el token y la acción.
+
+    Returns:
+        JsonResponse: Reserva, acción, habitación y su nuevo estado, o el error
+        (400 token o acción inválidos, 409 la reserva no admite la acción).
+    """
+
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body)
+        except ValueError:
+            datos = None
+        if not isinstance(datos, dict):
+            return JsonResponse({'error': "El cuerpo debe ser un objeto JSON."}, status=400)
+    else:
+        datos = request.POST
+
+    accion = datos.get('accion', 'checkin')
+    if accion not in checkin.ACCIONES:
+        return JsonResponse({'error': "La acción debe ser 'checkin' o 'checkout'."}, status=400)
+    try:
+        reserva_id = checkin.leer_token(datos.get('token'))
+    except checkin.QRInvalido as error:
+        return JsonResponse({'error': error.messages[0]}, status=400)
+
+    try:
+        resultado = checkin.registrar(reserva_id, accion)
+    except ValidationError as error:
+        return JsonResponse({'error': error.messages[0]}, status=409)
+    return JsonResponse(resultado, status=201 if resultado['creado'] else 200)
+
+@csrf_protect
+@require_POST
+@trabajador_requerido(api=True)
+def registrar_grupo_qr(request):
+    """
+    Registra en bloque el Check-In o Check-Out de un grupo de reservas.
+
+    Recibe JSON con `reservas` (lista de ids de reserva o tokens QR, mezclados) y
+    `accion` ("checkin" o "checkout"). Todo el grupo se valida y registra en una
+    transacción con un número constante de consultas; las reservas que fallan se
+    informan una por una sin bloquear al resto. Como acepta ids sin firmar y se
+    autentica con la sesión del trabajador, exige el token CSRF (encabezado X-CSRFToken).
+
+    Attributes:
+        request: Solicitud HTTP POST con el cuerpo JSON.
+
+    Returns:
+        JsonResponse: Reservas registradas, ya registradas y errores por reserva.
+    """
+
+    try:
+        datos = json.loads(request.body)
+    except ValueError:
+        datos = None
+    entradas = datos.get('reservas') if isinstance(datos, dict) else None
+    if not isinstance(entradas, list) or not all(isinstance(e, (int, str)) for e in entradas):
+        return JsonResponse({'error': "El campo 'reservas' debe ser una lista de ids o tokens QR."}, status=400)
+    if len(entradas) > MAX_GRUPO_CHECKIN:
+        return JsonResponse({'error': f"Un grupo admite hasta {MAX_GRUPO_CHECKIN} reservas."}, status=400)
+    accion = datos.get('accion', 'checkin')
+    if accion not in checkin.ACCIONES:
+        return JsonResponse({'error': "La acción debe ser 'checkin' o 'checkout'."}, status=400)
+
+    return JsonResponse(checkin.registrar_grupo(entradas, accion))
+
+@csrf_exempt
+@require_POST
+@canal_requerido
+def cotizar_tarifas(request):
+    """
+    Cotiza en bloque estadías por habitación y fechas, para los administradores de canales.
+
+    Como los endpoints de sincronización, se autentica con el token del canal
+    (`Authorization: Bearer <token>`) y no con la sesión, por lo que no usa CSRF.
+
+    Recibe JSON con `consultas`, una lista de objetos con `habitacion` (número),
+    `desde` (AAAA-MM-DD, desde ayer hasta el fin del horizonte del calendario de
+    tarifas) y `noches`. Todas las consultas se resuelven con un número
+    constante de consultas a la base de datos (ver gestion.tarifas.cotizar_lote); las
+    consultas inválidas se informan una por una sin bloquear al resto.
+
+    Attributes:
+        request: Solicitud HTTP POST con el cuerpo JSON.
+
+    Returns:
+        JsonResponse: Cotizaciones válidas con su total y errores por consulta.
+    """
+    try:
+        datos = json.loads(request.body)
+    except ValueError:
+        datos = None
+    consultas = datos.get('consultas') if isinstance(datos, dict) else None
+    if not isinstance(consultas, list) or not all(isinstance(c, dict) for c in consultas):
+        return JsonResponse({'error': "El campo 'consultas' debe ser una lista de objetos."}, status=400)
+    if len(consultas) > MAX_COTIZACIONES:
+        return JsonResponse({'error': f"Una solicitud admite hasta {MAX_COTIZACIONES} cotizaciones."}, status=400)
+
+    por_numero = {h.numero_habitacion: h.pk for h in cache_hostal.catalogo_habitaciones()}
+    inicio, fin = tarifas.horizonte()
+    primera, ultima = inicio - timedelta(days=1), fin
+    validas, errores = [], []
+    for indice, consulta in enumerate(consultas):
+        numero = str(consulta.get('habitacion', ''))
+        try:
+            desde = parse_date(str(consulta.get('desde', '')))
+        except ValueError:
+            desde = None
+        noches = consulta.get('noches', 1)
+        if numero not in por_numero:
+            errores.append({'consulta': indice, 'mensaje': f"La habitación {numero!r} no existe."})
+        elif desde is None:
+            errores.append({'consulta': indice, 'mensaje': "La fecha 'desde' no es válida (AAAA-MM-DD)."})
+        elif not primera <= desde <= ultima:
+            errores.append({
+                'consulta': indice,
+                'mensaje': f"La fecha 'desde' debe estar entre {primera.isoformat()} y {ultima.isoformat()}."})
+        elif not isinstance(noches, int) or not 1 <= noches <= MAX_NOCHES_COTIZACION:
+            errores.append({
+                'consulta': indice,
+                'mensaje': f"Las noches deben ser un entero entre 1 y {MAX_NOCHES_COTIZACION}."})
+        else:
+            validas.append((numero, desde, noches))
+
+    totales = tarifas.cotizar_lote([(por_numero[numero], desde, noches) for numero, desde, noches in validas])
+    return JsonResponse({
+        'cotizaciones': [
+            {'habitacion': numero, 'desde': desde.isoformat(), 'noches': noches, 'total': str(total)}
+            for (numero, desde, noches), total in zip(validas, totales)
+        ],
+        'errores': errores,
+    })
+
+def _parametros_feed(request):
+    """
+    Lee el cursor y el tamaño de página del feed desde los parámetros GET.
+
+    Returns:
+        Tupla (cursor, limite); el cursor inválido se interpreta como 0.
+    """
+    try:
+        cursor = max(int(request.GET.get('cursor', 0)), 0)
+    except ValueError:
+        cursor = 0
+    try:
+        limite = min(max(int(request.GET.get('limite', CAMBIOS_POR_PAGINA)), 1), CAMBIOS_POR_PAGINA)
+    except ValueError:
+        limite = CAMBIOS_POR_PAGINA
+    return cursor, limite
+
+def _etag_cambios(request):
+    """
+    ETag del feed: cambia solo si hay cambios nuevos desde el cursor pedido, y es distinto por canal.
+    """
+    cursor, limite = _parametros_feed(request)
+    return f"{request.canal}-{cursor}-{limite}-{sincronizacion.ultimo_cursor()}"
+
+@require_GET
+@canal_requerido
+@condition(etag_func=_etag_cambios)
+def sync_cambios(request):
+    """
+    Entrega a un canal externo los cambios de reservas y habitaciones posteriores a su cursor.
+
+    Admite GET condicional: si el canal envía `If-None-Match` con el ETag de su
+    última respuesta y no hubo cambios, responde 304 con una sola consulta. Las
+    reservas de otros canales se entregan solo como ocupación.
+
+    Attributes:
+        request: Solicitud HTTP GET con `cursor` (id del último cambio leído) y `limite` opcionales.
+
+    Returns:
+        JsonResponse: Cambios con el estado actual de cada objeto, el cursor siguiente y si hay más páginas.
+    """
+    cursor, limite = _parametros_feed(request)
+    return JsonResponse(sincronizacion.cambios_desde(cursor, limite, request.canal))
+
+@csrf_exempt
+@require_POST
+@canal_requerido
+def sync_reservas(request):
+    """
+    Crea o actualiza las reservas de un canal externo según su referencia externa.
+
+    Recibe JSON con `reservas`, una lista de objetos con referencia_externa,
+    habitacion, fecha_ingreso, noches y opcionalmente rut, correo, estado y
+    precio_final. Repetir la misma solicitud no modifica nada. Solo se
+    actualizan las reservas que creó el mismo canal.
+
+    Attributes:
+        request: Solicitud HTTP POST con el cuerpo JSON.
+
+    Returns:
+        JsonResponse: Referencias creadas, actualizadas y sin cambios, y errores por reserva.
+    """
+    try:
+        datos = json.loads(request.body)
+    except ValueError:
+        datos = None
+    filas = datos.get('reservas') if isinstance(datos, dict) else None
+    if not isinstance(filas, list) or not all(isinstance(fila, dict) for fila in filas):
+        return JsonResponse({'error': "El campo 'reservas' debe ser una lista de objetos."}, status=400)
+    if len(filas) > MAX_RESERVAS_CANAL:
+        return JsonResponse({'error': f"Una solicitud admite hasta {MAX_RESERVAS_CANAL} reservas."}, status=400)
+    return JsonResponse(sincronizacion.upsert_reservas(filas, request.canal))
+
+@trabajador_requerido(api=True)
+def estadisticas_cache(request):
+    """
+    Devuelve en JSON los contadores de aciertos y fallos de la caché del proceso.
+
+    Attributes:
+        request: Solicitud HTTP.
+
+    Returns:
+        JsonResponse: Contadores por tipo de dato en caché (catálogo y ocupación).
+    """
+    return JsonResponse(cache_hostal.estadisticas())
+
+@trabajador_requerido(api=True)
+def metricas_solicitudes(request):
+    """
+    Devuelve en JSON los histogramas de duración por ruta de este proceso.
+
+    Attributes:
+        request: Solicitud HTTP.
+
+    Returns:
+        JsonResponse: Intervalos del histograma y, por ruta, conteos y promedios de las solicitudes medidas.
+    """
+    return JsonResponse(instrumentacion.histogramas())
+
+def _parametros_calendario(request):
+    """
+    Lee la primera noche y la cantidad de días del calendario desde los parámetros GET.
+
+    Returns:
+        Tupla (desde, dias); por defecto, desde hoy y `calendario.DIAS_POR_DEFECTO` días.
+    """
+    desde = _fecha_param(request, 'desde') or localdate()
+    try:
+        dias = int(request.GET.get('dias', calendario_ocupacion.DIAS_POR_DEFECTO))
+    except ValueError:
+        dias = calendario_ocupacion.DIAS_POR_DEFECTO
+    return desde, min(max(dias, 1), calendario_ocupacion.MAX_DIAS)
+
+@trabajador_requerido
+def calendario(request):
+    """
+    Muestra la grilla de habitaciones por noches; los datos se cargan desde `calendario_datos`.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros opcionales `desde` y `dias`.
+
+    Returns:
+        HttpResponse: Página del calendario o redirección al login si no hay sesión activa.
+    """
+    desde, dias = _parametros_calendario(request)
+    data = {
+        'trabajador': request.trabajador,
+        'desde': desde,
+        'dias': dias,
+        'max_dias': calendario_ocupacion.MAX_DIAS,
+    }
+    return render(request, 'gestion/calendario.html', data)
+
+@require_GET
+@trabajador_requerido(api=True)
+def calendario_datos(request):
+    """
+    Devuelve en JSON la matriz de ocupación de todas las habitaciones para una ventana de días.
+
+    Attributes:
+        request: Solicitud HTTP GET con los parámetros opcionales `desde` y `dias`.
+
+    Returns:
+        JsonResponse: Habitaciones con su mapa de bits de noches ocupadas y las reservas de la ventana.
+    """
+    desde, dias = _parametros_calendario(request)
+    return JsonResponse(calendario_ocupacion.matriz_ocupacion(desde, dias))
+
+def _rango_reporte(request):
+    """
+    Lee el rango del reporte desde los parámetros GET.
+
+    Returns:
+        Tupla (desde, hasta) con `hasta` inclusivo; por defecto, el último trimestre.
+    """
+    hasta = _fecha_param(request, 'hasta') or now().date()
+    desde = _fecha_param(request, 'desde') or hasta - timedelta(days=90)
+    if desde > hasta:
+        desde, hasta = hasta, desde
+    return desde, hasta
+
+@trabajador_requerido
+@lectura_en_replica
+def reporte_ocupacion(request):
+    """
+    Muestra el reporte de ocupación e ingresos por noche para un rango de fechas.
+
+    Lee solo los resúmenes diarios precalculados (gestion.reportes), por lo que el
+    costo no depende de la cantidad de reservas.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros opcionales `desde` y `hasta`.
+
+    Returns:
+        HttpResponse: Página del reporte o redirección al login si no hay sesión activa.
+    """
+
+    desde, hasta = _rango_reporte(request)
+    dias = reportes.resumen_por_dia(desde, hasta + timedelta(days=1))
+    total_habitaciones = len(cache_hostal.catalogo_habitaciones())
+    for dia in dias:
+        dia['ocupacion'] = (100 * dia['noches_vendidas'] / total_habitaciones) if total_habitaciones else 0
+    data = {
+        'trabajador': request.trabajador,
+        'dias': dias,
+        'totales': reportes.totales(desde, hasta + timedelta(days=1)),
+        'desde': desde,
+        'hasta': hasta,
+        'total_habitaciones': total_habitaciones,
+    }
+    return render(request, 'gestion/reportes.html', data)
+
+@trabajador_requerido
+@lectura_en_replica
+def exportar_reporte_csv(request):
+    """
+    Exporta a CSV el reporte diario de ocupación e ingresos por origen.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros opcionales `desde` y `hasta`.
+
+    Returns:
+        HttpResponse: Archivo CSV con una fila por día y origen.
+    """
+
+    desde, hasta = _rango_reporte(request)
+    respuesta = HttpResponse(content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="reporte_{desde}_{hasta}.csv"'
+    escritor = csv.writer(respuesta)
+    escritor.writerow(['fecha', 'origen', 'noches_vendidas', 'ingresos', 'cancelaciones'])
+    for dia in reportes.resumen_por_dia(desde, hasta + timedelta(days=1)):
+        for origen, valores in dia['por_origen'].items():
+            escritor.writerow([
+                dia['fecha'].isoformat(), origen,
+                valores['noches_vendidas'], valores['ingresos'], valores['cancelaciones'],
+            ])
+    return respuesta
+
+@trabajador_requerido
+@lectura_en_replica
+def exportar_datos(request, tabla):
+    """
+    Exporta en streaming todos los clientes o reservas a CSV o XLSX.
+
+    Las filas se leen por lotes y se envían a medida que se generan, por lo que la
+    memoria usada no depende de la cantidad de filas y la descarga empieza de inmediato.
+    Las reservas incluyen los datos de su cliente y habitación.
+
+    Attributes:
+        request: Solicitud HTTP con los parámetros opcionales `formato` ("csv" o "xlsx")
+            y, para reservas, `estado`, `desde` y `hasta` (fecha de ingreso, inclusivas), igual
+            que los filtros de la página principal y el comando exportar_datos.
+        tabla: "clientes" o "reservas".
+
+    Returns:
+        StreamingHttpResponse: Archivo descargable, o 404 si la tabla no es exportable.
+    """
+    formato = request.GET.get('formato', 'csv')
+    if tabla not in exportacion.TABLAS or formato not in exportacion.FORMATOS:
+        return JsonResponse({'error': "Exportación no disponible."}, status=404)
+
+    filtros = {}
+    if request.GET.get('estado') in dict(Reserva._meta.get_field('estado').choices):
+        filtros['estado'] = request.GET['estado']
+    desde, hasta = _fecha_param(request, 'desde'), _fecha_param(request, 'hasta')
+    if desde:
+        filtros['desde'] = make_aware(datetime.combine(desde, time.min))
+    if hasta:
+        filtros['hasta'] = make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+
+    respuesta = StreamingHttpResponse(
+        exportacion.exportar(tabla, formato, filtros), content_type=exportacion.FORMATOS[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="{tabla}_{now().date()}.{formato}"'
+    return respuesta
@@ -0,0 +1,18 @@
+"""
+Backend de base de datos del proyecto sistemaHostal.
+
+Extiende el backend MySQL de Django con dos mejoras pensadas para una base de
+datos remota (RDS), donde abrir una conexión (TCP + TLS + autenticación) cuesta
+más que la mayoría de las consultas de una página:
+
+- Verificación de salud: cuando una conexión persistente (CONN_MAX_AGE > 0) se
+  reutiliza en una nueva solicitud, se comprueba con un ping antes de la primera
+  consulta y se reemplaza si el servidor la cerró.
+- Pool opcional: con POOL_SIZE > 0 las conexiones cerradas al terminar una
+  solicitud se devuelven a un pool compartido por los hilos del proceso, en lugar
+  de cerrarse. Sirve tanto para workers WSGI con hilos como para ASGI, donde las
+  vistas síncronas se ejecutan en hilos distintos.
+
+Se activa con ENGINE = 'sistemaHostal.db' (ver settings.DATABASES). El router de
+réplicas de lectura está en `sistemaHostal.db.replicas`.
+"""
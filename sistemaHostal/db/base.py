@@ -0,0 +1,97 @@
+"""
+DatabaseWrapper MySQL con verificación de salud y pool de conexiones opcional.
+
+Claves adicionales en settings.DATABASES:
+    CONN_HEALTH_CHECKS: Verificar con un ping las conexiones persistentes al reutilizarlas.
+    POOL_SIZE: Cantidad máxima de conexiones libres por proceso (0 desactiva el pool).
+    POOL_PING_AFTER: Segundos de inactividad tras los cuales una conexión del pool
+        se verifica antes de entregarla.
+"""
+from django.db.backends.mysql import base
+from django.db.backends.mysql.base import Database
+
+from sistemaHostal.db.pool import obtener_pool
+
+
+def _responde(conexion):
+    """
+    Comprueba con un ping, sin reconectar, que el servidor mantiene la conexión abierta.
+    """
+    try:
+        conexion.ping(False)
+    except Database.Error:
+        return False
+    return True
+
+
+def _cerrar(conexion):
+    try:
+        conexion.close()
+    except Database.Error:
+        pass
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Backend MySQL para conexiones remotas de alta latencia.
+
+    Attributes:
+        - verificacion_pendiente: Indica si la conexión reutilizada debe verificarse
+          antes de la próxima consulta.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verificacion_pendiente = False
+
+    @property
+    def pool(self):
+        """
+        Pool de conexiones de este alias, o None si POOL_SIZE es 0.
+        """
+        tamano = self.settings_dict.get('POOL_SIZE') or 0
+        return obtener_pool(self.alias, tamano) if tamano > 0 else None
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is not None:
+            verificar_tras = self.settings_dict.get('POOL_PING_AFTER', 30)
+            while True:
+                libre = pool.tomar()
+                if libre is None:
+                    break
+                conexion, inactiva = libre
+                if inactiva < verificar_tras or _responde(conexion):
+                    return conexion
+                pool.descartadas += 1
+                _cerrar(conexion)
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        # Solo se devuelven al pool conexiones sanas y sin transacciones abiertas;
+        # al reutilizarlas, connect() restablece su autocommit y estado inicial.
+        pool = self.pool
+        if (
+            pool is not None
+            and self.connection is not None
+            and not self.errors_occurred
+            and not self.in_atomic_block
+            and self.autocommit
+            and pool.devolver(self.connection)
+        ):
+            return None
+        return super()._close()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Se ejecuta al inicio y al final de cada solicitud: si la conexión
+        # persistente sobrevive, se verifica de forma diferida antes de usarla.
+        if self.connection is not None and self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            self.verificacion_pendiente = True
+
+    def ensure_connection(self):
+        if self.verificacion_pendiente:
+            self.verificacion_pendiente = False
+            if self.connection is not None and not self.in_atomic_block and not _responde(self.connection):
+                self.errors_occurred = True  # Evita devolverla al pool
+                self.close()
+        super().ensure_connection()
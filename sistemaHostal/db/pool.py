@@ -0,0 +1,90 @@
+"""
+Pool de conexiones compartido entre los hilos de un proceso.
+"""
+import threading
+import time
+
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+class PoolConexiones:
+    """
+    Conjunto acotado de conexiones libres, seguro para usar desde varios hilos.
+
+    Las conexiones se entregan en orden LIFO para reutilizar primero las más
+    recientes y dejar que las demás expiren si sobran.
+
+    Attributes:
+        - tamano: Cantidad máxima de conexiones libres guardadas.
+        - reutilizadas: Cantidad de conexiones entregadas desde el pool.
+        - descartadas: Cantidad de conexiones cerradas por estar el pool lleno o no responder.
+    """
+    def __init__(self, tamano):
+        self.tamano = tamano
+        self.reutilizadas = 0
+        self.descartadas = 0
+        self._libres = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._libres)
+
+    def tomar(self):
+        """
+        Saca una conexión libre del pool.
+
+        Returns:
+            Tupla (conexión, segundos inactiva), o None si el pool está vacío.
+        """
+        with self._lock:
+            if not self._libres:
+                return None
+            conexion, devuelta = self._libres.pop()
+            self.reutilizadas += 1
+        return conexion, time.monotonic() - devuelta
+
+    def devolver(self, conexion):
+        """
+        Guarda una conexión libre para reutilizarla.
+
+        Returns:
+            True si se guardó; False si el pool está lleno y quien llama debe cerrarla.
+        """
+        with self._lock:
+            if len(self._libres) >= self.tamano:
+                self.descartadas += 1
+                return False
+            self._libres.append((conexion, time.monotonic()))
+            return True
+
+    def vaciar(self):
+        """
+        Saca todas las conexiones libres del pool.
+
+        Returns:
+            Lista de conexiones, que quien llama debe cerrar.
+        """
+        with self._lock:
+            conexiones = [conexion for conexion, _ in self._libres]
+            self._libres = []
+        return conexiones
+
+
+def obtener_pool(alias, tamano):
+    """
+    Obtiene el pool del alias de base de datos indicado, creándolo si no existe.
+
+    Attributes:
+        alias: Alias de la base de datos en settings.DATABASES.
+        tamano: Cantidad máxima de conexiones libres del pool.
+
+    Returns:
+        PoolConexiones compartido por todos los hilos del proceso.
+    """
+    with _lock_pools:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = PoolConexiones(tamano)
+        pool.tamano = tamano
+        return pool
@@ -0,0 +1,155 @@
+"""
+Réplicas de lectura: enrutamiento de las vistas de solo lectura a réplicas de la base de datos.
+
+Las vistas marcadas con `@lectura_en_replica` (listados, reportes y
+exportaciones) leen de una de las réplicas de `settings.DB_REPLICAS`, elegida al
+azar en cada solicitud. Las escrituras, las sesiones y el resto de las vistas usan
+siempre `default`.
+
+Para que un trabajador vea lo que acaba de escribir aunque la réplica tenga
+retraso, `ReplicasMiddleware` detecta las solicitudes que escriben en la base y
+guarda en la sesión hasta cuándo debe leer de la primaria
+(`settings.DB_REPLICA_VENTANA` segundos). Mientras dure esa ventana, las vistas
+marcadas también leen de `default`.
+
+Se activa con DATABASE_ROUTERS = ['sistemaHostal.db.replicas.RouterReplicas'] y
+el middleware después de SessionMiddleware. Sin réplicas configuradas, todo va a
+`default`.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Clave de sesión con el instante (epoch) hasta el que la sesión lee de la primaria.
+CLAVE_SESION = 'bd_primaria_hasta'
+
+# Aplicaciones que se leen siempre de la primaria: la sesión se escribe en cada
+# inicio de sesión y una réplica atrasada la daría por inexistente.
+APPS_SOLO_PRIMARIA = {'sessions'}
+
+_replica = ContextVar('replica_lectura', default=None)
+_escrituras = ContextVar('escrituras_solicitud', default=None)
+
+
+@contextmanager
+def leer_de(alias):
+    """
+    Dirige las lecturas del bloque a la base `alias`, o a la primaria si es None.
+    """
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def en_primaria():
+    """
+    Dirige las lecturas del bloque a la primaria, aunque la vista lea de una réplica.
+
+    Sirve para los datos que se guardan en caché, que no deben quedar atrasados.
+    """
+    return leer_de(None)
+
+
+def en_ventana_primaria(request):
+    """
+    Indica si la sesión escribió hace menos de `DB_REPLICA_VENTANA` segundos.
+    """
+    return request.session.get(CLAVE_SESION, 0) > time.time()
+
+
+def _replica_para(request):
+    if not settings.DB_REPLICAS or request.method not in ('GET', 'HEAD') or en_ventana_primaria(request):
+        return None
+    return random.choice(settings.DB_REPLICAS)
+
+
+def _iterar_en(alias, contenido):
+    # Cada parte se genera con las lecturas en la réplica, sin dejarla activa entre partes
+    iterador = iter(contenido)
+    while True:
+        with leer_de(alias):
+            try:
+                parte = next(iterador)
+            except StopIteration:
+                return
+        yield parte
+
+
+def lectura_en_replica(vista):
+    """
+    Decorador para vistas de solo lectura que toleran datos con unos segundos de retraso.
+
+    Las solicitudes GET y HEAD leen de una réplica, salvo que la sesión esté en su
+    ventana de lectura en la primaria. Las respuestas en streaming siguen leyendo de
+    la misma réplica mientras se generan.
+    """
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        alias = _replica_para(request)
+        if alias is None:
+            return vista(request, *args, **kwargs)
+        with leer_de(alias):
+            respuesta = vista(request, *args, **kwargs)
+        if respuesta.streaming:
+            respuesta.streaming_content = _iterar_en(alias, respuesta.streaming_content)
+        return respuesta
+    return envoltura
+
+
+class RouterReplicas:
+    """
+    Router de bases de datos: lecturas en la réplica elegida por la vista, escrituras en `default`.
+
+    También anota los modelos escritos durante la solicitud para que
+    `ReplicasMiddleware` abra la ventana de lectura en la primaria.
+    """
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in APPS_SOLO_PRIMARIA:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        escrituras = _escrituras.get()
+        if escrituras is not None and model._meta.app_label not in APPS_SOLO_PRIMARIA:
+            escrituras.add(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        if db in settings.DB_REPLICAS:
+            return False
+        return None
+
+
+class ReplicasMiddleware:
+    """
+    Abre la ventana de lectura en la primaria de la sesión cuando una solicitud escribe en la base.
+
+    Solo se registra en sesiones que ya existen (trabajadores autenticados), para no
+    crear sesiones a los canales que escriben por la API. Debe ubicarse después de
+    `SessionMiddleware`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        escrituras = set()
+        token = _escrituras.set(escrituras)
+        try:
+            response = self.get_response(request)
+        finally:
+            _escrituras.reset(token)
+        if escrituras and settings.DB_REPLICAS and not request.session.is_empty():
+            request.session[CLAVE_SESION] = time.time() + settings.DB_REPLICA_VENTANA
+        return response
@@ -0,0 +1,241 @@
+"""
+Instrumentación por solicitud: consultas SQL, tiempo de base de datos, de plantillas y de la vista.
+
+Todas las solicitudes suman su duración al histograma de su ruta (por nombre de
+URL), lo que cuesta dos lecturas del reloj. Una fracción de ellas
+(`settings.INSTRUMENTACION_MUESTREO`) se mide en detalle:
+
+- consultas SQL y su tiempo, con un `execute_wrapper` en cada conexión;
+- tiempo de render de plantillas, con el backend `PlantillasMedidas`;
+- consultas repetidas: la misma sentencia ejecutada al menos
+  `settings.INSTRUMENTACION_REPETIDAS` veces en una solicitud, típica de un N+1.
+
+Las solicitudes medidas reciben el encabezado `Server-Timing` (si
+`settings.INSTRUMENTACION_SERVER_TIMING` está activo) y, si superan
+`settings.INSTRUMENTACION_LENTA_MS` o repiten consultas, se registran en el log
+`sistemaHostal.instrumentacion`. Los histogramas son por proceso y se consultan
+con `histogramas()`.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los intervalos del histograma de duración; el último es abierto.
+LIMITES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_histogramas = {}
+_bloqueo = threading.Lock()
+_local = threading.local()
+
+
+class Medicion:
+    """
+    Tiempos y consultas de una solicitud medida en detalle.
+
+    Attributes:
+        - consultas: Veces que se ejecutó cada sentencia SQL.
+        - bd: Segundos en la base de datos.
+        - plantillas: Segundos renderizando plantillas.
+    """
+    def __init__(self):
+        self.consultas = {}
+        self.bd = 0.0
+        self.plantillas = 0.0
+        self.profundidad = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.bd += time.perf_counter() - inicio
+            self.consultas[sql] = self.consultas.get(sql, 0) + 1
+
+    @property
+    def total_consultas(self):
+        return sum(self.consultas.values())
+
+    def repetidas(self):
+        """
+        Sentencias ejecutadas al menos `INSTRUMENTACION_REPETIDAS` veces, de la más repetida a la menos.
+
+        Returns:
+            Lista de tuplas (sql, veces).
+        """
+        umbral = settings.INSTRUMENTACION_REPETIDAS
+        return sorted(
+            ((sql, veces) for sql, veces in self.consultas.items() if veces >= umbral),
+            key=lambda par: -par[1],
+        )
+
+
+def medicion_actual():
+    """
+    Medición de la solicitud en curso en este hilo, o None si no se está midiendo.
+    """
+    return getattr(_local, 'medicion', None)
+
+
+class PlantillaMedida(Template):
+    """
+    Plantilla que suma su tiempo de render a la medición en curso.
+
+    Solo se mide el render más externo, para no contar dos veces las plantillas
+    renderizadas desde otra plantilla.
+    """
+    def render(self, context=None, request=None):
+        medicion = medicion_actual()
+        if medicion is None:
+            return super().render(context, request)
+        medicion.profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.profundidad -= 1
+            if not medicion.profundidad:
+                medicion.plantillas += time.perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """
+    Backend de plantillas de Django que entrega plantillas medidas (ver `PlantillaMedida`).
+    """
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name).template, self)
+
+
+def registrar(ruta, segundos, medicion=None):
+    """
+    Suma una solicitud al histograma de su ruta.
+
+    Attributes:
+        ruta: Nombre de la URL.
+        segundos: Duración total de la solicitud.
+        medicion: Medición detallada, si la solicitud fue muestreada.
+    """
+    milisegundos = segundos * 1000
+    intervalo = next((i for i, limite in enumerate(LIMITES_MS) if milisegundos <= limite), len(LIMITES_MS))
+    with _bloqueo:
+        datos = _histogramas.get(ruta)
+        if datos is None:
+            datos = _histogramas[ruta] = {
+                'solicitudes': 0, 'conteos': [0] * (len(LIMITES_MS) + 1), 'total_ms': 0.0,
+                'muestras': 0, 'consultas': 0, 'bd_ms': 0.0, 'plantillas_ms': 0.0, 'con_repetidas': 0,
+            }
+        datos['solicitudes'] += 1
+        datos['conteos'][intervalo] += 1
+        datos['total_ms'] += milisegundos
+        if medicion is not None:
+            datos['muestras'] += 1
+            datos['consultas'] += medicion.total_consultas
+            datos['bd_ms'] += medicion.bd * 1000
+            datos['plantillas_ms'] += medicion.plantillas * 1000
+            datos['con_repetidas'] += bool(medicion.repetidas())
+
+
+def histogramas():
+    """
+    Obtiene los histogramas de duración y los promedios de las muestras por ruta en este proceso.
+
+    Returns:
+        Diccionario con `limites_ms` y `rutas`: {ruta: {"solicitudes", "conteos",
+        "promedio_ms", "muestras", "consultas_promedio", "bd_promedio_ms",
+        "plantillas_promedio_ms", "con_repetidas"}}.
+    """
+    with _bloqueo:
+        copia = {ruta: dict(datos, conteos=list(datos['conteos'])) for ruta, datos in _histogramas.items()}
+    rutas = {}
+    for ruta, datos in sorted(copia.items()):
+        muestras = datos['muestras']
+        rutas[ruta] = {
+            'solicitudes': datos['solicitudes'],
+            'conteos': datos['conteos'],
+            'promedio_ms': round(datos['total_ms'] / datos['solicitudes'], 2),
+            'muestras': muestras,
+            'consultas_promedio': round(datos['consultas'] / muestras, 2) if muestras else None,
+            'bd_promedio_ms': round(datos['bd_ms'] / muestras, 2) if muestras else None,
+            'plantillas_promedio_ms': round(datos['plantillas_ms'] / muestras, 2) if muestras else None,
+            'con_repetidas': datos['con_repetidas'],
+        }
+    return {'limites_ms': list(LIMITES_MS), 'rutas': rutas}
+
+
+def reiniciar():
+    """
+    Borra los histogramas de este proceso.
+    """
+    with _bloqueo:
+        _histogramas.clear()
+
+
+def _server_timing(total, vista, medicion):
+    metricas = []
+    if medicion is not None:
+        metricas.append(f'bd;dur={medicion.bd * 1000:.2f};desc="{medicion.total_consultas} consultas'
+                        f' ({len(medicion.repetidas())} repetidas)"')
+        metricas.append(f'plantillas;dur={medicion.plantillas * 1000:.2f}')
+    if vista is not None:
+        metricas.append(f'vista;dur={vista * 1000:.2f}')
+    metricas.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(metricas)
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada solicitud y registra su duración en el histograma de su ruta.
+
+    Debe ubicarse primero en `MIDDLEWARE` para que la duración total incluya el
+    resto del middleware. El tiempo de la vista se cuenta desde `process_view` e
+    incluye el render de plantillas.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._inicio_vista = time.perf_counter()
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        medicion = Medicion() if random.random() < settings.INSTRUMENTACION_MUESTREO else None
+        if medicion is None:
+            response = self.get_response(request)
+        else:
+            _local.medicion = medicion
+            try:
+                with ExitStack() as pila:
+                    for conexion in connections.all():
+                        pila.enter_context(conexion.execute_wrapper(medicion))
+                    response = self.get_response(request)
+            finally:
+                _local.medicion = None
+        fin = time.perf_counter()
+        total = fin - inicio
+        vista = fin - request._inicio_vista if hasattr(request, '_inicio_vista') else None
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        ruta = (coincidencia.view_name if coincidencia else None) or 'sin_ruta'
+        registrar(ruta, total, medicion)
+        if medicion is not None:
+            if settings.INSTRUMENTACION_SERVER_TIMING:
+                response['Server-Timing'] = _server_timing(total, vista, medicion)
+            repetidas = medicion.repetidas()
+            if total * 1000 >= settings.INSTRUMENTACION_LENTA_MS or repetidas:
+                logger.warning(
+                    "%s %s (%s) %d: %.1fms, %d consultas en %.1fms, plantillas %.1fms, repetidas: %s",
+                    request.method, request.path, ruta, response.status_code, total * 1000,
+                    medicion.total_consultas, medicion.bd * 1000, medicion.plantillas * 1000,
+                    '; '.join(f"{veces}x {sql[:200]}" for sql, veces in repetidas[:3]) or 'ninguna',
+                )
+        return response
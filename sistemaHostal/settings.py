@@ -37,11 +37,14 @@ INSTALLED_APPS = [
 
 # Middleware (gestión de peticiones/respuestas)
 MIDDLEWARE = [
+    'sistemaHostal.instrumentacion.InstrumentacionMiddleware',  # Tiempos y consultas por solicitud (primero)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'sistemaHostal.db.replicas.ReplicasMiddleware',  # Lecturas en la primaria tras escribir
     'django.middleware.common.CommonMiddleware',
     
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gestion.middleware.TrabajadorMiddleware',  # Trabajador autenticado en request.trabajador
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -52,7 +55,7 @@ ROOT_URLCONF = 'sistemaHostal.urls'
 # Configuración de plantillas HTML
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'sistemaHostal.instrumentacion.PlantillasMedidas',  # DjangoTemplates con tiempo de render
         'DIRS': [os.path.join(BASE_DIR, 'templates')],  # Carpeta de plantillas personalizadas
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,17 +73,112 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sistemaHostal.wsgi.application'
 
 # Configuración de la base de datos
+# Cada valor puede sobrescribirse con variables de entorno (DB_*). El motor
+# 'sistemaHostal.db' es el backend MySQL de Django con verificación de salud de
+# conexiones persistentes y un pool opcional (ver sistemaHostal/db).
+#   DB_CONN_MAX_AGE: segundos que se reutiliza una conexión entre solicitudes
+#       (0 la cierra al terminar cada solicitud, None la mantiene indefinidamente).
+#   DB_POOL_SIZE: conexiones libres por proceso (0 desactiva el pool). Con el pool
+#       activo conviene DB_CONN_MAX_AGE=0: cada solicitud toma y devuelve una conexión.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '0' if DB_POOL_SIZE else '60')
+#   DB_ENGINE: otro backend de Django (p. ej. sqlite3 en local); las opciones de
+#       conexión de MySQL solo se aplican a los motores MySQL.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sistemaHostal.db')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',  # Motor MySQL
-        'NAME': 'gestion-hostal',  # Nombre de la base de datos
-        'USER': 'admin',  # Usuario de la base de datos
-        'PASSWORD': 'Mundial2020)',  # Contraseña del usuario
-        'HOST': 'gestion-hostal.crca8g4em4c3.sa-east-1.rds.amazonaws.com',  # Host del servidor de la base de datos
-        'PORT': 3306,  # Puerto de conexión
+        'ENGINE': DB_ENGINE,  # Motor MySQL con pool opcional
+        'NAME': os.environ.get('DB_NAME', 'gestion-hostal'),  # Nombre de la base de datos
+        'USER': os.environ.get('DB_USER', 'admin'),  # Usuario de la base de datos
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'Mundial2020)'),  # Contraseña del usuario
+        'HOST': os.environ.get('DB_HOST', 'gestion-hostal.crca8g4em4c3.sa-east-1.rds.amazonaws.com'),  # Host del servidor de la base de datos
+        'PORT': int(os.environ.get('DB_PORT', 3306)),  # Puerto de conexión
+        'CONN_MAX_AGE': None if DB_CONN_MAX_AGE.lower() == 'none' else int(DB_CONN_MAX_AGE),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',  # Ping al reutilizar conexiones
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_PING_AFTER': int(os.environ.get('DB_POOL_PING_AFTER', 30)),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 10)),
+        } if DB_ENGINE in ('sistemaHostal.db', 'django.db.backends.mysql') else {},
+    }
+}
+
+# Réplicas de lectura (sistemaHostal.db.replicas). Las vistas de listados, reportes
+# y exportaciones leen de una réplica; las escrituras y las demás vistas, de default.
+#   DB_REPLICA_HOSTS: hosts de las réplicas separados por comas. Cada una usa la misma
+#       configuración que default y se registra como "replica1", "replica2", etc. En
+#       pruebas son espejos de default (TEST MIRROR). Para probar en local basta con
+#       apuntar una réplica al mismo servidor, p. ej. DB_REPLICA_HOSTS=127.0.0.1.
+#   DB_REPLICA_VENTANA: segundos que una sesión lee de la primaria después de escribir,
+#       para ver sus propios cambios aunque la réplica tenga retraso.
+DB_REPLICAS = []
+for _numero, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_numero}'] = dict(DATABASES['default'], HOST=_host.strip(), TEST={'MIRROR': 'default'})
+    DB_REPLICAS.append(f'replica{_numero}')
+DB_REPLICA_VENTANA = int(os.environ.get('DB_REPLICA_VENTANA', 10))
+DATABASE_ROUTERS = ['sistemaHostal.db.replicas.RouterReplicas']
+
+# Caché: memoria local por defecto. Para compartirla entre procesos (varios workers)
+# se configura un backend compartido con CACHE_BACKEND y CACHE_LOCATION, por ejemplo
+# django.core.cache.backends.memcached.PyMemcacheCache y "127.0.0.1:11211".
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'sistemaHostal'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
     }
 }
 
+# Alias de CACHES usado para el catálogo de habitaciones y la ocupación diaria.
+HOSTAL_CACHE_ALIAS = os.environ.get('HOSTAL_CACHE_ALIAS', 'default')
+
+# Días hacia adelante que se mantienen precalculados en el calendario de tarifas
+# (gestion.TarifaDiaria); las noches posteriores se cotizan al vuelo.
+TARIFAS_HORIZONTE_DIAS = int(os.environ.get('TARIFAS_HORIZONTE_DIAS', 365))
+
+# Antigüedad (días desde la salida) desde la que las reservas pagadas o canceladas se
+# mueven al archivo histórico con el comando archivar_reservas (gestion.archivo).
+ARCHIVO_HORIZONTE_DIAS = int(os.environ.get('ARCHIVO_HORIZONTE_DIAS', 365))
+
+# Canales externos que sincronizan reservas (gestion.sincronizacion), como pares
+# "nombre:token" separados por comas, p. ej. SYNC_CANALES="booking:abc123,airbnb:def456".
+# Los nombres (hasta 32 caracteres) identifican al dueño de cada reserva cargada.
+SYNC_CANALES = dict(
+    par.split(':', 1) for par in os.environ.get('SYNC_CANALES', '').split(',') if ':' in par
+)
+# Antigüedad mínima de un cambio para entregarlo en el feed, de modo que las
+# transacciones en curso se confirmen antes de que el canal avance su cursor.
+SYNC_MARGEN_SEGUNDOS = int(os.environ.get('SYNC_MARGEN_SEGUNDOS', 5))
+
+# Instrumentación por solicitud (sistemaHostal.instrumentacion).
+#   INSTRUMENTACION_MUESTREO: fracción de solicitudes medidas en detalle (consultas SQL,
+#       tiempo de base de datos y de plantillas); todas suman su duración al histograma.
+#   INSTRUMENTACION_LENTA_MS: duración desde la que una solicitud medida se registra en el log.
+#   INSTRUMENTACION_REPETIDAS: veces que debe repetirse una consulta para marcarla como repetida.
+#   INSTRUMENTACION_SERVER_TIMING: agrega el encabezado Server-Timing a las solicitudes medidas.
+INSTRUMENTACION_MUESTREO = float(os.environ.get('INSTRUMENTACION_MUESTREO', 0.05))
+INSTRUMENTACION_LENTA_MS = int(os.environ.get('INSTRUMENTACION_LENTA_MS', 500))
+INSTRUMENTACION_REPETIDAS = int(os.environ.get('INSTRUMENTACION_REPETIDAS', 3))
+INSTRUMENTACION_SERVER_TIMING = os.environ.get('INSTRUMENTACION_SERVER_TIMING', '1') == '1'
+
+# Sesiones. Las vistas solo guardan en la sesión el id y el nombre del trabajador,
+# por lo que se puede evitar leer django_session en cada solicitud. SESSION_MODE:
+#   db: tabla django_session (una consulta por solicitud).
+#   cached_db: caché con respaldo en la base de datos; lee de la base solo si la caché no la tiene.
+#   cache: solo caché (requiere una caché compartida entre procesos, p. ej. memcached).
+#   signed_cookies: los datos viajan firmados en la cookie; no consulta ni caché ni base de datos,
+#       pero una sesión no puede invalidarse en el servidor antes de expirar.
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+SESSION_CACHE_ALIAS = os.environ.get('SESSION_CACHE_ALIAS', 'default')
+SESSION_COOKIE_HTTPONLY = True
+
 # Validación de contraseñas
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -89,6 +187,23 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Hashers de contraseñas. El último se usa para las contraseñas de los trabajadores
+# (gestion.Trabajador) con un factor de trabajo configurable.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'gestion.hashers.PBKDF2TrabajadorHasher',
+]
+TRABAJADOR_HASH_ITERACIONES = int(os.environ.get('TRABAJADOR_HASH_ITERACIONES', 260000))
+
+# Límite de intentos fallidos de inicio de sesión por RUT y por IP, contados en la
+# caché (HOSTAL_CACHE_ALIAS) durante LOGIN_VENTANA segundos.
+LOGIN_MAX_INTENTOS = int(os.environ.get('LOGIN_MAX_INTENTOS', 5))
+LOGIN_MAX_INTENTOS_IP = int(os.environ.get('LOGIN_MAX_INTENTOS_IP', 20))
+LOGIN_VENTANA = int(os.environ.get('LOGIN_VENTANA', 300))
+
 # Configuración de internacionalización
 LANGUAGE_CODE = 'en-es'
 TIME_ZONE = 'UTC'
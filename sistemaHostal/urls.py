@@ -17,12 +17,28 @@ from gestion import views
 urlpatterns = [
     path('admin/', admin.site.urls, name='admin'),  # Panel de administración de Django.
     path('login', views.login_trabajador, name='login'),  # Ruta para el inicio de sesión de trabajadores.
+    path('cambiar-password/', views.cambiar_password, name='cambiar_password'),  # Cambio de la contraseña del trabajador (obligatorio si es temporal).
     path('logout/', views.logout_trabajador, name='logout'),  # Ruta para cerrar sesión de trabajadores.
     path('', views.home, name='home'),  # Página de inicio del sistema.
     path('agregar-cliente/', views.agregar_cliente, name='agregar_cliente'),  # Formulario para agregar un nuevo cliente.
     path('agregar-reserva/', views.agregar_reserva, name='agregar_reserva'),  # Formulario para crear una nueva reserva.
     path('tabla-clientes/', views.tabla_clientes, name='tabla_clientes'),  # Tabla con la lista de clientes.
+    path('api/clientes/', views.buscar_clientes, name='buscar_clientes'),  # Búsqueda de clientes en JSON para autocompletado.
     path('reserva/editar/<int:pk>/', views.editar_reserva, name='editar_reserva'),  # Editar una reserva específica usando su `pk`.
     path('editar-cliente/<int:cliente_id>/', views.editar_cliente, name='editar_cliente'),  # Editar un cliente específico por su `cliente_id`.
     path('tabla-habitaciones/', views.tabla_habitaciones, name='tabla_habitaciones'),  # Tabla con la lista de habitaciones disponibles.
+    path('api/habitaciones/', views.buscar_habitaciones, name='buscar_habitaciones'),  # Búsqueda de habitaciones en JSON para autocompletado.
+    path('api/qr/', views.registrar_qr, name='registrar_qr'),  # Check-In / Check-Out desde el QR firmado de la reserva.
+    path('api/qr/grupo/', views.registrar_grupo_qr, name='registrar_grupo_qr'),  # Check-In / Check-Out de un grupo de reservas.
+    path('api/tarifas/cotizar/', views.cotizar_tarifas, name='cotizar_tarifas'),  # Cotización en bloque de estadías según las tarifas diarias.
+    path('api/sync/cambios/', views.sync_cambios, name='sync_cambios'),  # Feed incremental de cambios para canales externos.
+    path('api/sync/reservas/', views.sync_reservas, name='sync_reservas'),  # Carga idempotente de reservas desde canales externos.
+    path('api/cache/', views.estadisticas_cache, name='estadisticas_cache'),  # Contadores de aciertos y fallos de la caché.
+    path('calendario/', views.calendario, name='calendario'),  # Grilla de habitaciones por noches.
+    path('api/calendario/', views.calendario_datos, name='calendario_datos'),  # Matriz de ocupación en JSON para la grilla.
+    path('api/metricas/', views.metricas_solicitudes, name='metricas_solicitudes'),  # Histogramas de duración por ruta.
+    path('reportes/', views.reporte_ocupacion, name='reporte_ocupacion'),  # Reporte de ocupación e ingresos por noche.
+    path('reportes/csv/', views.exportar_reporte_csv, name='exportar_reporte_csv'),  # Exportación CSV del reporte.
+    path('exportar/<slug:tabla>/', views.exportar_datos, name='exportar_datos'),  # Exportación CSV/XLSX en streaming de clientes o reservas.
+    path('importar-reservas/', views.importar_reservas, name='importar_reservas'),  # Importación masiva de reservas de otras plataformas (CSV o JSON Lines).
 ]
@@ -0,0 +1,59 @@
+/*
+ * Autocompletado para los campos AutocompletarSelect de gestion/forms.py.
+ *
+ * Cada campo visible con `data-autocompletar-url` consulta el endpoint JSON
+ * mientras se escribe y guarda el id elegido en el campo oculto indicado por
+ * `data-autocompletar-destino`.
+ */
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-autocompletar-url]').forEach(function (campo) {
+        var destino = document.getElementById(campo.dataset.autocompletarDestino);
+        var lista = campo.parentElement.querySelector('.list-group');
+        var espera = null;
+        var solicitud = 0;
+
+        function limpiarLista() {
+            lista.innerHTML = '';
+        }
+
+        function mostrar(resultados) {
+            limpiarLista();
+            resultados.forEach(function (resultado) {
+                var opcion = document.createElement('button');
+                opcion.type = 'button';
+                opcion.className = 'list-group-item list-group-item-action';
+                opcion.textContent = resultado.texto;
+                opcion.addEventListener('mousedown', function (evento) {
+                    evento.preventDefault();
+                    destino.value = resultado.id;
+                    campo.value = resultado.texto;
+                    limpiarLista();
+                });
+                lista.appendChild(opcion);
+            });
+        }
+
+        campo.addEventListener('input', function () {
+            destino.value = '';
+            clearTimeout(espera);
+            var termino = campo.value.trim();
+            if (!termino) {
+                limpiarLista();
+                return;
+            }
+            espera = setTimeout(function () {
+                var numero = ++solicitud;
+                var url = campo.dataset.autocompletarUrl + '?q=' + encodeURIComponent(termino);
+                fetch(url, {credentials: 'same-origin'})
+                    .then(function (respuesta) { return respuesta.json(); })
+                    .then(function (datos) {
+                        if (numero === solicitud) {  // Ignora respuestas de búsquedas anteriores
+                            mostrar(datos.resultados || []);
+                        }
+                    });
+            }, 200);
+        });
+
+        campo.addEventListener('blur', limpiarLista);
+    });
+});
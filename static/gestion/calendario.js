@@ -0,0 +1,98 @@
+/*
+ * Grilla de habitaciones por noches para templates/gestion/calendario.html.
+ *
+ * Pide una sola vez la matriz de ocupación (gestion/calendario.py) y arma toda
+ * la tabla como una cadena HTML que se inserta de una vez, sin crear nodos
+ * celda por celda. Cada reserva se dibuja como una celda que abarca sus noches;
+ * el mapa de bits de cada habitación da las noches ocupadas de la fila.
+ */
+document.addEventListener('DOMContentLoaded', function () {
+    var contenedor = document.getElementById('calendario');
+    if (!contenedor) {
+        return;
+    }
+    var DIAS_SEMANA = ['D', 'L', 'M', 'X', 'J', 'V', 'S'];
+
+    function escapar(texto) {
+        return String(texto).replace(/[&<>"']/g, function (caracter) {
+            return '&#' + caracter.charCodeAt(0) + ';';
+        });
+    }
+
+    // Bit `i` del mapa en hexadecimal: noche `desde + i`.
+    function ocupada(mapa, i) {
+        var posicion = mapa.length - 1 - (i >> 2);
+        return posicion >= 0 && ((parseInt(mapa.charAt(posicion), 16) >> (i & 3)) & 1) === 1;
+    }
+
+    function contarNoches(mapa, dias) {
+        var total = 0;
+        for (var i = 0; i < dias; i++) {
+            if (ocupada(mapa, i)) {
+                total++;
+            }
+        }
+        return total;
+    }
+
+    function dibujar(datos) {
+        var partes = datos.desde.split('-');
+        var desde = new Date(Number(partes[0]), Number(partes[1]) - 1, Number(partes[2]));
+        var urlReserva = contenedor.dataset.reservaUrl;
+        var finDeSemana = [];
+        var html = ['<table class="calendario"><thead><tr><th class="habitacion">Hab.</th>'];
+        var i;
+
+        for (i = 0; i < datos.dias; i++) {
+            var fecha = new Date(desde.getFullYear(), desde.getMonth(), desde.getDate() + i);
+            finDeSemana.push(fecha.getDay() === 0 || fecha.getDay() === 6);
+            html.push('<th title="' + fecha.toLocaleDateString() + '">' + DIAS_SEMANA[fecha.getDay()] +
+                '<br>' + fecha.getDate() + '</th>');
+        }
+        html.push('<th>Noches</th></tr><tr><th class="habitacion">Ocupadas</th>');
+        for (i = 0; i < datos.dias; i++) {
+            html.push('<th>' + datos.ocupadas_por_dia[i] + '</th>');
+        }
+        html.push('<th></th></tr></thead><tbody>');
+
+        // Reservas por habitación y noche de inicio.
+        var inicios = {};
+        datos.reservas.forEach(function (reserva) {
+            (inicios[reserva.habitacion] = inicios[reserva.habitacion] || {})[reserva.inicio] = reserva;
+        });
+
+        datos.habitaciones.forEach(function (habitacion) {
+            var propias = inicios[habitacion.id] || {};
+            var libre = habitacion.estado === 'mantenimiento' ? ' mantenimiento' : '';
+            html.push('<tr><th class="habitacion">' + escapar(habitacion.numero) + '</th>');
+            for (var noche = 0; noche < datos.dias;) {
+                var reserva = propias[noche];
+                if (reserva) {
+                    html.push('<td class="reserva ' + escapar(reserva.estado) + '" colspan="' + reserva.noches +
+                        '" title="' + escapar(reserva.cliente) + '"><a href="' +
+                        urlReserva.replace('/0/', '/' + reserva.id + '/') + '">' + escapar(reserva.cliente) +
+                        '</a></td>');
+                    noche += reserva.noches;
+                } else {
+                    html.push('<td class="' + (finDeSemana[noche] ? 'fin-de-semana' : '') + libre + '"></td>');
+                    noche++;
+                }
+            }
+            html.push('<td>' + contarNoches(habitacion.ocupadas, datos.dias) + '</td></tr>');
+        });
+        html.push('</tbody></table>');
+        contenedor.innerHTML = html.join('');
+    }
+
+    fetch(contenedor.dataset.calendarioUrl, {credentials: 'same-origin'})
+        .then(function (respuesta) {
+            if (!respuesta.ok) {
+                throw new Error(respuesta.status);
+            }
+            return respuesta.json();
+        })
+        .then(dibujar)
+        .catch(function () {
+            contenedor.innerHTML = '<div class="alert alert-danger text-center">No se pudo cargar el calendario.</div>';
+        });
+});